@@ -7,6 +7,7 @@ from src.sheet.router import router as router_sheet
 from src.report.router import router_category
 from src.rep.router import router_report
 from src.group.router import router_group
+from src.finrep import executor as finrep_executor
 
 app = FastAPI()
 
@@ -29,5 +30,7 @@ app.include_router(router_report)
 app.include_router(router_category)
 app.include_router(router_sheet)
 
+app.add_event_handler("shutdown", finrep_executor.shutdown)
+
 if __name__ == "__main__":
     uvicorn.run(app, host="127.0.0.1", port=9999)
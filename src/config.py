@@ -0,0 +1,23 @@
+import os
+import typing
+
+from src.rep.enums import ReportEngine
+
+# Settings are read from the environment once on import, the defaults suit a single server process
+
+
+def _get_choice(name: str, default: str, choices: tuple[str, ...]) -> str:
+    value = os.environ.get(name, default).upper()
+    if value not in choices:
+        raise ValueError(f'{name} must be one of {choices}, got {value}')
+    return value
+
+
+# PROCESS keeps pandas work off the event loop and the GIL, THREAD only off the event loop,
+# INLINE runs pipelines in the caller (useful for debugging). No FINREP_MAX_WORKERS means the executor default
+FINREP_EXECUTOR = _get_choice('FINREP_EXECUTOR', 'PROCESS', ('PROCESS', 'THREAD', 'INLINE'))
+FINREP_MAX_WORKERS = int(os.environ['FINREP_MAX_WORKERS']) if os.environ.get('FINREP_MAX_WORKERS') else None
+
+WIRE_FRAME_CACHE_MAX_BYTES = int(os.environ.get('WIRE_FRAME_CACHE_MAX_BYTES', 512 * 1024 ** 2))
+
+REPORT_ENGINE: ReportEngine = _get_choice('REPORT_ENGINE', 'WIRE', typing.get_args(ReportEngine))
@@ -1,5 +1,5 @@
 from .finrep_factory import FinrepFactory
-from .wire import Wire
+from .wire import Wire, AggregatedWire
 from .interval import Interval
 from .group import Group, ProfitGroup, BalanceGroup
 from .report import Report, ProfitReport, BalanceReport
@@ -0,0 +1,97 @@
+import asyncio
+import functools
+import multiprocessing
+import typing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+
+from src import config
+from .finrep_factory import FinrepFactory, CATEGORY
+from .wire import Wire
+from .interval import Interval
+
+ExecutorKind = typing.Literal['PROCESS', 'THREAD', 'INLINE']
+
+FINREP_EXECUTOR: ExecutorKind = config.FINREP_EXECUTOR
+FINREP_MAX_WORKERS: int | None = config.FINREP_MAX_WORKERS
+
+_executor: Executor | None = None
+
+
+def get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        if FINREP_EXECUTOR == 'PROCESS':
+            # Spawned workers don't inherit the event loop and db connections of the server process
+            _executor = ProcessPoolExecutor(FINREP_MAX_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+        else:
+            _executor = ThreadPoolExecutor(FINREP_MAX_WORKERS, thread_name_prefix='finrep')
+    return _executor
+
+
+def shutdown() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def run(func: typing.Callable, *args, **kwargs):
+    if FINREP_EXECUTOR == 'INLINE':
+        return func(*args, **kwargs)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+
+
+# Pipelines are module level functions, so they can be pickled and sent to a worker process.
+# They take and return plain frames and small objects only, a raw wire_df is validated in the worker too
+
+def _get_wire(frep: FinrepFactory, wire: Wire | pd.DataFrame) -> Wire:
+    if isinstance(wire, Wire):
+        return wire
+    return frep.create_wire(wire)
+
+
+def create_group_df(category: CATEGORY, wire: Wire | pd.DataFrame, ccols: list[str],
+                    fixed_ccols: list[str]) -> pd.DataFrame:
+    frep = FinrepFactory(category)
+    return frep.create_group_from_wire(_get_wire(frep, wire), ccols=ccols, fixed_ccols=fixed_ccols).get_group_df()
+
+
+def update_group_df(category: CATEGORY, wire: Wire | pd.DataFrame, old_group_df: pd.DataFrame, ccols: list[str],
+                    fixed_ccols: list[str]) -> pd.DataFrame:
+    frep = FinrepFactory(category)
+    return (
+        frep.create_group_from_frame(old_group_df, ccols, fixed_ccols)
+        .update_group(_get_wire(frep, wire))
+        .get_group_df()
+    )
+
+
+def create_report_df(category: CATEGORY, wire: Wire | pd.DataFrame, group_df: pd.DataFrame, ccols: list[str],
+                     fixed_ccols: list[str] | None, interval: Interval) -> pd.DataFrame:
+    frep = FinrepFactory(category)
+    group = frep.create_group_from_frame(group_df, ccols=ccols, fixed_ccols=fixed_ccols)
+    return (
+        frep.create_report(_get_wire(frep, wire), group, interval)
+        .create_report_df()
+        .sort_by_group()
+        .drop_zero_rows()
+        .calculate_total()
+        .get_report_df()
+    )
+
+
+def update_report_df(category: CATEGORY, wire: Wire | pd.DataFrame, group_df: pd.DataFrame, ccols: list[str],
+                     interval: Interval) -> pd.DataFrame:
+    frep = FinrepFactory(category)
+    group = frep.create_group_from_frame(group_df, ccols=ccols)
+    return (
+        frep.create_report(_get_wire(frep, wire), group, interval)
+        .create_report_df()
+        .sort_by_group()
+        .calculate_total()
+        .drop_zero_rows()
+        .get_report_df()
+    )
@@ -2,7 +2,7 @@ import typing
 
 import pandas as pd
 
-from .wire import Wire
+from .wire import Wire, AggregatedWire
 from .interval import Interval
 from .group import Group, ProfitGroup, BalanceGroup
 from .report import Report, ProfitReport, BalanceReport
@@ -35,11 +35,19 @@ class FinrepFactory:
     def __init__(self, finrep_category: CATEGORY):
         self.__interval = Interval
         self.__wire = Wire
+        self.__aggregated_wire = AggregatedWire
         self.__group = get_group(finrep_category)
         self.__report = get_report(finrep_category)
 
-    def create_wire(self, wire_df: pd.DataFrame) -> Wire:
-        return self.__wire(wire_df)
+    def create_wire(self, wire_df: pd.DataFrame, start_date: pd.Timestamp = None) -> Wire:
+        return self.__wire(wire_df, start_date)
+
+    def create_aggregated_wire(self, saldo_df: pd.DataFrame, breaks: pd.DatetimeIndex,
+                               start_date: pd.Timestamp) -> AggregatedWire:
+        return self.__aggregated_wire(saldo_df, breaks, start_date)
+
+    def get_breaks(self, interval: Interval, start_date: pd.Timestamp) -> pd.DatetimeIndex:
+        return self.__report.get_breaks(interval, start_date)
 
     def create_interval(self,
                         period_year: int,
@@ -1,21 +1,83 @@
 from copy import deepcopy
 
+import numpy as np
 import pandas as pd
 from typing import Self
 
 from .wire import Wire
 
 
+# Group compiled for joins with wires: ccols tuples are factorized into int64 keys,
+# level names and reverse flags are kept in arrays aligned with the group rows
+class GroupMapping:
+    def __init__(self, group_df: pd.DataFrame, ccols: list[str]):
+        self._group_df = group_df
+        self._ccols = ccols.copy()
+        self._level_codes: dict[tuple[str, ...], tuple[list[np.ndarray], pd.Index]] = {}
+
+        # Every ccol narrows the key down to the unique tuples of the columns seen so far,
+        # so keys stay below the group size and never overflow
+        self._ccol_uniques: list[pd.Index] = []
+        self._key_uniques: list[pd.Index] = []
+        keys = np.zeros(len(group_df), dtype=np.int64)
+        for ccol in ccols:
+            codes, uniques = pd.factorize(group_df[ccol])
+            combined = np.where((keys < 0) | (codes < 0), -1, keys * len(uniques) + codes)
+            key_uniques = pd.Index(np.unique(combined[combined >= 0]))
+            keys = np.where(combined < 0, -1, key_uniques.get_indexer(combined))
+            self._ccol_uniques.append(pd.Index(uniques))
+            self._key_uniques.append(key_uniques)
+
+        # Group rows sorted by key, the rows of the key k are self._order[self._starts[k]:self._starts[k + 1]]
+        key_count = len(self._key_uniques[-1]) if len(ccols) else 0
+        self._order = np.argsort(keys, kind='stable')[np.count_nonzero(keys < 0):]
+        self._starts = np.searchsorted(keys[self._order], np.arange(key_count + 1))
+
+        if 'reverse' in group_df.columns:
+            self.reverse = group_df['reverse'].fillna(False).to_numpy(dtype=bool)
+        else:
+            self.reverse = np.zeros(len(group_df), dtype=bool)
+
+    def get_keys(self, df: pd.DataFrame) -> np.ndarray:
+        keys = np.zeros(len(df), dtype=np.int64)
+        for ccol, uniques, key_uniques in zip(self._ccols, self._ccol_uniques, self._key_uniques):
+            codes = uniques.get_indexer(df[ccol])
+            combined = np.where((keys < 0) | (codes < 0), -1, keys * len(uniques) + codes)
+            keys = np.where(combined < 0, -1, key_uniques.get_indexer(combined))
+        return keys
+
+    def join(self, df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+        # Row numbers of df and of the group for every matched pair, in the order of an inner pd.merge on ccols
+        keys = self.get_keys(df)
+        matched = np.flatnonzero(keys >= 0)
+        starts = self._starts[keys[matched]]
+        counts = self._starts[keys[matched] + 1] - starts
+        df_rows = np.repeat(matched, counts)
+        offsets = np.arange(len(df_rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+        group_rows = self._order[np.repeat(starts, counts) + offsets]
+        return df_rows, group_rows
+
+    def get_level_codes(self, names: list[str]) -> tuple[list[np.ndarray], pd.Index]:
+        # Columns are factorized together and sorted, so their codes compare like the values do
+        key = tuple(names)
+        if key not in self._level_codes:
+            values = pd.concat([self._group_df[name] for name in names], ignore_index=True)
+            codes, uniques = pd.factorize(values, sort=True)
+            self._level_codes[key] = (np.split(codes.astype(np.int64), len(names)), pd.Index(uniques))
+        return self._level_codes[key]
+
+
 class Group:
     def __init__(self, group_df: pd.DataFrame, ccols: list[str], fixed_ccols: list[str] = None):
         self._group_df = group_df.copy()
         self._ccols = ccols.copy()
         self._fixed_ccols = fixed_ccols.copy() if fixed_ccols is not None else []
+        self._mappings: dict[tuple[str, ...], GroupMapping] = {}
 
     @classmethod
     def from_wire(cls, wire: Wire, ccols: list[str], fixed_ccols: list[str] = None) -> Self:
         df = wire.get_wire_df()
-        group_df = df[ccols].drop_duplicates().sort_values(ccols, ignore_index=True)
+        group_df = df[ccols].dropna().drop_duplicates().sort_values(ccols, ignore_index=True)
         levels = range(0, len(group_df.columns))
         for level in levels:
             name = f"level {level + 1}"
@@ -28,6 +90,12 @@ class Group:
             raise Exception(f"group is None; you probably miss create_group(wire: Wire, ccols: list[str]) function")
         return self._group_df.copy()
 
+    def get_mapping(self, ccols: list[str]) -> GroupMapping:
+        key = tuple(ccols)
+        if key not in self._mappings:
+            self._mappings[key] = GroupMapping(self._group_df, ccols)
+        return self._mappings[key]
+
     def update_group(self, wire: Wire) -> Self:
         if self._group_df is None:
             raise ValueError
@@ -48,6 +116,7 @@ class Group:
                 how='left',
             )
         self._rename_items(old_group_df)
+        self._mappings = {}
         return self
 
     def _rename_items(self, old_group_df: pd.DataFrame):
@@ -73,7 +142,7 @@ class BalanceGroup(Group):
     @classmethod
     def from_wire(cls, wire: Wire, ccols: list[str], fixed_ccols: list[str] = None) -> Self:
         df = wire.get_wire_df()
-        group_df = df[ccols].drop_duplicates().sort_values(ccols, ignore_index=True)
+        group_df = df[ccols].dropna().drop_duplicates().sort_values(ccols, ignore_index=True)
         levels = range(0, len(group_df.columns))
         for level in levels:
             name = f"{cls.__assets_key}, level {level + 1}"
@@ -45,5 +45,67 @@ class Interval:
     def get_intervals(self) -> pd.DatetimeIndex:
         return self.intervals
 
+    def get_buckets(self) -> 'Buckets':
+        return Buckets(self.intervals)
+
     def copy(self) -> typing.Self:
         return deepcopy(self)
+
+
+# Right-closed buckets between breaks, the same as pd.cut(dates, breaks, right=True) but with integer codes:
+# breaks[i] < date <= breaks[i + 1] gets code i, dates outside of the breaks get -1.
+# Naive breaks are treated as UTC
+class Buckets:
+    grid_units = [pd.Timedelta(1, unit=x).value for x in ('D', 'h', 'min', 's')]
+    max_table_size = 1_000_000
+
+    def __init__(self, breaks: pd.DatetimeIndex):
+        self.breaks = pd.DatetimeIndex(breaks)
+        self._bounds = self._to_utc_int64(self.breaks)
+        if np.any(np.diff(self._bounds) <= 0):
+            raise ValueError('breaks must be strictly increasing')
+        self.labels: np.ndarray = self.breaks[1:].date
+        self._unit, self._table = self._create_table(self._bounds)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Buckets) and np.array_equal(self._bounds, other._bounds)
+
+    def get_codes(self, dates: pd.Series | pd.DatetimeIndex | np.ndarray) -> np.ndarray:
+        values = self._to_utc_int64(dates)
+        if self._table is None:
+            codes = np.searchsorted(self._bounds, values, side='left') - 1
+            codes[codes >= len(self.labels)] = -1
+            return codes
+
+        # Every date of the grid step (first + (k - 1) * unit, first + k * unit] lies in the same bucket
+        first, last = self._bounds[0], self._bounds[-1]
+        inside = (values > first) & (values <= last)
+        steps = (values[inside] - first - 1) // self._unit + 1
+        codes = np.full(len(values), -1, dtype=np.int64)
+        codes[inside] = self._table[steps]
+        return codes
+
+    def get_labels(self) -> np.ndarray:
+        return self.labels
+
+    @classmethod
+    def _create_table(cls, bounds: np.ndarray) -> tuple[int, np.ndarray | None]:
+        # Breaks usually lie on the day grid, then codes are looked up by the grid step number
+        # instead of a binary search for every date
+        offsets = bounds - bounds[0]
+        for unit in cls.grid_units:
+            if np.any(offsets % unit) or offsets[-1] // unit >= cls.max_table_size:
+                continue
+            steps = bounds[0] + np.arange(offsets[-1] // unit + 1) * unit
+            return unit, np.searchsorted(bounds, steps, side='left') - 1
+        return 0, None
+
+    @staticmethod
+    def _to_utc_int64(dates) -> np.ndarray:
+        dates = pd.DatetimeIndex(dates)
+        if dates.tz is not None:
+            dates = dates.tz_convert('UTC').tz_localize(None)
+        return dates.as_unit('ns').asi8
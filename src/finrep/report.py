@@ -8,7 +8,7 @@ import pandera
 
 from .wire import Wire
 from .group import Group, BalanceGroup
-from .interval import Interval
+from .interval import Interval, Buckets
 
 
 class Report:
@@ -25,90 +25,64 @@ class Report:
 
         self._report_df = None
 
+    @classmethod
+    def get_breaks(cls, interval: Interval, start_date: pd.Timestamp) -> pd.DatetimeIndex:
+        return interval.get_intervals()
+
     def create_report_df(self) -> Self:
-        wires = self._wire_df.copy()
-        wires['interval'] = pd.cut(wires['date'], self._interval.get_intervals(), right=True)
-        wires['saldo'] = wires['debit'] - wires['credit']
-
-        needed_cols = ['interval'] + self._ccols + ['saldo']
-        wires = (
-            wires[needed_cols]
-            .dropna(axis=0, how='any')
-            .groupby(needed_cols[:-1])
-            .sum()
-            .reset_index()
-        )
+        buckets = Buckets(self.get_breaks(self._interval, self._wire.get_start_date()))
+        wires = self._wire.aggregate_saldo(buckets, self._ccols)
 
-        merged_df = pd.merge(wires, self._group.get_group_df(), on=self._ccols, how='inner')
-        merged_df.loc[merged_df['reverse'], 'saldo'] = -merged_df.loc[merged_df['reverse'], 'saldo']
-        merged_df = merged_df[['saldo', 'interval', ] + self._index_names]
+        # Wires are joined to the group by integer keys and summed up by the integer codes of the levels
+        mapping = self._group.get_mapping(self._ccols)
+        wire_rows, group_rows = mapping.join(wires)
+        saldo = wires['saldo'].to_numpy()[wire_rows]
+        saldo = np.where(mapping.reverse[group_rows], -saldo, saldo)
 
-        needed_cols = self._index_names + ['interval']
-        report_df = (
-            merged_df
-            .groupby(needed_cols, observed=True)
-            .sum()
-            .reset_index()
-            .set_index(self._index_names)
-        )
+        lines = pd.DataFrame({'interval': wires['interval'].to_numpy()[wire_rows], 'saldo': saldo})
+        levels = []
+        for name in self._index_names:
+            (codes,), uniques = mapping.get_level_codes([name])
+            lines[name] = codes[group_rows]
+            levels.append(uniques)
+        report_df = self._sum_by_level_codes(lines, levels, self._index_names)
 
-        report_df = self._split_df_by_intervals(report_df)
+        report_df = self._split_df_by_intervals(report_df, buckets)
 
         self._report_df = report_df
         return self
 
     def sort_by_group(self) -> Self:
-        report_df = self._report_df.reset_index()
         if isinstance(self._group, BalanceGroup):
-            group_df = (
-                self._group.get_splited_group_df()
-                .drop_duplicates()
-                .reset_index(drop=True)
-            )
+            group_df = self._group.get_splited_group_df().drop_duplicates().reset_index(drop=True)
         else:
-            group_df = (
-                self._group.get_group_df()
-                .drop_duplicates()
-                .reset_index(drop=True)
-            )
-
-        group_df["__sortcol__"] = range(0, len(group_df.index))
-        group_df = group_df[self._index_names + ["__sortcol__"]]
-
-        group_df.loc[:, self._index_names] = group_df.loc[:, self._index_names].astype(str)
-        report_df.loc[:, self._index_names] = report_df.loc[:, self._index_names].astype(str)
-
-        report_df = (
-            pd.merge(report_df, group_df, on=self._index_names, how='left')
-            .sort_values('__sortcol__', ignore_index=True)
-            .drop('__sortcol__', axis=1)
-        )
-
-        self._report_df = report_df.set_index(self._index_names)
+            group_df = self._group.get_group_df().drop_duplicates().reset_index(drop=True)
+
+        # Levels are compared as strings, the first group row of every level tuple gives the position of the line.
+        # Lines that are not in the group go last in their original order
+        group_index = pd.MultiIndex.from_frame(group_df[self._index_names].astype(str))
+        positions = np.flatnonzero(~group_index.duplicated())
+        group_index = group_index[positions]
+        if len(self._index_names) == 1:
+            group_index = group_index.get_level_values(0)
+
+        report_index = self._report_df.index
+        if not isinstance(report_index, pd.MultiIndex):
+            report_index = pd.MultiIndex.from_arrays([report_index])
+        levels = [level.append(pd.Index([np.nan])).astype(str) for level in report_index.levels]
+        codes = [np.where(codes < 0, len(level), codes)
+                 for level, codes in zip(report_index.levels, report_index.codes)]
+        report_index = self._build_index(levels, codes, self._index_names)
+
+        found = group_index.get_indexer(report_index)
+        sortcol = np.where(found < 0, len(group_df), positions[found])
+        order = np.argsort(sortcol, kind='stable')
+
+        self._report_df = self._report_df.iloc[order].set_axis(report_index[order], axis=0)
         return self
 
     def calculate_total(self) -> Self:
-        report_df = self._report_df.reset_index().reset_index()
-        gcols = self._index_names[:-1]
-        sum_cols = self._report_df.columns
-
-        while gcols:
-            grouped = report_df.groupby(gcols, as_index=False)
-            total: pd.DataFrame = grouped[sum_cols].sum()
-            sortcol: pd.DataFrame = grouped['index'].aggregate('min')
-            sortcol['index'] = sortcol['index'] - 0.1
-            total = pd.merge(total, sortcol, on=gcols)
-            report_df = pd.concat([total, report_df], ignore_index=True)
-            gcols.pop()
-
-        report_df = (
-            report_df
-            .sort_values('index')
-            .drop('index', axis=1)
-            .fillna('TOTAL')
-            .set_index(self._index_names)
-        )
-        self._report_df = report_df
+        self._report_df = self._calculate_total(self._report_df, self._index_names)
         return self
 
     def drop_zero_rows(self) -> Self:
@@ -142,23 +116,90 @@ class Report:
         return names
 
     @staticmethod
-    def _split_df_by_intervals(df: pd.DataFrame) -> pd.DataFrame:
+    def _calculate_total(df: pd.DataFrame, index_names: list[str]) -> pd.DataFrame:
+        # Subtotals of every index prefix are summed from the lines in one pass per level (like GROUPING SETS)
+        # over the integer codes of the index, then every subtotal is put before the first line of its group
+        # by integer (position, depth) ordering keys. Missing index values become TOTAL like in the subtotals
+        index = df.index if isinstance(df.index, pd.MultiIndex) else pd.MultiIndex.from_arrays([df.index])
+        size = len(index_names)
+        codes = np.stack(index.codes, axis=1).astype(np.int64) if len(df) else np.empty((0, size), dtype=np.int64)
+        missing = codes < 0
+
+        levels = []
+        for i, level in enumerate(index.levels):
+            if 'TOTAL' not in level and (i > 0 or missing[:, i].any()):
+                level = level.append(pd.Index(['TOTAL'], dtype=object))
+            codes[missing[:, i], i] = level.get_loc('TOTAL') if missing[:, i].any() else 0
+            levels.append(level)
+        total_codes = np.array([level.get_loc('TOTAL') if 'TOTAL' in level else -1 for level in levels])
+
+        values = df.to_numpy()
+        all_codes, all_values = [codes], [values]
+        positions, depths = [np.arange(len(df))], [np.full(len(df), size)]
+        for depth in range(1, size):
+            # Lines with a missing value in the prefix are not summed up, like groupby(dropna=True) does
+            rows = np.flatnonzero(~missing[:, :depth].any(axis=1))
+            if len(rows) == 0:
+                continue
+            keys = codes[rows, :depth]
+            order = np.lexsort(keys.T[::-1])
+            rows, keys = rows[order], keys[order]
+            starts = np.flatnonzero(np.r_[True, (keys[1:] != keys[:-1]).any(axis=1)])
+
+            group_codes = np.tile(total_codes, (len(starts), 1))
+            group_codes[:, :depth] = keys[starts]
+            all_codes.append(group_codes)
+            all_values.append(np.add.reduceat(values[rows], starts, axis=0))
+            positions.append(rows[starts])
+            depths.append(np.full(len(starts), depth))
+
+        order = np.lexsort((np.concatenate(depths), np.concatenate(positions)))
+        report_index = Report._build_index(levels, list(np.concatenate(all_codes)[order].T), index_names)
+        return pd.DataFrame(np.concatenate(all_values)[order], index=report_index, columns=df.columns)
+
+    @staticmethod
+    def _build_index(levels: list[pd.Index], codes: list[np.ndarray], names: list[str]) -> pd.Index:
+        # Levels are sorted and deduplicated like MultiIndex.from_arrays does it (so partial .loc lookups keep
+        # working), only the unique level values are touched
+        sorted_levels, sorted_codes = [], []
+        for level, level_codes in zip(levels, codes):
+            categorical = pd.Categorical(level)
+            sorted_levels.append(categorical.categories)
+            sorted_codes.append(categorical.codes.astype(np.int64)[level_codes])
+        index = pd.MultiIndex(levels=sorted_levels, codes=sorted_codes, names=names, verify_integrity=False)
+        index = index.remove_unused_levels()
+        if len(names) == 1:
+            return index.get_level_values(0)
+        return index
+
+    @staticmethod
+    def _sum_by_level_codes(lines: pd.DataFrame, levels: list[pd.Index], names: list[str]) -> pd.DataFrame:
+        # Lines with missing level values are dropped like groupby does it,
+        # the codes are sorted like the level values, so the order of the groups is the same too
+        lines = lines.loc[(lines[names] >= 0).all(axis=1)]
+        lines = lines.groupby(names + ['interval']).sum().reset_index()
+        index = Report._build_index(levels, [lines[name].to_numpy() for name in names], names)
+        return lines[['interval', 'saldo']].set_axis(index, axis=0)
+
+    @staticmethod
+    def _split_df_by_intervals(df: pd.DataFrame, buckets: Buckets) -> pd.DataFrame:
         if 'interval' not in df.columns:
             raise ValueError('"interval" not in df.columns')
         if len(df.columns) > 2:
             raise ValueError(f'function expected df with to columns only (and the first column must be "interval")'
                              f'real columns are: {df.columns}')
 
-        splited = []
-        columns = []
+        # Every (row, interval) pair is unique, so the saldo is scattered into a zero matrix in one pass.
+        # Rows keep the order of their first appearance
+        if len(df) == 0:
+            return pd.DataFrame(index=df.index, columns=buckets.get_labels(), dtype=float)
 
-        for interval in df['interval'].unique():
-            series = df.loc[df['interval'] == interval].drop('interval', axis=1)
-            splited.append(series)
-            columns.append(interval.right.date())
-        splited = pd.concat(splited, axis=1).fillna(0)
-        splited.columns = columns
-        return splited
+        value_col = df.columns.drop('interval')[0]
+        rows, index = pd.factorize(df.index)
+        values = np.zeros((len(index), len(buckets)))
+        values[rows, df['interval'].to_numpy()] = df[value_col].to_numpy()
+        index = index.set_names(df.index.names)
+        return pd.DataFrame(values, index=index, columns=buckets.get_labels())
 
 
 class ProfitReport(Report):
@@ -192,47 +233,44 @@ class BalanceReport(Report):
         names = [f"level {i}" for i in range(0, int(len(gcols) / 2) + 1)]
         return names
 
-    def create_report_df(self) -> Self:
+    @classmethod
+    def get_breaks(cls, interval: Interval, start_date: pd.Timestamp) -> pd.DatetimeIndex:
+        # The first break only has to lie before all wires, it is truncated to the day so breaks stay on midnights
         balance_interval = Interval(
-            iyear=self._interval.years,
-            imonth=self._interval.months,
-            iday=self._interval.days,
-            start_date=self._wire_df['date'].min() - pd.Timedelta(31, unit='D'),
-            end_date=self._interval.end_date,
+            iyear=interval.years,
+            imonth=interval.months,
+            iday=interval.days,
+            start_date=(pd.Timestamp(start_date) - pd.Timedelta(31, unit='D')).normalize(),
+            end_date=interval.end_date,
         )
-        wires = self._wire_df.copy()
-        wires['interval'] = pd.cut(wires['date'], balance_interval.get_intervals(), right=True)
-        wires['saldo'] = wires['debit'] - wires['credit']
+        return balance_interval.get_intervals()
 
+    def create_report_df(self) -> Self:
         # Aggregate saldo by interval and ccols
-        # Example: ['interval', 'sender', 'subconto', ]
-        needed_cols = ['interval'] + self._ccols + ['saldo']
-        wires = (
-            wires[needed_cols]
-            .dropna(axis=0, how='any')
-            .groupby(needed_cols[:-1])
-            .sum()
-            .reset_index()
-        )
-
-        # Create report_df from ccols
-        merged_df = pd.merge(wires, self._group.get_group_df(), on=self._ccols, how='inner')
-
-        common = ['saldo', 'interval']
-        columns = common + self._level_gcols
-
-        assets = merged_df.loc[merged_df['saldo'] >= 0][common + self._agcols]
-        assets.columns = columns
-        assets = assets.groupby(['interval'] + self._level_gcols).sum().reset_index().set_index(self._level_gcols)
-
-        liabs = merged_df.loc[merged_df['saldo'] < 0][common + self._lgcols]
-        liabs.columns = columns
-        liabs = liabs.groupby(['interval'] + self._level_gcols).sum().reset_index().set_index(self._level_gcols)
-
-        report_df = pd.concat([assets, liabs], keys=["assets", "liabs"])
-        report_df = self._split_df_by_intervals(report_df)
+        buckets = Buckets(self.get_breaks(self._interval, self._wire.get_start_date()))
+        wires = self._wire.aggregate_saldo(buckets, self._ccols)
+
+        # Join wires to the group by integer keys, assets and liabs levels share the codes of their values
+        mapping = self._group.get_mapping(self._ccols)
+        wire_rows, group_rows = mapping.join(wires)
+        lines = pd.DataFrame({
+            'interval': wires['interval'].to_numpy()[wire_rows],
+            'saldo': wires['saldo'].to_numpy()[wire_rows],
+        })
+        is_assets = lines['saldo'].to_numpy() >= 0
+
+        assets, liabs, levels = lines.loc[is_assets].copy(), lines.loc[~is_assets].copy(), []
+        for gcol, agcol, lgcol in zip(self._level_gcols, self._agcols, self._lgcols):
+            (acodes, lcodes), uniques = mapping.get_level_codes([agcol, lgcol])
+            assets[gcol] = acodes[group_rows][is_assets]
+            liabs[gcol] = lcodes[group_rows][~is_assets]
+            levels.append(uniques)
+        assets = self._sum_by_level_codes(assets, levels, self._level_gcols)
+        liabs = self._sum_by_level_codes(liabs, levels, self._level_gcols)
 
         # Change ccols to gcols and recalculating data in the new version of report_df
+        report_df = pd.concat([assets, liabs], keys=["assets", "liabs"])
+        report_df = self._split_df_by_intervals(report_df, buckets)
         report_df = (
             report_df
             .reset_index()
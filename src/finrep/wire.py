@@ -4,6 +4,8 @@ from copy import deepcopy
 import pandas as pd
 import pandera as pa
 
+from .interval import Buckets
+
 
 # todo need date validation
 class WireSchema(pa.DataFrameModel):
@@ -15,14 +17,58 @@ class WireSchema(pa.DataFrameModel):
 
 
 class Wire:
-    def __init__(self, wire_df: pd.DataFrame):
+    # start_date overrides the first date of wire_df, e.g. when wires were rolled up to the closing midnight
+    def __init__(self, wire_df: pd.DataFrame, start_date: pd.Timestamp = None):
+        # Subconto and comment may be empty, wires with an empty ccol are dropped when saldo is grouped by it
         WireSchema.validate(wire_df)
-        if wire_df.isna().sum().sum() > 0:
-            raise ValueError('wire_df count NaNs > 0')
         self.wire_df = wire_df.copy()
+        self.start_date = start_date
 
     def get_wire_df(self) -> pd.DataFrame:
         return self.wire_df
 
+    def get_start_date(self) -> pd.Timestamp:
+        if self.start_date is not None:
+            return self.start_date
+        return self.wire_df['date'].min()
+
+    def aggregate_saldo(self, buckets: Buckets, ccols: list[str]) -> pd.DataFrame:
+        wires = self.wire_df[ccols].copy()
+        wires['interval'] = buckets.get_codes(self.wire_df['date'])
+        wires['saldo'] = self.wire_df['debit'] - self.wire_df['credit']
+        wires = wires.loc[wires['interval'] >= 0]
+        return self._group_saldo(wires, ccols)
+
+    @staticmethod
+    def _group_saldo(wires: pd.DataFrame, ccols: list[str]) -> pd.DataFrame:
+        # Example: ['interval', 'sender', 'subconto', ], interval is the integer code of the bucket
+        needed_cols = ['interval'] + ccols + ['saldo']
+        wires = (
+            wires[needed_cols]
+            .dropna(axis=0, how='any')
+            .groupby(needed_cols[:-1])
+            .sum()
+            .reset_index()
+        )
+        return wires
+
     def copy(self) -> typing.Self:
-        return deepcopy(self)
\ No newline at end of file
+        return deepcopy(self)
+
+
+# Saldo that was already aggregated by (interval, ccols) outside (e.g. in the database) for the given breaks
+class AggregatedWire(Wire):
+    def __init__(self, saldo_df: pd.DataFrame, breaks: pd.DatetimeIndex, start_date: pd.Timestamp):
+        if 'interval' not in saldo_df.columns or 'saldo' not in saldo_df.columns:
+            raise ValueError(f'saldo_df must have "interval" and "saldo" columns, real columns are: {saldo_df.columns}')
+        self.wire_df = saldo_df.copy()
+        self.buckets = Buckets(breaks)
+        self.start_date = start_date
+
+    def get_start_date(self) -> pd.Timestamp:
+        return self.start_date
+
+    def aggregate_saldo(self, buckets: Buckets, ccols: list[str]) -> pd.DataFrame:
+        if self.buckets != buckets:
+            raise ValueError('wire was aggregated with other interval breaks')
+        return self._group_saldo(self.wire_df, ccols)
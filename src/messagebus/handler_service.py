@@ -1,7 +1,7 @@
 from collections import deque
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.wire.service import CrudService, PlanItemService
+from src.wire.service import CrudService, PlanItemService, WireService
 from src.sheet.service import SheetService
 from src.group.service import GroupService
 from src.rep.service import ReportService
@@ -14,7 +14,7 @@ class HandlerService:
     def __init__(self, session: AsyncSession):
         self.queue = deque()
         self.results = {}
-        self.wire_service = CrudService(WireRepoPostgres(session))
+        self.wire_service = WireService(WireRepoPostgres(session))
         self.source_service = CrudService(SourceRepoPostgres(session))
         self.sheet_service = SheetService(SheetRepoPostgres(session))
         self.group_service = GroupService(GroupRepoPostgres(session))
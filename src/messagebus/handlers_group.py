@@ -1,5 +1,5 @@
 import loguru
-from src import finrep
+from src.finrep import executor
 from src.sheet import events as sheet_events
 
 from src.group import entities as group_entities
@@ -9,13 +9,12 @@ from .handler_service import HandlerService as HS
 
 
 async def handle_group_created(hs: HS, event: group_events.GroupCreated):
-    frep = finrep.FinrepFactory(event.category)
     event = event.model_copy()
 
     # Create group_df
-    wire_df = await hs.wire_service.get_many_as_frame({"sheet_id": event.sheet_id})
-    wire = frep.create_wire(wire_df)
-    group_df = frep.create_group_from_wire(wire, ccols=event.ccols, fixed_ccols=event.fixed_ccols).get_group_df()
+    source = await hs.source_service.get_one({"id": event.source_id})
+    wire_df = await hs.wire_service.get_source_frame(source.id, source.updated_at)
+    group_df = await executor.run(executor.create_group_df, event.category, wire_df, event.ccols, event.fixed_ccols)
 
     # Create sheet
     event.sheet_id = await hs.sheet_service.create_one(
@@ -50,25 +49,22 @@ async def handle_group_partial_updated(hs: HS, event: group_events.GroupPartialU
 
 
 async def handle_parent_updated(hs: HS, event: group_events.ParentUpdated):
-    frep = finrep.FinrepFactory(event.group_instance.category.value)
-
     old_group_df = await hs.sheet_service.get_one_as_frame(
         sheet_events.SheetGotten(sheet_id=event.group_instance.sheet.id))
 
     #  Create new group df
-    wire_df = await hs.wire_service.get_many_as_frame({"source_id": event.group_instance.source.id})
-    wire = frep.create_wire(wire_df)
-    new_group_df = (
-        frep.create_group_from_frame(old_group_df, event.group_instance.ccols, event.group_instance.fixed_ccols)
-        .update_group(wire)
-        .get_group_df()
-    )
+    source = event.group_instance.source
+    wire_df = await hs.wire_service.get_source_frame(source.id, source.updated_at)
+    new_group_df = await executor.run(executor.update_group_df, event.group_instance.category.value, wire_df,
+                                      old_group_df, event.group_instance.ccols, event.group_instance.fixed_ccols)
 
     # Update sheet with new group df
-    await hs.sheet_service.overwrite_one(
+    changed = await hs.sheet_service.overwrite_one(
         sheet_id=event.group_instance.sheet.id,
-        data=sheet_events.SheetCreated(df=new_group_df, drop_index=True, drop_columns=False)
+        data=sheet_events.SheetCreated(df=new_group_df, drop_index=True, drop_columns=False),
+        diff=True,
     )
+    loguru.logger.debug(f"group {event.group_instance.id}: {changed} cells changed")
 
     group_entity = group_entities.Group(**event.group_instance.dict())
     group_entity.sheet_df = new_group_df
@@ -1,6 +1,8 @@
 import loguru
+import pandas as pd
 
-from src import finrep
+from src import config, finrep
+from src.finrep import executor
 
 from src.sheet import events as sheet_events
 from src.group import events as group_events
@@ -8,31 +10,48 @@ from src.rep import events as report_events
 
 from src.rep import entities as report_entities
 from src.group import entities as group_entities
+from src.wire import entities as wire_entities
 
 from .handler_service import HandlerService as HS
 
+REPORT_ENGINE = config.REPORT_ENGINE
+
+
+async def get_report_wire(hs: HS, frep: finrep.FinrepFactory,
+                          source: wire_entities.Source | report_entities.InnerSource,
+                          interval: finrep.Interval, ccols: list[str]) -> finrep.Wire | pd.DataFrame:
+    if REPORT_ENGINE == "SQL":
+        start_date = await hs.wire_service.get_start_date(source.id)
+        breaks = frep.get_breaks(interval, start_date)
+        saldo_df = await hs.wire_service.get_saldo_frame(source.id, breaks, ccols)
+        return frep.create_aggregated_wire(saldo_df, breaks, start_date)
+
+    # Rollup days are the closing midnights, they fall into the same intervals as raw wires for midnight breaks only.
+    # Balance breaks are truncated to whole days, an interval with a time of day is served from raw wires
+    if REPORT_ENGINE == "ROLLUP":
+        start_date = await hs.wire_service.get_start_date(source.id)
+        breaks = frep.get_breaks(interval, start_date)
+        if (breaks == breaks.normalize()).all():
+            rollup_df = await hs.wire_service.get_rollup_frame(source.id)
+            return frep.create_wire(rollup_df, start_date)
+
+    # Raw wire_df is validated by the finrep executor, out of the event loop
+    return await hs.wire_service.get_source_frame(source.id, source.updated_at)
+
 
 async def handle_report_created(hs: HS, event: report_events.ReportCreated):
     event = event.model_copy()
     frep = finrep.FinrepFactory(event.category.value)
 
     # Create report_df
-    wire_df = await hs.wire_service.get_many_as_frame({"source_id": event.source.id})
-    wire = frep.create_wire(wire_df)
-
     group_df = await hs.group_service.get_linked_frame(group_id=event.group.id)
-    group = frep.create_group_from_frame(group_df, ccols=event.group.ccols, fixed_ccols=event.group.fixed_ccols)
-
     interval = frep.create_interval(**event.interval.dict())
 
-    report_df = (
-        frep.create_report(wire, group, interval)
-        .create_report_df()
-        .sort_by_group()
-        .drop_zero_rows()
-        .calculate_total()
-        .get_report_df()
-    )
+    source = await hs.source_service.get_one({"id": event.source.id})
+    wire = await get_report_wire(hs, frep, source, interval, event.group.ccols)
+
+    report_df = await executor.run(executor.create_report_df, event.category.value, wire, group_df,
+                                   event.group.ccols, event.group.fixed_ccols, interval)
 
     # Create sheet
     sheet_id = await hs.sheet_service.create_one(
@@ -61,31 +80,27 @@ async def handle_parent_updated(hs: HS, event: report_events.ParentUpdated):
     # Create new report df
     frep = finrep.FinrepFactory(event.report_instance.category.value)
 
-    wire_df = await hs.wire_service.get_many_as_frame({"source_id": event.report_instance.source.id})
-    wire = frep.create_wire(wire_df)
-
     group_sheet_id = event.report_instance.group.sheet_id
     group_df = await hs.sheet_service.get_one_as_frame(sheet_events.SheetGotten(sheet_id=group_sheet_id))
-    group = frep.create_group_from_frame(group_df, ccols=event.report_instance.group.ccols)
 
     interval = event.report_instance.interval.model_dump()
     interval.pop("id")
     interval = frep.create_interval(**interval)
 
-    new_report_df = (
-        frep.create_report(wire, group, interval)
-        .create_report_df()
-        .sort_by_group()
-        .calculate_total()
-        .drop_zero_rows()
-        .get_report_df()
-    )
+    source = event.report_instance.source
+    wire = await get_report_wire(hs, frep, source, interval, event.report_instance.group.ccols)
+
+    new_report_df = await executor.run(executor.update_report_df, event.report_instance.category.value, wire,
+                                       group_df, event.report_instance.group.ccols, interval)
 
     # Update sheet with new report_df
-    await hs.sheet_service.overwrite_one(
+    # Only changed cells are written, so ids of the sheet stay valid on the client
+    changed = await hs.sheet_service.overwrite_one(
         sheet_id=event.report_instance.sheet.id,
-        data=sheet_events.SheetCreated(df=new_report_df, drop_index=False, drop_columns=False, readonly_all_cells=True)
+        data=sheet_events.SheetCreated(df=new_report_df, drop_index=False, drop_columns=False, readonly_all_cells=True),
+        diff=True,
     )
+    loguru.logger.debug(f"report {event.report_instance.id}: {changed} cells changed")
     hs.results[report_events.ParentUpdated] = report_entities.Report(**event.report_instance.dict())
 
     # Change sheet updated_at field
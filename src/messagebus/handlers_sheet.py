@@ -29,6 +29,11 @@ async def handle_sheet_info_updated(hs: HS, event: sheet_events.SheetInfoUpdated
     hs.results[sheet_events.SheetInfoUpdated] = sheet
 
 
+async def handle_scroll_size_gotten(hs: HS, event: sheet_events.ScrollSizeGotten):
+    scroll_size: sheet_entities.ScrollSize = await hs.sheet_service.get_scroll_size(event)
+    hs.results[sheet_events.ScrollSizeGotten] = scroll_size
+
+
 async def handle_col_filter_gotten(hs: HS, event: sheet_events.ColFilterGotten):
     col_filter: sheet_entities.ColFilter = await hs.sheet_service.get_col_filter(event)
     hs.results[sheet_events.ColFilterGotten] = col_filter
@@ -68,10 +73,34 @@ async def handle_rows_deleted(hs: HS, event: sheet_events.RowsDeleted):
     hs.queue.append(sheet_events.SheetInfoUpdated(sheet_id=event.sheet_id, data={}))
 
 
+async def handle_rows_inserted(hs: HS, event: sheet_events.RowsInserted):
+    row_ids: list[core_types.Id_] = await hs.sheet_service.insert_rows(event)
+    hs.results[sheet_events.RowsInserted] = row_ids
+    hs.queue.append(sheet_events.SheetInfoUpdated(sheet_id=event.sheet_id, data={}))
+
+
+async def handle_cols_inserted(hs: HS, event: sheet_events.ColsInserted):
+    col_ids: list[core_types.Id_] = await hs.sheet_service.insert_cols(event)
+    hs.results[sheet_events.ColsInserted] = col_ids
+    hs.queue.append(sheet_events.SheetInfoUpdated(sheet_id=event.sheet_id, data={}))
+
+
+async def handle_rows_moved(hs: HS, event: sheet_events.RowsMoved):
+    await hs.sheet_service.move_rows(event)
+    hs.results[sheet_events.RowsMoved] = None
+    hs.queue.append(sheet_events.SheetInfoUpdated(sheet_id=event.sheet_id, data={}))
+
+
+async def handle_sheet_rebalanced(hs: HS, event: sheet_events.SheetRebalanced):
+    await hs.sheet_service.rebalance(event.sheet_id)
+    hs.results[sheet_events.SheetRebalanced] = None
+
+
 HANDLERS_SHEET = {
     sheet_events.SheetInfoUpdated: [handle_sheet_info_updated],
     sheet_events.SheetCreated: [handle_sheet_created],
     sheet_events.SheetGotten: [handle_sheet_gotten],
+    sheet_events.ScrollSizeGotten: [handle_scroll_size_gotten],
     sheet_events.ColFilterGotten: [handle_col_filter_gotten],
     sheet_events.ColFilterUpdated: [handle_col_filter_updated],
     sheet_events.ColFiltersDropped: [handle_clear_all_filters],
@@ -79,4 +108,8 @@ HANDLERS_SHEET = {
     sheet_events.ColWidthUpdated: [handle_col_width_updated],
     sheet_events.CellsPartialUpdated: [handle_cells_partial_updated],
     sheet_events.RowsDeleted: [handle_rows_deleted],
+    sheet_events.RowsInserted: [handle_rows_inserted],
+    sheet_events.ColsInserted: [handle_cols_inserted],
+    sheet_events.RowsMoved: [handle_rows_moved],
+    sheet_events.SheetRebalanced: [handle_sheet_rebalanced],
 }
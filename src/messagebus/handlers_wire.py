@@ -18,6 +18,13 @@ async def handle_wire_many_created(hs: HS, event: wire_events.WireManyCreated):
     hs.queue.append(wire_events.SourceDatesInfoUpdated(source_id=event.source_id))
 
 
+async def handle_wire_csv_appended(hs: HS, event: wire_events.WireCsvAppended):
+    count = await hs.wire_service.append_many_from_csv(event.source_id, event.file)
+    hs.results[wire_events.WireCsvAppended] = count
+
+    hs.queue.append(wire_events.SourceDatesInfoUpdated(source_id=event.source_id))
+
+
 async def handle_plan_item_list_gotten(hs: HS, event: wire_events.PlanItemListGotten):
     columns_by = ['sender', 'receiver', 'sub1', 'sub2']
     filter_by = event.model_dump(exclude_none=True)
@@ -33,6 +40,9 @@ async def handle_wire_partial_updated(hs: HS, event: wire_events.WirePartialUpda
     wire: wire_entities.Wire = await hs.wire_service.update_one(data, filter_by)
     hs.results[wire_events.WirePartialUpdated] = wire
 
+    # Touch source updated_at, so linked groups and reports know that their wires changed
+    _ = await hs.source_service.update_one({}, filter_by={"id": wire.source_id})
+
 
 # todo dates are hardcoding!
 async def handle_source_info_updated(hs: HS, event: wire_events.SourceDatesInfoUpdated):
@@ -55,6 +65,7 @@ HANDLERS_WIRE = {
     wire_events.PlanItemListGotten: [handle_plan_item_list_gotten],
 
     wire_events.WireManyCreated: [handle_wire_many_created],
+    wire_events.WireCsvAppended: [handle_wire_csv_appended],
     wire_events.WirePartialUpdated: [handle_wire_partial_updated],
 
 }
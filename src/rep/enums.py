@@ -1,3 +1,7 @@
 import typing
 
 ReportCategory = typing.Literal["BALANCE", "PROFIT", "CASHFLOW"]
+
+# WIRE reads raw wires, ROLLUP reads daily saldo from wire_rollup (exact for intervals with midnight-aligned bounds),
+# SQL aggregates saldo by interval and ccols in the database
+ReportEngine = typing.Literal["WIRE", "ROLLUP", "SQL"]
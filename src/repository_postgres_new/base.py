@@ -1,11 +1,15 @@
 import typing
 from typing import TypeVar
 
+import asyncpg
 import loguru
+import numpy as np
 import pandas as pd
 from pydantic import BaseModel as PydanticModel
-from sqlalchemy import insert, Result, delete, update, GenerativeSelect, TIMESTAMP, func, bindparam
+from sqlalchemy import insert, Result, delete, update, GenerativeSelect, TIMESTAMP, func, bindparam, Select, Float, \
+    Integer, Boolean
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.orm import DeclarativeBase, mapped_column, Mapped
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -14,6 +18,9 @@ from src import core_types
 
 Entity = TypeVar('Entity', )
 
+COPY_CHUNKSIZE = 100_000
+FETCH_CHUNKSIZE = 100_000
+
 
 class BaseModel(DeclarativeBase):
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
@@ -39,6 +46,14 @@ class BasePostgres:
     def __init__(self, session: AsyncSession, ):
         self._session = session
 
+    async def _get_driver_connection(self) -> asyncpg.Connection:
+        connection = await self._session.connection()
+        # SQLAlchemy opens the asyncpg transaction lazily, so run a statement first
+        # to make sure the driver connection works inside the session transaction
+        await connection.exec_driver_sql("SELECT 1")
+        raw_connection = await connection.get_raw_connection()
+        return raw_connection.driver_connection
+
     def _parse_filters(self, filter_by: dict) -> list:
         result = []
 
@@ -112,6 +127,37 @@ class BasePostgres:
         stmt = insert(self.model)
         _: Result = await session.execute(stmt, data)
 
+    async def _allocate_ids(self, count: int) -> np.ndarray:
+        # Ids are taken from the sequence of the table in one round-trip,
+        # so the rows that refer to them can be built before the COPY
+        table = self.model.__table__
+        sequence = func.pg_get_serial_sequence(table.name, table.c.id.name)
+        stmt = select(func.array_agg(func.nextval(sequence))).select_from(func.generate_series(1, count))
+        result = await self._session.execute(stmt)
+        return np.array(result.scalar_one() or [], dtype=np.int64)
+
+    async def _copy_frame(self, df: pd.DataFrame) -> None:
+        # Binary COPY through the driver connection of the session transaction. Records are built chunk by chunk
+        # while the data is streamed, values are converted to python types asyncpg can encode
+        table = self.model.__table__
+        columns = list(df.columns)
+
+        def records():
+            for start in range(0, len(df), COPY_CHUNKSIZE):
+                chunk = df.iloc[start:start + COPY_CHUNKSIZE]
+                yield from zip(*[self._to_copy_values(chunk[col], table.c[col].type) for col in columns])
+
+        connection = await self._get_driver_connection()
+        await connection.copy_records_to_table(table.name, records=records(), columns=columns)
+
+    @staticmethod
+    def _to_copy_values(values: pd.Series, sa_type) -> list:
+        if isinstance(sa_type, Boolean):
+            return values.astype(bool).tolist()
+        if isinstance(sa_type, Integer) and values.notna().all():
+            return values.astype(np.int64).tolist()
+        return values.astype(object).where(values.notna(), None).tolist()
+
     async def get_one(self, filter_by: dict) -> Model:
         session = self._session
         filters = self._parse_filters(filter_by)
@@ -137,16 +183,60 @@ class BasePostgres:
 
     async def get_many_as_frame(self, filter_by: dict, order_by: OrderBy = None, asc=True,
                                 slice_from: int = None, slice_to: int = None) -> pd.DataFrame:
-        session = self._session
-
         filters = self._parse_filters(filter_by)
         orders = self._parse_orders(order_by, asc)
         stmt = select(self.model.__table__).where(*filters).order_by(*orders)
         stmt = self._paginate(stmt, slice_from, slice_to)
+        return await self._get_columns_as_frame(stmt)
+
+    async def _get_columns_as_frame(self, stmt: Select) -> pd.DataFrame:
+        # Every column is collected into postgres arrays chunk by chunk, so the driver decodes a record per chunk
+        # instead of building a python object per row, and no array grows with the table. Rows are numbered
+        # in the order of the select, arrays of a chunk are aggregated in that order, so they stay aligned
+        position = func.row_number().over(order_by=list(stmt._order_by_clauses)).label('__position')
+        subquery = stmt.add_columns(position).subquery()
+        position = subquery.c[position.key]
+        columns = [col for col in subquery.c if col is not position]
+        chunk = (position - 1) // FETCH_CHUNKSIZE
+        stmt = (
+            select(*[func.array_agg(aggregate_order_by(col, position)) for col in columns])
+            .group_by(chunk)
+            .order_by(chunk)
+        )
+
+        dialect = self._session.bind.dialect
+        compiled = stmt.compile(dialect=dialect, compile_kwargs={"render_postcompile": True})
+        params = [compiled.params[key] for key in compiled.positiontup]
+
+        # Chunks are streamed through a cursor of the session transaction
+        values = [[] for _ in columns]
+        connection = await self._get_driver_connection()
+        async for record in connection.cursor(compiled.string, *params, prefetch=1):
+            for i, chunk_values in enumerate(record):
+                values[i].extend(chunk_values)
+
+        # Dict keeps the order of columns. Passing columns as well sends datetime columns through object arrays
+        data = {
+            col.key: self._to_column_array(values[i], col.type, dialect)
+            for i, col in enumerate(columns)
+        }
+        return pd.DataFrame(data)
 
-        result = await session.execute(stmt)
-        result = pd.DataFrame.from_records(result.fetchall(), columns=self.model.get_columns())
-        return result
+    @staticmethod
+    def _to_column_array(values: list, sa_type, dialect) -> np.ndarray | pd.DatetimeIndex:
+        if isinstance(sa_type, TIMESTAMP):
+            return pd.to_datetime(values, utc=sa_type.timezone)
+        if isinstance(sa_type, Float):
+            return np.array(values, dtype=np.float64)
+        if isinstance(sa_type, Integer):
+            return np.array(values, dtype=np.float64 if None in values else np.int64)
+        if isinstance(sa_type, Boolean) and None not in values:
+            return np.array(values, dtype=bool)
+
+        processor = sa_type.dialect_impl(dialect).result_processor(dialect, None)
+        if processor is not None:
+            values = [processor(x) for x in values]
+        return np.fromiter(values, dtype=object, count=len(values))
 
     async def get_uniques_as_frame(self, columns_by: list[str], filter_by: dict,
                                    order_by: OrderBy = None, asc=True) -> pd.DataFrame:
@@ -202,11 +292,12 @@ class BasePostgres:
         models: list[Model] = list(result.scalars())
         return models[0]
 
-    async def delete_many(self, filter_by: dict) -> None:
+    async def delete_many(self, filter_by: dict) -> int:
         session = self._session
         filters = self._parse_filters(filter_by)
         stmt = delete(self.model).where(*filters)
-        _: Result = await session.execute(stmt)
+        result: Result = await session.execute(stmt)
+        return result.rowcount
 
 
 class BaseEntityPostgres(BasePostgres):
@@ -4,9 +4,19 @@ import loguru
 import numpy as np
 import pandas as pd
 
-from src import helpers
 from src.sheet import enums
 
+# Sort keys of sindexes are spaced by the gap, so new and moved sindexes get keys between their neighbours
+SORT_KEY_GAP = 2 ** 32
+
+
+def get_typed_values(values: pd.Series, dtypes: pd.Series) -> pd.DataFrame:
+    # Number and date cells keep a typed copy of their value next to the text, values that can't be parsed are None
+    numbers = pd.to_numeric(values.where(dtypes == enums.CellDtype.NUMBER.value), errors='coerce')
+    dates = pd.to_datetime(values.where(dtypes == enums.CellDtype.DATE.value), errors='coerce', format='mixed', utc=True)
+    typed = pd.DataFrame({'number_value': numbers, 'date_value': dates.dt.tz_localize(None)}, index=values.index)
+    return typed.astype(object).where(typed.notna(), None)
+
 
 class Normalizer:
 
@@ -30,18 +40,16 @@ class Normalizer:
         return self.cells
 
     def normalize(self):
-        table = self.df.copy()
-        table = table.reset_index(drop=self.drop_index)
+        table = self.df.reset_index(drop=self.drop_index)
+        header = self.create_header(table, self.drop_columns)
+        values, dtypes = self.create_value_grid(table, header)
 
-        table = table.transpose().reset_index(drop=self.drop_columns).transpose()
-        table = table.reset_index(drop=True)
-
-        vertical_difference = len(table) - len(self.df)
+        vertical_difference = len(header)
         horizontal_difference = len(table.columns) - len(self.df.columns)
 
-        rows: pd.DataFrame = self.create_sindex_df(len(table.index), vertical_difference, item_size=30)
+        rows: pd.DataFrame = self.create_sindex_df(len(values), vertical_difference, item_size=30)
         cols: pd.DataFrame = self.create_sindex_df(len(table.columns), horizontal_difference, item_size=120)
-        cells: pd.DataFrame = self.create_cell_df(rows, cols, table)
+        cells: pd.DataFrame = self.create_cell_df(rows, cols, values, dtypes)
 
         if self.readonly_all_cells:
             cells['is_readonly'] = True
@@ -52,20 +60,91 @@ class Normalizer:
         self.cols = cols
         self.cells = cells
 
+    @staticmethod
+    def create_header(table: pd.DataFrame, drop_columns: bool) -> np.ndarray:
+        # Header rows are the column levels of the table turned into rows by transposing.
+        # Values and types of the header don't depend on the count of rows, so one row is transposed instead of all
+        head = table.head(1)
+        head = head.transpose().reset_index(drop=drop_columns).transpose()
+        return head.iloc[:len(head) - len(table.head(1))].to_numpy(dtype=object)
+
+    @classmethod
+    def create_value_grid(cls, table: pd.DataFrame, header: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # Text values and dtypes of all cells as (rows, cols) grids
+        values = np.empty((len(header) + len(table), len(table.columns)), dtype=object)
+        dtypes = np.empty(values.shape, dtype=object)
+        values[:len(header)] = header.astype(str)
+        dtypes[:len(header)] = cls.get_dtypes_of_objects(header.ravel()).reshape(header.shape)
+        if table.empty:
+            return values, dtypes
+
+        # Transposing casts the values of all columns to their common dtype, object for mixed dtypes
+        common_dtype = table.head(1).transpose().dtypes.iloc[0]
+        if len(header) == 0 and common_dtype != object:
+            # Table of one dtype stays typed, so it is flattened and converted to text as a whole
+            flatten = pd.Series(table.set_axis(range(len(table.columns)), axis=1).stack().values)
+            values[:] = flatten.astype(str).to_numpy().reshape(values.shape)
+            dtypes[:] = cls.get_dtypes_of_series(flatten).reshape(values.shape)
+            return values, dtypes
+
+        for i, (_, column) in enumerate(table.items()):
+            column = column if common_dtype == object else column.astype(common_dtype)
+            values[len(header):, i] = cls.get_text_values(column)
+            dtypes[len(header):, i] = cls.get_dtypes_of_series(column)
+        return values, dtypes
+
+    @classmethod
+    def get_text_values(cls, column: pd.Series) -> np.ndarray:
+        # Numpy renders numbers and booleans the same way as str(), other values are converted one by one
+        if column.dtype.kind == 'f':
+            return column.to_numpy(dtype=np.float64).astype(str)
+        if column.dtype.kind in 'iu':
+            return column.to_numpy().astype(str)
+        if column.dtype.kind == 'b':
+            return np.where(column.to_numpy(dtype=bool), 'True', 'False')
+        return column.astype(object).astype(str).to_numpy()
+
+    @classmethod
+    def get_dtypes_of_series(cls, column: pd.Series) -> np.ndarray:
+        # Dtype of a value depends on its type only, so columns of numpy dtypes get it without looking at the values
+        if isinstance(column.dtype, np.dtype) and column.dtype.kind in 'fiu':
+            return np.full(len(column), enums.CellDtype.NUMBER.value, dtype=object)
+        if isinstance(column.dtype, np.dtype) and column.dtype.kind == 'b':
+            return np.full(len(column), enums.CellDtype.BOOLEAN.value, dtype=object)
+        return cls.get_dtypes_of_objects(column.astype(object).to_numpy())
+
+    @classmethod
+    def get_dtypes_of_objects(cls, values: np.ndarray) -> np.ndarray:
+        # Values are grouped by type, get_dtype is called once per type
+        codes, types = pd.factorize(pd.Series(values, dtype=object).map(type))
+        return np.array([cls.get_dtype(x) for x in types], dtype=object)[codes]
+
+    @staticmethod
+    def get_dtype(value_type: type) -> str:
+        if value_type is int or value_type is float:
+            return enums.CellDtype.NUMBER.value
+        if value_type is bool:
+            return enums.CellDtype.BOOLEAN.value
+        if issubclass(value_type, (datetime.date, datetime.datetime)):
+            return enums.CellDtype.DATE.value
+        return enums.CellDtype.TEXT.value
+
     @staticmethod
     def create_sindex_df(total_item_count: int, freeze_item_count: int, item_size: int) -> pd.DataFrame:
         sindex = pd.DataFrame(
             [],
             index=range(0, total_item_count),
-            columns=['size', 'is_freeze', 'is_filtred', 'is_readonly', 'index', 'scroll_pos']
+            columns=['size', 'is_freeze', 'is_filtred', 'is_readonly', 'index', 'scroll_pos', 'sort_key']
         )
         sindex['size'] = item_size
         sindex['is_freeze'] = False
         sindex['is_filtred'] = True
         sindex['is_readonly'] = False
         sindex['index'] = sindex.index
-        sindex['scroll_pos'] = sindex['size'].cumsum() - item_size * freeze_item_count
+        # Scroll position is where the sindex starts, frozen sindexes take no space and get -1
+        sindex['scroll_pos'] = sindex['size'].cumsum() - item_size * (freeze_item_count + 1)
         sindex['scroll_pos'] = np.where(sindex['scroll_pos'] < 0, -1, sindex['scroll_pos'])
+        sindex['sort_key'] = sindex['index'].astype(np.int64) * SORT_KEY_GAP
 
         if freeze_item_count > 0:
             sindex.iloc[0:freeze_item_count, 1] = True
@@ -74,7 +153,7 @@ class Normalizer:
         return sindex
 
     @staticmethod
-    def create_cell_df(rows: pd.DataFrame, cols: pd.DataFrame, table: pd.DataFrame) -> pd.DataFrame:
+    def create_cell_df(rows: pd.DataFrame, cols: pd.DataFrame, values: np.ndarray, dtypes: np.ndarray) -> pd.DataFrame:
         col_is_freeze = cols['is_freeze'].tolist() * len(rows.index)
         row_is_freeze = np.repeat(rows['is_freeze'].tolist(), len(cols.index))
         index_flag = np.where(
@@ -84,25 +163,15 @@ class Normalizer:
             np.logical_or(row_is_freeze, col_is_freeze), True, False
         )
 
-        def get_dtype(value):
-            value_type = type(value)
-            if value_type is int or value_type is float:
-                return enums.CellDtype.NUMBER.value
-            if value_type is bool:
-                return enums.CellDtype.BOOLEAN.value
-            if isinstance(value, (datetime.date,  datetime.datetime)):
-                return enums.CellDtype.DATE.value
-            return enums.CellDtype.TEXT.value
-
-        flatten = pd.DataFrame(table.stack().values, columns=['value'])
+        flatten = pd.DataFrame({'value': values.ravel()})
         flatten['is_index'] = index_flag
         flatten['is_readonly'] = readonly_flag
         flatten['is_filtred'] = True
-        flatten['dtype'] = flatten['value'].apply(get_dtype)
-        flatten['value'] = flatten['value'].astype(str)
+        flatten['dtype'] = dtypes.ravel()
         flatten['value'] = np.where(
             np.logical_and(col_is_freeze, row_is_freeze), '', flatten['value']
         )
+        flatten[['number_value', 'date_value']] = get_typed_values(flatten['value'], flatten['dtype'])
         flatten['color'] = np.where(flatten['is_readonly'], '#f8fafd', 'white')
 
         flatten['text_align'] = np.where(
@@ -118,7 +187,8 @@ class Denormalizer:
     def __init__(self, rows: pd.DataFrame, cols: pd.DataFrame, cells: pd.DataFrame):
         self.rows = rows.copy()
         self.cols = cols.copy()
-        self.cells = cells.copy()
+        # Cells are only read, copying them would take longer than building the table
+        self.cells = cells
         self.df = pd.DataFrame([])
 
     def get_denormalized(self) -> pd.DataFrame:
@@ -134,18 +204,30 @@ class Denormalizer:
         number_type = enums.CellDtype.NUMBER.value
         bool_type = enums.CellDtype.BOOLEAN.value
 
-        value = cells['value'].copy()
-        value.loc[cells['dtype'] == text_type] = value.loc[cells['dtype'] == text_type].astype(str)
-        value.loc[cells['dtype'] == number_type] = value.loc[cells['dtype'] == number_type].astype(float)
-        value.loc[cells['dtype'] == bool_type] = self._convert_to_boolean(value.loc[cells['dtype'] == bool_type])
-
-        values_list = value.tolist()
-        table = helpers.array_split(values_list, count_cols)
-        table = pd.DataFrame(table)
+        # Cells come in row-major order, so values and dtypes are reshaped into (rows, cols) grids
+        dtypes = cells['dtype'].to_numpy().reshape(-1, count_cols)
+        numbers = cells['number_value'].to_numpy(dtype=np.float64).reshape(-1, count_cols)
+        values = cells['value'].to_numpy(dtype=object, copy=True).reshape(-1, count_cols)
+        values[(dtypes == text_type) & pd.isna(values)] = 'None'
+
+        is_number = dtypes == number_type
+        is_bool = dtypes == bool_type
+        values[is_number] = numbers[is_number]
+        values[is_bool] = self._convert_to_boolean(pd.Series(values[is_bool], dtype=object)).to_numpy()
+
+        # Columns of the table body get a dtype when all their cells are numbers or all are booleans
+        body = {}
+        for i in range(count_cols):
+            if is_number[top_index:, i].all():
+                body[i] = numbers[top_index:, i]
+            elif is_bool[top_index:, i].all():
+                body[i] = values[top_index:, i].astype(bool)
+            else:
+                body[i] = values[top_index:, i]
+        table = pd.DataFrame(body, columns=range(count_cols))
 
         if top_index > 0:
-            table.columns = self._create_index(table.head(top_index))
-            table = table[:][top_index:].reset_index(drop=True)
+            table.columns = self._create_index(pd.DataFrame(values[:top_index]))
 
         # todo I am not sure that this code is correct
         if left_index > 0:
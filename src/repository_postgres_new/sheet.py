@@ -1,22 +1,33 @@
 import numpy as np
 import pandas as pd
 from loguru import logger
-from sqlalchemy import insert, select, func, bindparam, update, delete, Integer, Boolean, ForeignKey, String, TIMESTAMP
+from sqlalchemy import insert, select, func, bindparam, update, delete, Integer, Boolean, ForeignKey, String, TIMESTAMP, \
+    Float, Index, and_, or_, case, true, any_, all_, text, literal, ColumnElement, BigInteger, FromClause, cast, \
+    type_coerce
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Mapped, mapped_column
 
 from src.core_types import DTO
 from src import core_types
 from src.sheet import events
-from src.sheet import entities, schema
+from src.sheet import entities, schema, enums
 from src.sheet.repository import SheetRepo
-from .normalizer import Normalizer, Denormalizer
+from .normalizer import Normalizer, Denormalizer, get_typed_values, SORT_KEY_GAP
 from .base import BasePostgres, Model, BaseModel
 
 
 class SheetModel(BaseModel):
     __tablename__ = "sheet"
     updated_at: Mapped[TIMESTAMP] = mapped_column(TIMESTAMP(timezone=True), default=func.now(), onupdate=func.now())
+    count_rows: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default='0')
+    count_cols: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default='0')
+    scroll_height: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default='0')
+    scroll_width: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default='0')
+    # Stored indexes and scroll positions of the rows (cols) are stale after an insert or a move until the sheet
+    # is rebalanced, meanwhile they are derived from the sort keys
+    is_rows_stale: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False, server_default='false')
+    is_cols_stale: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False, server_default='false')
 
     def to_entity(self, **kwargs) -> entities.SheetInfo:
         return entities.SheetInfo(id=self.id, updated_at=self.updated_at)
@@ -30,8 +41,15 @@ class RowModel(BaseModel):
     is_filtred: Mapped[bool] = mapped_column(Boolean, nullable=False)
     index: Mapped[int] = mapped_column(Integer, nullable=False)
     scroll_pos: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    sort_key: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    count_hidden_cells: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default='0')
     sheet_id: Mapped[int] = mapped_column(Integer, ForeignKey(SheetModel.id, ondelete='CASCADE'), nullable=False,
                                           index=True)
+    __table_args__ = (
+        Index('ix_sheet_row_sheet_id_scroll_pos', 'sheet_id', 'scroll_pos'),
+        Index('ix_sheet_row_sheet_id_index', 'sheet_id', 'index'),
+        Index('ix_sheet_row_sheet_id_sort_key', 'sheet_id', 'sort_key'),
+    )
 
 
 class ColModel(BaseModel):
@@ -42,13 +60,20 @@ class ColModel(BaseModel):
     is_filtred: Mapped[bool] = mapped_column(Boolean, nullable=False)
     index: Mapped[int] = mapped_column(Integer, nullable=False)
     scroll_pos: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    sort_key: Mapped[int] = mapped_column(BigInteger, nullable=False)
     sheet_id: Mapped[int] = mapped_column(Integer, ForeignKey(SheetModel.id, ondelete='CASCADE'), nullable=False,
                                           index=True)
+    __table_args__ = (
+        Index('ix_sheet_col_sheet_id_index', 'sheet_id', 'index'),
+        Index('ix_sheet_col_sheet_id_sort_key', 'sheet_id', 'sort_key'),
+    )
 
 
 class CellModel(BaseModel):
     __tablename__ = "sheet_cell"
     value: Mapped[str] = mapped_column(String(1000), nullable=True, index=True)
+    number_value: Mapped[float] = mapped_column(Float, nullable=True)
+    date_value: Mapped[TIMESTAMP] = mapped_column(TIMESTAMP, nullable=True)
     dtype: Mapped[str] = mapped_column(String(30), nullable=False)
     is_readonly: Mapped[bool] = mapped_column(Boolean, nullable=False)
     is_filtred: Mapped[bool] = mapped_column(Boolean, nullable=False)
@@ -61,88 +86,484 @@ class CellModel(BaseModel):
                                         index=True)
     sheet_id: Mapped[int] = mapped_column(Integer, ForeignKey(SheetModel.id, ondelete='CASCADE'), nullable=False,
                                           index=True)
+    __table_args__ = (
+        Index('ix_sheet_cell_col_id_value', 'col_id', 'value'),
+        # Distinct (value, dtype) pairs of a col in typed order are read from the index page by page,
+        # sheet_id is included so they are counted by an index only scan
+        Index('ix_sheet_cell_col_id_typed_value', 'col_id', 'number_value', 'date_value', 'value', 'dtype',
+              postgresql_include=['sheet_id'], postgresql_where=text('NOT is_index')),
+    )
+
+
+# Prefix search of col filters (lower(value) LIKE 'x%') is a range over the pattern ops of the lowered text
+Index('ix_sheet_cell_col_id_lower_value', CellModel.col_id, func.lower(CellModel.value).label('lower_value'),
+      postgresql_ops={'lower_value': 'text_pattern_ops'}, postgresql_where=text('NOT is_index'))
+
+
+INT_MAX = 2 ** 31 - 1
+
+
+def _get_scroll_pos(size: ColumnElement, is_filtred: ColumnElement, is_freeze: ColumnElement,
+                    order_by: list[ColumnElement]) -> ColumnElement:
+    # Scroll position is the running sum of the sizes of previous sindexes (window function);
+    # filtred and frozen sindexes take no space, frozen sindexes get -1
+    scrolled_size = case((and_(is_filtred, ~is_freeze), size), else_=0)
+    running_size = func.sum(scrolled_size).over(order_by=order_by, rows=(None, 0))
+    return case((is_freeze, -1), else_=running_size - scrolled_size)
+
+
+def _get_sort_key(index: ColumnElement) -> ColumnElement:
+    # Rebalanced sort keys follow the indexes, spaced by the gap
+    return cast(index, BigInteger) * SORT_KEY_GAP
 
 
 class SheetSindex(BasePostgres):
     model: Model = NotImplemented
+    sheet_count: ColumnElement = NotImplemented
+    sheet_size: ColumnElement = NotImplemented
+    sheet_stale: ColumnElement = NotImplemented
+    default_size: int = NotImplemented
 
-    async def create_many(self, data: list[core_types.DTO]) -> list[core_types.Id_]:
-        session = self._session
-        data = self._parse_dto(data)
-        stmt = insert(self.model).returning(self.model.id)
-        result = await session.execute(stmt, data)
-        ids = list(result.scalars())
-        return ids
+    async def copy_many(self, df: pd.DataFrame) -> list[core_types.Id_]:
+        ids = await self._allocate_ids(len(df))
+        await self._copy_frame(df.assign(id=ids))
+        return ids.tolist()
 
     async def delete_many_by_ids(self, sheet_id: core_types.Id_, sindex_ids: list[core_types.Id_]) -> None:
+        # Sindexes after every deleted one move up by the count and the scrolled size of the deleted before them.
+        # Stale positions are not shifted, the rebalance recalculates them
+        is_stale = await self._is_stale(sheet_id, for_update=True)
+        table = self.model.__table__
+        stmt = (
+            delete(table)
+            .where(table.c.sheet_id == sheet_id,
+                   table.c.id == any_(bindparam('sindex_ids', sindex_ids, type_=ARRAY(Integer))),
+                   ~table.c.is_freeze,
+                   ~table.c.is_readonly,
+                   )
+            .returning(table.c.index, table.c.size, table.c.is_filtred, table.c.is_freeze)
+        )
+        result = await self._session.execute(stmt)
+        deleted = pd.DataFrame(result.fetchall(), columns=['index', 'size', 'is_filtred', 'is_freeze'])
+        if deleted.empty:
+            return
+
+        deleted = deleted.sort_values('index')
+        is_scrolled = deleted['is_filtred'] & ~deleted['is_freeze']
+        scrolled_size = deleted['size'].where(is_scrolled, 0)
+        if not is_stale:
+            await self._shift_tail(sheet_id,
+                                   lowers=deleted['index'].tolist(),
+                                   uppers=deleted['index'].tolist()[1:] + [None],
+                                   index_shifts=(-np.arange(1, len(deleted) + 1)).tolist(),
+                                   pos_shifts=(-scrolled_size.cumsum()).tolist())
+        await self._shift_scroll_size(sheet_id, -int(is_scrolled.sum()), -int(scrolled_size.sum()))
+
+    async def update_size(self, sheet_id: core_types.Id_, sindex_id: core_types.Id_, size: int) -> None:
+        # Sindexes after the resized one move by the change of its size. Old size is returned from the joined
+        # row, it holds the values from before the update. Stale positions are left to the rebalance
+        is_stale = await self._is_stale(sheet_id, for_update=True)
+        table = self.model.__table__
+        old = table.alias('old')
+        stmt = (
+            update(table)
+            .where(table.c.id == old.c.id, table.c.id == sindex_id, table.c.sheet_id == sheet_id)
+            .values({table.c.size: size})
+            .returning(table.c.index, old.c.size, table.c.is_filtred, table.c.is_freeze)
+        )
+        result = await self._session.execute(stmt)
+        resized = result.one_or_none()
+        if resized is None or not resized.is_filtred or resized.is_freeze or resized.size == size:
+            return
+
+        delta = size - resized.size
+        if not is_stale:
+            await self._shift_tail(sheet_id, lowers=[resized.index], uppers=[None], index_shifts=[0],
+                                   pos_shifts=[delta])
+        await self._shift_scroll_size(sheet_id, 0, delta)
+
+    async def insert_many(self, sheet_id: core_types.Id_, index: int, count: int,
+                          size: int | None = None) -> list[core_types.Id_]:
+        # New sindexes get sort keys between their neighbours, so only they are written: O(count), not O(tail).
+        # Positions of the sindexes after them are stale until the sheet is rebalanced, an append keeps them exact
+        table = self.model.__table__
+        sheets = SheetModel.__table__
+        size = self.default_size if size is None else size
+        is_stale = await self._is_stale(sheet_id, for_update=True)
+        sort_keys, is_appended = await self._get_sort_keys(sheet_id, index, count, is_stale, [])
+        stmt = select(
+            select(func.max(table.c.index)).where(table.c.sheet_id == sheet_id).scalar_subquery(),
+            select(self.sheet_size).where(sheets.c.id == sheet_id).scalar_subquery(),
+        )
+        last_index, scroll_size = (await self._session.execute(stmt)).one()
+        first_index = 0 if last_index is None else last_index + 1
+        sindexes = pd.DataFrame({
+            'size': size,
+            'is_freeze': False,
+            'is_filtred': True,
+            'is_readonly': False,
+            'index': np.arange(first_index, first_index + count),
+            'scroll_pos': scroll_size + size * np.arange(count),
+            'sort_key': sort_keys,
+            'sheet_id': sheet_id,
+        })
+        ids = await self.copy_many(sindexes)
+        if not ids:
+            return ids
+        await self._shift_scroll_size(sheet_id, count, count * size)
+        if not is_appended:
+            await self._mark_stale(sheet_id)
+        return ids
+
+    async def move_many(self, sheet_id: core_types.Id_, sindex_ids: list[core_types.Id_], index: int) -> None:
+        # Moved sindexes keep their order and go before the sindex at the index. They get sort keys between
+        # their new neighbours, so only they are written, positions are stale until the sheet is rebalanced
+        table = self.model.__table__
+        is_stale = await self._is_stale(sheet_id, for_update=True)
+        stmt = (
+            select(table.c.id)
+            .where(table.c.sheet_id == sheet_id,
+                   table.c.id == any_(bindparam('sindex_ids', sindex_ids, type_=ARRAY(Integer))),
+                   ~table.c.is_freeze)
+            .order_by(table.c.sort_key, table.c.id)
+        )
+        moved_ids = (await self._session.execute(stmt)).scalars().all()
+        if not moved_ids:
+            return
+
+        sort_keys, _ = await self._get_sort_keys(sheet_id, index, len(moved_ids), is_stale, moved_ids)
+        keys = select(
+            func.unnest(bindparam('moved_ids', moved_ids, type_=ARRAY(Integer))).label('id'),
+            func.unnest(bindparam('sort_keys', sort_keys, type_=ARRAY(BigInteger))).label('sort_key'),
+        ).subquery()
+        stmt = (
+            update(table)
+            .where(table.c.id == keys.c.id, table.c.sheet_id == sheet_id)
+            .values({table.c.sort_key: keys.c.sort_key})
+        )
+        _ = await self._session.execute(stmt)
+        await self._mark_stale(sheet_id)
+
+    async def delete_all_by_ids(self, sheet_id: core_types.Id_, sindex_ids: list[core_types.Id_]) -> None:
+        # Unlike delete_many_by_ids, frozen and readonly sindexes are deleted too and positions are not recalculated
         stmt = (
             delete(self.model)
             .where(self.model.sheet_id == sheet_id,
-                   self.model.id.in_(sindex_ids),
-                   ~self.model.is_freeze,
-                   ~self.model.is_readonly,
-                   )
+                   self.model.id == any_(bindparam('sindex_ids', sindex_ids, type_=ARRAY(Integer))))
+        )
+        _ = await self._session.execute(stmt)
+
+    async def update_indexes(self, sheet_id: core_types.Id_, sindex_ids: list[core_types.Id_],
+                             indexes: list[int]) -> None:
+        # New order is sent as lockstep arrays, then indexes and scroll positions of the whole sheet are recalculated
+        table = self.model.__table__
+        order = select(
+            func.unnest(bindparam('sindex_ids', sindex_ids, type_=ARRAY(Integer))).label('id'),
+            func.unnest(bindparam('indexes', indexes, type_=ARRAY(Integer))).label('index'),
+        ).subquery()
+        sort_key = _get_sort_key(order.c.index)
+        stmt = (
+            update(table)
+            .where(table.c.id == order.c.id, table.c.sheet_id == sheet_id,
+                   or_(table.c.index != order.c.index, table.c.sort_key != sort_key))
+            .values({table.c.index: order.c.index, table.c.sort_key: sort_key})
         )
         _ = await self._session.execute(stmt)
         await self._update_scroll_pos_and_indexes(sheet_id)
 
-    async def update_many(self, data: core_types.DTO, filter_by: dict) -> None:
-        data: dict = self._parse_dto(data)
-        filters = self._parse_filters(filter_by)
-        stmt = update(self.model).where(*filters).values(**data)
-        await self._session.execute(stmt)
-        await self._update_scroll_pos_and_indexes(filter_by['sheet_id'])
+    async def update_scroll_pos(self, sheet_id: core_types.Id_) -> None:
+        # Visibility of sindexes changed, positions follow it
+        await self._update_scroll_pos_and_indexes(sheet_id)
+
+    async def rebalance(self, sheet_id: core_types.Id_) -> None:
+        # Stale positions after inserts and moves are recalculated, sort keys get their gaps back
+        if await self._is_stale(sheet_id, for_update=True):
+            await self._update_scroll_pos_and_indexes(sheet_id)
+
+    async def get_window_as_frame(self, sheet_id: core_types.Id_, from_scroll: int,
+                                  to_scroll: int | None) -> pd.DataFrame:
+        # Visible sindexes from the one that covers from_scroll up to to_scroll plus all frozen sindexes,
+        # both bounds are range scans over the (sheet_id, scroll_pos) index while positions are not stale
+        sindexes = self._get_positions(sheet_id, await self._is_stale(sheet_id))
+        visible = [sindexes.c.sheet_id == sheet_id, sindexes.c.is_filtred]
+        first_pos = (
+            select(func.max(sindexes.c.scroll_pos))
+            .where(*visible, ~sindexes.c.is_freeze, sindexes.c.scroll_pos <= from_scroll)
+            .scalar_subquery()
+        )
+        in_window = [sindexes.c.scroll_pos >= func.coalesce(first_pos, from_scroll)]
+        if to_scroll is not None:
+            in_window.append(sindexes.c.scroll_pos < to_scroll)
+        stmt = (
+            select(sindexes)
+            .where(*visible, or_(sindexes.c.is_freeze, and_(*in_window)))
+            .order_by(sindexes.c.index)
+        )
+        return await self._get_columns_as_frame(stmt)
+
+    async def update_scroll_size(self, sheet_id: core_types.Id_) -> None:
+        # Count and size of the scrolled sindexes are stored in the sheet, so the scroll size is read by primary key.
+        # Totals are recalculated with the positions, so these are not stale. Sheet keeps its updated_at,
+        # the data didn't change
+        table = self.model.__table__
+        sheets = SheetModel.__table__
+        scrolled = and_(table.c.is_filtred, ~table.c.is_freeze)
+        totals = (
+            select(literal(sheet_id, Integer).label('sheet_id'),
+                   func.count().filter(scrolled).label('count'),
+                   func.coalesce(func.sum(table.c.size).filter(scrolled), 0).label('size'))
+            .where(table.c.sheet_id == sheet_id)
+            .subquery()
+        )
+        stmt = (
+            update(sheets)
+            .where(sheets.c.id == totals.c.sheet_id)
+            .values({self.sheet_count: totals.c.count, self.sheet_size: totals.c.size, self.sheet_stale: False,
+                     sheets.c.updated_at: sheets.c.updated_at})
+        )
+        _ = await self._session.execute(stmt)
+
+    async def _shift_tail(self, sheet_id: core_types.Id_, lowers: list[int], uppers: list[int | None],
+                          index_shifts: list[int], pos_shifts: list[int]) -> None:
+        # Sindexes between every changed index and the next one are shifted in one UPDATE joined to the bands
+        # (unnest), every band is a range scan over the (sheet_id, index) index. Sindexes before the first
+        # changed index are not touched, frozen sindexes keep their scroll position
+        table = self.model.__table__
+        shifted = [x for x in zip(lowers, uppers, index_shifts, pos_shifts) if x[2] != 0 or x[3] != 0]
+        if not shifted:
+            return
+        lowers, uppers, index_shifts, pos_shifts = map(list, zip(*shifted))
+        # Outer bounds of all bands are sent as plain values, so the planner sees how narrow the range is
+        upper = INT_MAX if None in uppers else max(uppers)
+
+        bands = select(
+            func.unnest(bindparam('lowers', lowers, type_=ARRAY(Integer))).label('lower'),
+            func.unnest(bindparam('uppers', uppers, type_=ARRAY(Integer))).label('upper'),
+            func.unnest(bindparam('index_shifts', index_shifts, type_=ARRAY(Integer))).label('index_shift'),
+            func.unnest(bindparam('pos_shifts', pos_shifts, type_=ARRAY(Integer))).label('pos_shift'),
+        ).subquery()
+        stmt = (
+            update(table)
+            .where(table.c.sheet_id == sheet_id,
+                   table.c.index > min(lowers),
+                   table.c.index < upper,
+                   table.c.index > bands.c.lower,
+                   table.c.index < func.coalesce(bands.c.upper, INT_MAX))
+            .values({table.c.index: table.c.index + bands.c.index_shift,
+                     table.c.scroll_pos: case((table.c.is_freeze, table.c.scroll_pos),
+                                              else_=table.c.scroll_pos + bands.c.pos_shift)})
+        )
+        _ = await self._session.execute(stmt)
+
+    async def _shift_scroll_size(self, sheet_id: core_types.Id_, count_delta: int, size_delta: int) -> None:
+        sheets = SheetModel.__table__
+        stmt = (
+            update(sheets)
+            .where(sheets.c.id == sheet_id)
+            .values({self.sheet_count: self.sheet_count + count_delta, self.sheet_size: self.sheet_size + size_delta,
+                     sheets.c.updated_at: sheets.c.updated_at})
+        )
+        _ = await self._session.execute(stmt)
+
+    async def _is_stale(self, sheet_id: core_types.Id_, for_update: bool = False) -> bool:
+        # Sindexes of a sheet are reordered by one transaction at a time, it holds the lock of the sheet row
+        sheets = SheetModel.__table__
+        stmt = select(self.sheet_stale).where(sheets.c.id == sheet_id)
+        if for_update:
+            stmt = stmt.with_for_update()
+        return bool((await self._session.execute(stmt)).scalar_one_or_none())
+
+    async def _mark_stale(self, sheet_id: core_types.Id_) -> None:
+        sheets = SheetModel.__table__
+        stmt = (
+            update(sheets)
+            .where(sheets.c.id == sheet_id, ~self.sheet_stale)
+            .values({self.sheet_stale: True, sheets.c.updated_at: sheets.c.updated_at})
+        )
+        _ = await self._session.execute(stmt)
+
+    def _get_positions(self, sheet_id: core_types.Id_, is_stale: bool) -> FromClause:
+        # Sindexes with stored positions while they are exact, otherwise with positions derived from the sort keys
+        # (window functions), the same the rebalance writes
+        table = self.model.__table__
+        if not is_stale:
+            return table
+        order_by = [table.c.sort_key, table.c.id]
+        derived = {
+            'index': type_coerce(func.row_number().over(order_by=order_by) - 1, Integer),
+            'scroll_pos': _get_scroll_pos(table.c.size, table.c.is_filtred, table.c.is_freeze, order_by),
+        }
+        columns = [derived[x.key].label(x.key) if x.key in derived else x for x in table.c]
+        return select(*columns).where(table.c.sheet_id == sheet_id).cte('positions')
+
+    async def _get_sort_keys(self, sheet_id: core_types.Id_, index: int, count: int, is_stale: bool,
+                             moved_ids: list[core_types.Id_]) -> tuple[list[int], bool]:
+        # Keys of a block that goes before the sindex at the index, they split the gap between the neighbours
+        # evenly. The sheet is rebalanced first when the gap is too narrow. Returns whether the block is appended
+        prev_key, next_key = await self._get_neighbour_keys(sheet_id, index, is_stale, moved_ids)
+        if prev_key is not None and next_key is not None and next_key - prev_key <= count:
+            await self._update_scroll_pos_and_indexes(sheet_id)
+            prev_key, next_key = await self._get_neighbour_keys(sheet_id, index, False, moved_ids)
+
+        if next_key is None:
+            last_key = -SORT_KEY_GAP if prev_key is None else prev_key
+            return [last_key + SORT_KEY_GAP * (i + 1) for i in range(count)], True
+        if prev_key is None:
+            return [next_key - SORT_KEY_GAP * (count - i) for i in range(count)], False
+        return [prev_key + (next_key - prev_key) * (i + 1) // (count + 1) for i in range(count)], False
+
+    async def _get_neighbour_keys(self, sheet_id: core_types.Id_, index: int, is_stale: bool,
+                                  moved_ids: list[core_types.Id_]) -> tuple[int | None, int | None]:
+        # The next sindex is the first one at the index or after it that is not moved, frozen sindexes stay on top.
+        # The previous one is found by the (sheet_id, sort_key) index
+        table = self.model.__table__
+        sindexes = self._get_positions(sheet_id, is_stale)
+        moved_ids = bindparam('moved_ids', moved_ids, type_=ARRAY(Integer))
+        stmt = (
+            select(sindexes.c.sort_key)
+            .where(sindexes.c.sheet_id == sheet_id, sindexes.c.index >= index, ~sindexes.c.is_freeze,
+                   sindexes.c.id != all_(moved_ids))
+            .order_by(sindexes.c.index)
+            .limit(1)
+        )
+        next_key = (await self._session.execute(stmt)).scalar_one_or_none()
+
+        stmt = (
+            select(table.c.sort_key)
+            .where(table.c.sheet_id == sheet_id, table.c.id != all_(moved_ids))
+            .order_by(table.c.sort_key.desc())
+            .limit(1)
+        )
+        if next_key is not None:
+            stmt = stmt.where(table.c.sort_key < next_key)
+        prev_key = (await self._session.execute(stmt)).scalar_one_or_none()
+        return prev_key, next_key
 
     async def _update_scroll_pos_and_indexes(self, sheet_id: core_types.Id_) -> None:
-        # Get data
-        filter_by = {"sheet_id": sheet_id}
-        order_by = 'index'
-        sindexes = await super().get_many_as_frame(filter_by, order_by)
-        sindexes = sindexes.rename({"id": "sindex_id"}, axis=1)
-
-        # Calculate new values
-        sindexes.loc[~sindexes['is_filtred'] | sindexes['is_freeze'], 'size'] = 0
-        sindexes['scroll_pos'] = sindexes['size'].cumsum().shift(1).fillna(0)
-        sindexes.loc[sindexes['is_freeze'], 'scroll_pos'] = -1
-        sindexes['index_value'] = range(0, len(sindexes.index))
-
-        # Update data
-        values: list[dict] = sindexes[['sindex_id', 'is_filtred', 'scroll_pos', 'index_value']].to_dict(
-            orient='records')
+        # Rebalance: one UPDATE ... FROM (window select) writes positions in the order of the sort keys and spaces
+        # the keys by the gap again, only sindexes that really changed are written
+        await self._is_stale(sheet_id, for_update=True)
+        table = self.model.__table__
+        positions = self._get_positions(sheet_id, is_stale=True)
+        sort_key = _get_sort_key(positions.c.index)
         stmt = (
-            self.model.__table__.update()
-            .where(self.model.__table__.c.id == bindparam('sindex_id'))
-            .values(
-                {
-                    "scroll_pos": bindparam("scroll_pos"),
-                    "is_filtred": bindparam("is_filtred"),
-                    "index": bindparam("index_value"),
-                })
+            update(table)
+            .where(table.c.id == positions.c.id,
+                   or_(table.c.scroll_pos != positions.c.scroll_pos, table.c.index != positions.c.index,
+                       table.c.sort_key != sort_key))
+            .values({table.c.scroll_pos: positions.c.scroll_pos, table.c.index: positions.c.index,
+                     table.c.sort_key: sort_key})
         )
-        _ = await self._session.execute(stmt, values)
+        _ = await self._session.execute(stmt)
+        await self.update_scroll_size(sheet_id)
 
 
 class SheetRow(SheetSindex):
     model = RowModel
+    sheet_count = SheetModel.__table__.c.count_rows
+    sheet_size = SheetModel.__table__.c.scroll_height
+    sheet_stale = SheetModel.__table__.c.is_rows_stale
+    default_size = 30
 
 
 class SheetCol(SheetSindex):
     model = ColModel
+    sheet_count = SheetModel.__table__.c.count_cols
+    sheet_size = SheetModel.__table__.c.scroll_width
+    sheet_stale = SheetModel.__table__.c.is_cols_stale
+    default_size = 120
 
 
 class SheetCell(BasePostgres):
     model = CellModel
 
-    async def create_many(self, data: list[core_types.DTO]) -> None:
-        session = self._session
-        data = self._parse_dto(data)
-        stmt = insert(self.model).returning(self.model)
-        _ = await session.execute(stmt, data)
+    async def copy_many(self, df: pd.DataFrame) -> None:
+        await self._copy_frame(df)
+
+    async def create_empty_many(self, sheet_id: core_types.Id_, row_ids: list[core_types.Id_] | None = None,
+                                col_ids: list[core_types.Id_] | None = None) -> None:
+        # Empty cells of new rows in every col (or of new cols in every row) by one INSERT ... SELECT from the cross
+        # join of rows and cols. Cells of frozen sindexes are readonly, cells of frozen rows are index cells
+        table = self.model.__table__
+        rows, cols = RowModel.__table__, ColModel.__table__
+        filters = [rows.c.sheet_id == sheet_id, cols.c.sheet_id == sheet_id]
+        if row_ids is not None:
+            filters.append(rows.c.id == any_(bindparam('row_ids', row_ids, type_=ARRAY(Integer))))
+        if col_ids is not None:
+            filters.append(cols.c.id == any_(bindparam('col_ids', col_ids, type_=ARRAY(Integer))))
+        is_readonly = or_(rows.c.is_freeze, cols.c.is_freeze)
+        cells = (
+            select(
+                literal(''), literal(enums.CellDtype.TEXT.value), is_readonly, true(), rows.c.is_freeze,
+                case((is_readonly, '#f8fafd'), else_='white'), literal('left'), rows.c.id, cols.c.id, rows.c.sheet_id,
+            )
+            .select_from(rows.join(cols, true()))
+            .where(*filters)
+        )
+        columns = ['value', 'dtype', 'is_readonly', 'is_filtred', 'is_index', 'color', 'text_align', 'row_id',
+                   'col_id', 'sheet_id']
+        _ = await self._session.execute(insert(table).from_select(columns, cells))
+
+    async def delete_many_by_sindexes(self, sheet_id: core_types.Id_, row_ids: list[core_types.Id_],
+                                      col_ids: list[core_types.Id_]) -> int:
+        table = self.model.__table__
+        rows = RowModel.__table__
+        row_ids = bindparam('row_ids', row_ids, type_=ARRAY(Integer))
+        col_ids = bindparam('col_ids', col_ids, type_=ARRAY(Integer))
+
+        # Rows that stay lose the hidden cells of the deleted cols
+        hidden = (
+            select(table.c.row_id, func.count().label('count'))
+            .where(table.c.sheet_id == sheet_id, table.c.col_id == any_(col_ids), ~table.c.is_filtred)
+            .group_by(table.c.row_id)
+            .subquery()
+        )
+        count_hidden = rows.c.count_hidden_cells - hidden.c.count
+        stmt = (
+            update(rows)
+            .where(rows.c.id == hidden.c.row_id)
+            .values({rows.c.count_hidden_cells: count_hidden, rows.c.is_filtred: count_hidden == 0})
+        )
+        _ = await self._session.execute(stmt)
+
+        stmt = (
+            delete(table)
+            .where(table.c.sheet_id == sheet_id, or_(table.c.row_id == any_(row_ids), table.c.col_id == any_(col_ids)))
+        )
+        result = await self._session.execute(stmt)
+        return result.rowcount
+
+    async def update_values(self, sheet_id: core_types.Id_, cells: pd.DataFrame) -> None:
+        # Values of many cells in one UPDATE ... FROM unnest(arrays), cells are found by primary key
+        table = self.model.__table__
+        typed = get_typed_values(cells['value'], cells['dtype'])
+        values = select(
+            func.unnest(bindparam('cell_ids', cells['id'].tolist(), type_=ARRAY(Integer))).label('id'),
+            func.unnest(bindparam('cell_values', cells['value'].tolist(), type_=ARRAY(String))).label('value'),
+            func.unnest(bindparam('cell_numbers', typed['number_value'].tolist(), type_=ARRAY(Float)))
+            .label('number_value'),
+            func.unnest(bindparam('cell_dates', typed['date_value'].tolist(), type_=ARRAY(TIMESTAMP)))
+            .label('date_value'),
+            func.unnest(bindparam('cell_dtypes', cells['dtype'].tolist(), type_=ARRAY(String))).label('dtype'),
+            func.unnest(bindparam('text_aligns', cells['text_align'].tolist(), type_=ARRAY(String)))
+            .label('text_align'),
+        ).subquery()
+        stmt = (
+            update(table)
+            .where(table.c.id == values.c.id, table.c.sheet_id == sheet_id)
+            .values({table.c.value: values.c.value, table.c.number_value: values.c.number_value,
+                     table.c.date_value: values.c.date_value, table.c.dtype: values.c.dtype,
+                     table.c.text_align: values.c.text_align})
+        )
+        _ = await self._session.execute(stmt)
 
     async def update_one(self, sheet_id: core_types.Id_, data: schema.PartialUpdateCellSchema) -> None:
         data = {key: value for key, value in data.model_dump().items() if value is not None}
         filter_by = {'id': data.pop('id')} | {'sheet_id': sheet_id, 'is_readonly': False}
-        _ = await super().update_one(data, filter_by)
+        model: CellModel = await super().update_one(data, filter_by)
+        if 'value' in data or 'dtype' in data:
+            typed = get_typed_values(pd.Series([model.value]), pd.Series([model.dtype]))
+            _ = await super().update_one(typed.iloc[0].to_dict(), filter_by)
 
     async def update_many(self, sheet_id: core_types.Id_, data: list[schema.PartialUpdateCellSchema]) -> None:
         values = []
@@ -155,6 +576,12 @@ class SheetCell(BasePostgres):
             c = {key: value for key, value in c.items() if value is not None}
             values.append(c)
 
+        typed = get_typed_values(pd.Series([c.get('cell_value') for c in values], dtype=object),
+                                 pd.Series([c.get('cell_dtype') for c in values], dtype=object))
+        for c, number_value, date_value in zip(values, typed['number_value'], typed['date_value']):
+            c['cell_number'] = number_value
+            c['cell_date'] = date_value
+
         # Update
         stmt = (
             self.model.__table__.update()
@@ -164,6 +591,8 @@ class SheetCell(BasePostgres):
                    )
             .values({
                 "value": bindparam("cell_value"),
+                "number_value": bindparam("cell_number"),
+                "date_value": bindparam("cell_date"),
                 "dtype": bindparam("cell_dtype"),
             })
         )
@@ -176,92 +605,167 @@ class SheetFilter:
 
     def __init__(self, session: AsyncSession):
         self._session = session
+        self.__sheet_row = SheetRow(session)
 
     async def get_col_filter(self, data: events.ColFilterGotten) -> entities.ColFilter:
-        stmt = (
-            select(self.__cell_model.value, self.__cell_model.dtype, self.__cell_model.is_filtred)
-            .distinct()
-            .filter_by(sheet_id=data.sheet_id, col_id=data.col_id, is_index=False)
-            .order_by(self.__cell_model.value)
-        )
-        items = await self._session.execute(stmt)
-        columns = [self.__cell_model.value.key, self.__cell_model.dtype.key, self.__cell_model.is_filtred.key]
-        items = pd.DataFrame.from_records(items.fetchall(), columns=columns).to_dict(orient='records')
-        col_filter = entities.ColFilter(col_id=data.col_id, sheet_id=data.sheet_id,
-                                        items=[entities.FilterItem(**x) for x in items])
-        return col_filter
-
-    async def update_col_filter(self, data: events.ColFilterUpdated) -> None:
-        await self._update_filtred_flag_in_cells(data.col_filter)
-        await self._update_filtred_flag_and_scroll_pos_in_rows(sheet_id=data.col_filter.sheet_id)
+        # Distinct (value, dtype) pairs of the col in typed order (numbers and dates don't go in text order) with
+        # counts of their cells. Groups follow the order of ix_sheet_cell_col_id_typed_value, so a page is read
+        # from the index and the scan stops at its end
+        cells = self.__cell_model.__table__
+        in_col = [cells.c.sheet_id == data.sheet_id, cells.c.col_id == data.col_id, ~cells.c.is_index]
+        if data.search and data.search_mode == 'contains':
+            in_col.append(cells.c.value.icontains(data.search, autoescape=True))
+        elif data.search:
+            # Cells with the prefix are a range of ix_sheet_cell_col_id_lower_value (ILIKE can't use it, lower() LIKE
+            # can). They are materialized first, otherwise the planner walks the typed index for the page order and
+            # filters the whole col
+            in_col.append(func.lower(cells.c.value).startswith(data.search.lower(), autoescape=True))
+            columns = [cells.c.number_value, cells.c.date_value, cells.c.value, cells.c.dtype, cells.c.is_filtred]
+            cells = select(*columns).where(*in_col).cte('prefixed').prefix_with('MATERIALIZED')
+            in_col = []
+        typed_values = [cells.c.number_value, cells.c.date_value, cells.c.value]
+        pairs = typed_values + [cells.c.dtype]
 
-    async def clear_all_filters(self, sheet_id: core_types.Id_) -> None:
-        stmt = update(self.__cell_model).where(self.__cell_model.sheet_id == sheet_id)
-        await self._session.execute(stmt, {"is_filtred": True})
-        await self._update_filtred_flag_and_scroll_pos_in_rows(sheet_id=sheet_id)
-
-    async def _retrieve_total_rows(self, sheet_id: core_types.Id_) -> pd.DataFrame:
         stmt = (
-            select(
-                self.__row_model.__table__.c.id,
-                self.__row_model.__table__.c.size,
-                self.__row_model.__table__.c.is_freeze,
-                self.__row_model.__table__.c.scroll_pos, )
-            .filter_by(sheet_id=sheet_id)
-            .order_by(self.__row_model.index)
-        )
-        rows = await self._session.execute(stmt)
-        rows = pd.DataFrame.from_records(rows.fetchall(), columns=['row_id', 'size', 'is_freeze', 'scroll_pos'])
-        return rows
-
-    async def _retrieve_filtred_rows(self, sheet_id: core_types.Id_) -> pd.DataFrame:
-        stmt = (
-            select(self.__cell_model.row_id, func.count(self.__cell_model.is_filtred)
-                   .filter(~self.__cell_model.is_filtred))
-            .group_by(self.__cell_model.row_id)
-            .filter(self.__cell_model.sheet_id == sheet_id)
+            select(cells.c.value, cells.c.dtype,
+                   func.bool_and(cells.c.is_filtred).label('is_filtred'), func.count().label('count'))
+            .where(*in_col)
+            .group_by(*pairs)
+            .order_by(*[x.nulls_last() for x in pairs])
+            .offset(data.paginate_from)
         )
+        if data.paginate_to is not None:
+            stmt = stmt.limit(data.paginate_to - (data.paginate_from or 0))
         result = await self._session.execute(stmt)
-        filtred_rows = pd.DataFrame.from_records(result.fetchall(), columns=['row_id', 'is_filtred'])
-        filtred_rows['is_filtred'] = ~filtred_rows['is_filtred'].astype(bool)
-        return filtred_rows
-
-    async def _update_filtred_flag_and_scroll_pos_in_rows(self, sheet_id: core_types.Id_) -> None:
-        rows = await self._retrieve_total_rows(sheet_id)
-        filtred_rows = await self._retrieve_filtred_rows(sheet_id)
+        items = [entities.FilterItem(**x) for x in result.mappings()]
 
-        if len(rows) != len(filtred_rows):
-            raise Exception
+        # Total goes with the first page only, pairs are counted by an index only scan
+        total_count = None
+        if not data.paginate_from:
+            values = select(*pairs).where(*in_col).group_by(*pairs).subquery()
+            total_count = (await self._session.execute(select(func.count()).select_from(values))).scalar_one()
 
-        rows = pd.merge(rows, filtred_rows, on='row_id', how='inner')
+        col_filter = entities.ColFilter(col_id=data.col_id, sheet_id=data.sheet_id, items=items,
+                                        total_count=total_count)
+        return col_filter
 
-        rows.loc[~rows['is_filtred'] | rows['is_freeze'], 'size'] = 0
-        rows['scroll_pos'] = rows['size'].cumsum().shift(1).fillna(0)
-        rows.loc[rows['is_freeze'], 'scroll_pos'] = -1
+    async def update_col_filter(self, data: events.ColFilterUpdated) -> None:
+        if data.col_filter.predicate is not None:
+            await self._update_filtred_flag_by_predicate(data.col_filter)
+        else:
+            await self._update_filtred_flag_by_items(data.col_filter)
+        await self.__sheet_row.update_scroll_pos(data.col_filter.sheet_id)
 
-        values: list[dict] = rows[['row_id', 'is_filtred', 'scroll_pos']].to_dict(orient='records')
+    async def clear_all_filters(self, sheet_id: core_types.Id_) -> None:
+        rows = self.__row_model.__table__
+        cells = self.__cell_model.__table__
+        stmt = update(cells).where(cells.c.sheet_id == sheet_id, ~cells.c.is_filtred).values({cells.c.is_filtred: True})
+        _ = await self._session.execute(stmt)
         stmt = (
-            self.__row_model.__table__.update()
-            .where(self.__row_model.__table__.c.id == bindparam('row_id'))
-            .values({"scroll_pos": bindparam("scroll_pos"), "is_filtred": bindparam("is_filtred")})
+            update(rows)
+            .where(rows.c.sheet_id == sheet_id, or_(~rows.c.is_filtred, rows.c.count_hidden_cells != 0))
+            .values({rows.c.is_filtred: True, rows.c.count_hidden_cells: 0})
         )
-        _ = await self._session.execute(stmt, values)
-
-    async def _update_filtred_flag_in_cells(self, data: entities.ColFilter) -> None:
-        # Convert input data because "value" is reserved word in bindparam function
-        items = [{
-            'cell_value': x.value,
-            'is_filtred': x.is_filtred,
-            'dtype': x.dtype,
-        } for x in data.items]
-
+        _ = await self._session.execute(stmt)
+        await self.__sheet_row.update_scroll_pos(sheet_id)
+
+    async def _update_filtred_flag_by_items(self, data: entities.ColFilter) -> None:
+        # Cells of the col whose flag really changes are updated in one statement joined to the items (unnest).
+        # Items are (value, dtype) pairs like in get_col_filter, the same text may be a number and a text
+        cells = self.__cell_model.__table__
+        flags = {(x.value, x.dtype): x.is_filtred for x in data.items}
+        items = select(
+            func.unnest(bindparam('cell_values', [x[0] for x in flags], type_=ARRAY(String))).label('value'),
+            func.unnest(bindparam('cell_dtypes', [x[1] for x in flags], type_=ARRAY(String))).label('dtype'),
+            func.unnest(bindparam('is_filtred', list(flags.values()), type_=ARRAY(Boolean))).label('is_filtred'),
+        ).subquery()
+        changed = (
+            update(cells)
+            .where(cells.c.sheet_id == data.sheet_id,
+                   cells.c.col_id == data.col_id,
+                   ~cells.c.is_index,
+                   cells.c.value == items.c.value,
+                   cells.c.dtype == items.c.dtype,
+                   cells.c.is_filtred != items.c.is_filtred)
+            .values({cells.c.is_filtred: items.c.is_filtred})
+            .returning(cells.c.row_id, cells.c.is_filtred)
+            .cte('changed')
+        )
+        await self._update_count_hidden_cells(changed)
+
+    async def _update_filtred_flag_by_predicate(self, data: entities.ColFilter) -> None:
+        # Cells of the col are filtred when they match the predicate, the others are hidden
+        cells = self.__cell_model.__table__
+        is_matched = func.coalesce(self._get_predicate_clause(data.predicate), False)
+        changed = (
+            update(cells)
+            .where(cells.c.sheet_id == data.sheet_id,
+                   cells.c.col_id == data.col_id,
+                   ~cells.c.is_index,
+                   cells.c.is_filtred != is_matched)
+            .values({cells.c.is_filtred: is_matched})
+            .returning(cells.c.row_id, cells.c.is_filtred)
+            .cte('changed')
+        )
+        await self._update_count_hidden_cells(changed)
+
+    async def show_cells(self, sheet_id: core_types.Id_, cell_ids: list[core_types.Id_]) -> None:
+        # Hidden cells of the ids are shown, e.g. when their values were overwritten after the filter hid them
+        cells = self.__cell_model.__table__
+        cell_ids = bindparam('cell_ids', cell_ids, type_=ARRAY(Integer))
+        changed = (
+            update(cells)
+            .where(cells.c.sheet_id == sheet_id, cells.c.id == any_(cell_ids), ~cells.c.is_filtred)
+            .values({cells.c.is_filtred: True})
+            .returning(cells.c.row_id, cells.c.is_filtred)
+            .cte('changed')
+        )
+        await self._update_count_hidden_cells(changed)
+        await self.__sheet_row.update_scroll_pos(sheet_id)
+
+    async def _update_count_hidden_cells(self, changed) -> None:
+        # Rows of changed cells get the change of the count of their hidden cells. Row is filtred while it has
+        # no hidden cells, so only these rows are touched and no cells are aggregated
+        rows = self.__row_model.__table__
+        delta = (
+            select(changed.c.row_id, func.sum(case((changed.c.is_filtred, -1), else_=1)).label('delta'))
+            .group_by(changed.c.row_id)
+            .subquery()
+        )
+        count_hidden = rows.c.count_hidden_cells + delta.c.delta
         stmt = (
-            self.__cell_model.__table__.update()
-            .where(self.__cell_model.__table__.c.value == bindparam('cell_value'),
-                   self.__cell_model.col_id == data.col_id)
-            .values({"is_filtred": bindparam("is_filtred")})
+            update(rows)
+            .where(rows.c.id == delta.c.row_id)
+            .values({rows.c.count_hidden_cells: count_hidden, rows.c.is_filtred: count_hidden == 0})
         )
-        _ = await self._session.execute(stmt, items)
+        _ = await self._session.execute(stmt)
+
+    def _get_predicate_clause(self, predicate: entities.FilterPredicate) -> ColumnElement:
+        cells = self.__cell_model.__table__
+        if predicate.operator == 'is_empty':
+            return or_(cells.c.value.is_(None), cells.c.value == '')
+        if predicate.operator == 'is_not_empty':
+            return and_(cells.c.value.is_not(None), cells.c.value != '')
+        if predicate.value is None or (predicate.operator == 'between' and predicate.value_to is None):
+            raise ValueError(f"predicate '{predicate.operator}' needs a value; {predicate}")
+        if predicate.operator == 'contains':
+            return cells.c.value.icontains(predicate.value, autoescape=True)
+        if predicate.operator == 'starts_with':
+            return cells.c.value.istartswith(predicate.value, autoescape=True)
+
+        # Numbers and dates are compared by their typed values, bounds are parsed the same way as cell values
+        bounds = pd.Series([predicate.value, predicate.value_to], dtype=object)
+        typed = get_typed_values(bounds, pd.Series([predicate.dtype] * len(bounds)))
+        if predicate.dtype == enums.CellDtype.NUMBER.value:
+            column, (value, value_to) = cells.c.number_value, typed['number_value'].tolist()
+        elif predicate.dtype == enums.CellDtype.DATE.value:
+            column, (value, value_to) = cells.c.date_value, typed['date_value'].tolist()
+        else:
+            column, (value, value_to) = cells.c.value, bounds.tolist()
+        if predicate.operator == 'between':
+            return column.between(value, value_to)
+        signs = {'eq': '=', 'gt': '>', 'ge': '>=', 'lt': '<', 'le': '<='}
+        return column.op(signs[predicate.operator], is_comparison=True)(value)
 
 
 class SheetSorter:
@@ -270,61 +774,53 @@ class SheetSorter:
 
     def __init__(self, session: AsyncSession):
         self._session = session
+        self.__sheet_row = SheetRow(session)
 
     async def update_col_sorter(self, data: entities.ColSorter) -> None:
-        sorted_rows = await self._retrieve_sorted_rows(data.sheet_id, data.col_id, data.ascending)
-        filtred_rows = await self._retrieve_filtred_rows(data.sheet_id)
-        await self._update_row_index_and_scroll_pos(sorted_rows, filtred_rows)
-
-    async def _update_row_index_and_scroll_pos(self, sorted_rows: pd.DataFrame, filtred_rows: pd.DataFrame) -> None:
-        merged = pd.merge(filtred_rows, sorted_rows, on='row_id', how='left').sort_values('row_index')
-        merged.loc[merged['is_index'], 'size'] = 0
-        merged['scroll_pos'] = merged['size'].cumsum().shift(1).fillna(0)
-        merged.loc[merged['is_index'], 'scroll_pos'] = -1
-
-        values = merged[['row_id', 'row_index', 'scroll_pos']].to_dict(orient='records')
-
-        stmt = (
-            self.__row_model.__table__.update()
-            .where(self.__row_model.__table__.c.id == bindparam('row_id'))
-            .values({"scroll_pos": bindparam("scroll_pos"), "index": bindparam("row_index")})
-        )
-        _ = await self._session.execute(stmt, values)
-
-    async def _retrieve_filtred_rows(self, sheet_id: core_types.Id_) -> pd.DataFrame:
-        stmt = (
+        # Rows are numbered by the typed values of their cells in the sort cols (window function) and
+        # written back in one UPDATE ... FROM with rebalanced sort keys, only rows that really moved are written.
+        # The whole col is read, so a hash join and one sort beat an ordered scan of ix_sheet_cell_col_id_typed_value
+        rows = self.__row_model.__table__
+        keys = [entities.SortKey(col_id=data.col_id, ascending=data.ascending)] + data.then_by
+        sort_cells = [self.__cell_model.__table__.alias(f"sort_cell_{i}") for i in range(len(keys))]
+
+        # Every sort col adds the cell of the row in that col (outer join, rows without the cell go last)
+        joined = rows
+        for cells, key in zip(sort_cells, keys):
+            joined = joined.outerjoin(cells, and_(cells.c.row_id == rows.c.id, cells.c.col_id == key.col_id))
+
+        order_by = self._get_row_orders(sort_cells, keys)
+        positions = (
             select(
-                self.__row_model.__table__.c.id,
-                self.__row_model.__table__.c.size
+                rows.c.id,
+                (func.row_number().over(order_by=order_by) - 1).label('index'),
+                _get_scroll_pos(rows.c.size, rows.c.is_filtred, rows.c.is_freeze, order_by).label('scroll_pos'),
             )
-            .where(
-                self.__row_model.sheet_id == sheet_id,
-                self.__row_model.__table__.c.is_filtred)
+            .select_from(joined)
+            .where(rows.c.sheet_id == data.sheet_id)
+            .subquery()
         )
-        rows = await self._session.execute(stmt)
-        rows = pd.DataFrame.from_records(rows.fetchall(), columns=['row_id', 'size'])
-        return rows
-
-    async def _retrieve_sorted_rows(self, sheet_id: core_types.Id_, col_id: core_types.Id_, asc: bool) -> pd.DataFrame:
-        # Retrieving
+        sort_key = _get_sort_key(positions.c.index)
         stmt = (
-            select(
-                self.__cell_model.__table__.c.row_id,
-                self.__cell_model.__table__.c.value,
-                self.__cell_model.__table__.c.is_index)
-            .where(
-                self.__cell_model.sheet_id == sheet_id,
-                self.__cell_model.col_id == col_id, )
+            update(rows)
+            .where(rows.c.id == positions.c.id,
+                   or_(rows.c.index != positions.c.index, rows.c.scroll_pos != positions.c.scroll_pos,
+                       rows.c.sort_key != sort_key))
+            .values({rows.c.index: positions.c.index, rows.c.scroll_pos: positions.c.scroll_pos,
+                     rows.c.sort_key: sort_key})
         )
-        result = await self._session.execute(stmt)
+        _ = await self._session.execute(stmt)
+        await self.__sheet_row.update_scroll_size(data.sheet_id)
 
-        # Sorting
-        result = pd.DataFrame.from_records(result.fetchall(), columns=['row_id', 'cell_value', 'is_index'])
-        freeze_part = result.loc[result['is_index']]
-        free_part = result.loc[~result['is_index']].sort_values('cell_value', ascending=asc)
-        sorted_df = pd.concat([freeze_part, free_part], ignore_index=True)
-        sorted_df['row_index'] = range(len(sorted_df))
-        return sorted_df
+    def _get_row_orders(self, sort_cells: list, keys: list[entities.SortKey]) -> list[ColumnElement]:
+        # Frozen rows stay on top in their order, the others are sorted by the typed values of the sort cols:
+        # numbers, then dates, then text. Ties keep their previous order
+        rows = self.__row_model.__table__
+        order_by = [rows.c.is_freeze.desc(), case((rows.c.is_freeze, rows.c.sort_key))]
+        for cells, key in zip(sort_cells, keys):
+            typed_orders = [cells.c.number_value, cells.c.date_value, cells.c.value]
+            order_by.extend((x.asc() if key.ascending else x.desc()).nulls_last() for x in typed_orders)
+        return order_by + [rows.c.sort_key, rows.c.id]
 
 
 class SheetCrud(BasePostgres):
@@ -335,21 +831,54 @@ class SheetCrud(BasePostgres):
         self.__sheet_cell = SheetCell(session)
         self.__sheet_row = SheetRow(session)
         self.__sheet_col = SheetCol(session)
+        self.__sheet_filter = SheetFilter(session)
         self.normalizer = Normalizer
         self.denormalizer = Denormalizer
 
     async def create_one(self, data: events.SheetCreated) -> core_types.Id_:
         sheet: SheetModel = await super().create_one({})
-        await self._create_rows_cols_and_cells(sheet.id, data)
+        normalizer = self.normalizer(**data.model_dump())
+        normalizer.normalize()
+        await self._create_rows_cols_and_cells(sheet.id, normalizer)
         return sheet.id
 
-    async def get_one(self, data: events.SheetGotten) -> entities.Sheet:
+    async def get_one(self, data: events.SheetGotten) -> entities.Sheet | entities.CompactSheet:
+        # Sindexes are read through the window, it derives their positions while they are stale
         filter_by = {"sheet_id": data.sheet_id, "is_filtred": True, }
-        order_by = 'index'
-        rows = await self.__sheet_row.get_many_as_frame(filter_by, order_by)
-        cols = await self.__sheet_col.get_many_as_frame(filter_by, order_by)
-        cells = await self.__sheet_cell.get_many_as_frame(filter_by)
-        return self._merge_into_sheet_entity(data.sheet_id, rows, cols, cells)
+        if data.from_scroll is None and data.to_scroll is None:
+            rows = await self.__sheet_row.get_window_as_frame(data.sheet_id, 0, None)
+            cell_filter_by = filter_by
+        else:
+            # Only the rows of the viewport are sent, so the payload doesn't grow with the sheet
+            from_scroll = data.from_scroll if data.from_scroll is not None else 0
+            rows = await self.__sheet_row.get_window_as_frame(data.sheet_id, from_scroll, data.to_scroll)
+            cell_filter_by = filter_by | {"row_id__$": rows['id'].tolist()}
+        cols = await self.__sheet_col.get_window_as_frame(data.sheet_id, 0, None)
+        cells = await self.__sheet_cell.get_many_as_frame(cell_filter_by)
+        scroll_size = await self.get_scroll_size(data.sheet_id)
+        if data.compact:
+            return self._merge_into_compact_sheet_entity(data.sheet_id, rows, cols, cells, scroll_size)
+        return self._merge_into_sheet_entity(data.sheet_id, rows, cols, cells, scroll_size)
+
+    async def insert_rows(self, data: events.RowsInserted) -> list[core_types.Id_]:
+        row_ids = await self.__sheet_row.insert_many(data.sheet_id, data.index, data.count, data.size)
+        await self.__sheet_cell.create_empty_many(data.sheet_id, row_ids=row_ids)
+        return row_ids
+
+    async def insert_cols(self, data: events.ColsInserted) -> list[core_types.Id_]:
+        col_ids = await self.__sheet_col.insert_many(data.sheet_id, data.index, data.count, data.size)
+        await self.__sheet_cell.create_empty_many(data.sheet_id, col_ids=col_ids)
+        return col_ids
+
+    async def get_scroll_size(self, sheet_id: core_types.Id_) -> entities.ScrollSize:
+        # Columns are selected instead of the model, the model of the session may hold values older than the totals
+        sheets = self.model.__table__
+        stmt = (
+            select(sheets.c.count_rows, sheets.c.count_cols, sheets.c.scroll_height, sheets.c.scroll_width)
+            .where(sheets.c.id == sheet_id)
+        )
+        result = await self._session.execute(stmt)
+        return entities.ScrollSize(**result.mappings().one())
 
     async def get_sheet_info(self, sheet_id: core_types.Id_) -> entities.SheetInfo:
         model: SheetModel = await super().get_one(filter_by={'id': sheet_id})
@@ -361,44 +890,158 @@ class SheetCrud(BasePostgres):
 
     async def get_one_as_frame(self, filter_by: dict) -> pd.DataFrame:
         cells = await self.__sheet_cell.get_many_as_frame(filter_by)
-        rows = await self.__sheet_row.get_many_as_frame(filter_by)
-        cols = await self.__sheet_col.get_many_as_frame(filter_by)
+        rows = await self.__sheet_row.get_many_as_frame(filter_by, 'sort_key')
+        cols = await self.__sheet_col.get_many_as_frame(filter_by, 'sort_key')
+        # Cells are laid out by the positions of their row and col, ids follow the sheet order only until
+        # rows are sorted or the sheet is overwritten by diff
+        row_pos = pd.Index(rows['id']).get_indexer(cells['row_id'])
+        col_pos = pd.Index(cols['id']).get_indexer(cells['col_id'])
+        cells = cells.iloc[np.lexsort((col_pos, row_pos))].reset_index(drop=True)
         denormalizer = self.denormalizer(rows, cols, cells)
         denormalizer.denormalize()
         df = denormalizer.get_denormalized()
         return df
 
-    async def overwrite_one(self, sheet_id: core_types.Id_, data: events.SheetCreated) -> None:
-        # Delete old data
+    async def overwrite_one(self, sheet_id: core_types.Id_, data: events.SheetCreated, diff: bool = False) -> int:
+        # Returns the count of inserted, updated and deleted cells
+        normalizer = self.normalizer(**data.model_dump())
+        normalizer.normalize()
+        if diff:
+            return await self._overwrite_changed_cells(sheet_id, normalizer)
+        return await self._overwrite_all_cells(sheet_id, normalizer)
+
+    async def _overwrite_all_cells(self, sheet_id: core_types.Id_, normalizer: Normalizer) -> int:
+        # Delete old data, cells go first so deleting sindexes doesn't cascade row by row
         filter_by = {"sheet_id": sheet_id}
+        deleted = await self.__sheet_cell.delete_many(filter_by)
         await self.__sheet_row.delete_many(filter_by)
         await self.__sheet_col.delete_many(filter_by)
-        await self.__sheet_cell.delete_many(filter_by)
         # Create new data
-        await self._create_rows_cols_and_cells(sheet_id, data)
+        await self._create_rows_cols_and_cells(sheet_id, normalizer)
+        return deleted + len(normalizer.get_normalized_cells())
 
-    async def _create_rows_cols_and_cells(self, sheet_id: core_types.Id_, data: events.SheetCreated) -> None:
-        # Create row, col and cell data from denormalized dataframe
-        normalizer = self.normalizer(**data.model_dump())
-        normalizer.normalize()
+    async def _overwrite_changed_cells(self, sheet_id: core_types.Id_, normalizer: Normalizer) -> int:
+        # Rows and cols of the stored and the new sheet are matched by keys: a row by the values of its index cells,
+        # a col by the values of its header cells (position among equal keys makes them unique).
+        # Matched sindexes and cells keep their ids, sizes and flags, only changed values are written
+        filter_by = {"sheet_id": sheet_id}
+        old_rows = await self.__sheet_row.get_many_as_frame(filter_by, 'sort_key')
+        old_cols = await self.__sheet_col.get_many_as_frame(filter_by, 'sort_key')
+        new_rows = normalizer.get_normalized_rows()
+        new_cols = normalizer.get_normalized_cols()
+
+        # Keys are comparable only when both sheets have the same count of index rows and cols
+        if (old_rows.empty or old_cols.empty
+                or old_rows['is_freeze'].sum() != new_rows['is_freeze'].sum()
+                or old_cols['is_freeze'].sum() != new_cols['is_freeze'].sum()):
+            return await self._overwrite_all_cells(sheet_id, normalizer)
+
+        old_cells = await self.__sheet_cell.get_many_as_frame(filter_by)
+        new_cells = normalizer.get_normalized_cells()
+
+        # Stored cells as (row position, col position) grids, missing cells have id -1
+        shape = (len(old_rows), len(old_cols))
+        row_pos = pd.Index(old_rows['id']).get_indexer(old_cells['row_id'])
+        col_pos = pd.Index(old_cols['id']).get_indexer(old_cells['col_id'])
+        old_ids = np.full(shape, -1, dtype=np.int64)
+        old_ids[row_pos, col_pos] = old_cells['id'].to_numpy()
+        old_values = np.full(shape, None, dtype=object)
+        old_values[row_pos, col_pos] = old_cells['value'].to_numpy()
+        old_dtypes = np.full(shape, None, dtype=object)
+        old_dtypes[row_pos, col_pos] = old_cells['dtype'].to_numpy()
+        old_filtred = np.full(shape, True, dtype=bool)
+        old_filtred[row_pos, col_pos] = old_cells['is_filtred'].to_numpy()
+        new_values = new_cells['value'].to_numpy().reshape(len(new_rows), len(new_cols))
+
+        old_row_keys = self._get_sindex_keys(old_rows['is_freeze'], old_values[:, old_cols['is_freeze'].to_numpy()])
+        new_row_keys = self._get_sindex_keys(new_rows['is_freeze'], new_values[:, new_cols['is_freeze'].to_numpy()])
+        old_col_keys = self._get_sindex_keys(old_cols['is_freeze'], old_values[old_rows['is_freeze'].to_numpy()].T)
+        new_col_keys = self._get_sindex_keys(new_cols['is_freeze'], new_values[new_rows['is_freeze'].to_numpy()].T)
+        matched_rows = old_row_keys.get_indexer(new_row_keys)
+        matched_cols = old_col_keys.get_indexer(new_col_keys)
+
+        # Delete sindexes that are not in the new sheet, cells go first
+        deleted_row_ids = np.delete(old_rows['id'].to_numpy(), matched_rows[matched_rows >= 0]).tolist()
+        deleted_col_ids = np.delete(old_cols['id'].to_numpy(), matched_cols[matched_cols >= 0]).tolist()
+        deleted = 0
+        if deleted_row_ids or deleted_col_ids:
+            deleted = await self.__sheet_cell.delete_many_by_sindexes(sheet_id, deleted_row_ids, deleted_col_ids)
+            await self.__sheet_row.delete_all_by_ids(sheet_id, deleted_row_ids)
+            await self.__sheet_col.delete_all_by_ids(sheet_id, deleted_col_ids)
+
+        # Create sindexes that are not in the stored sheet, then move all of them to the new order
+        row_ids = await self._merge_sindexes(self.__sheet_row, sheet_id, old_rows, new_rows, matched_rows)
+        col_ids = await self._merge_sindexes(self.__sheet_col, sheet_id, old_cols, new_cols, matched_cols)
+
+        # Cells of matched rows and cols are updated when their value or dtype changed, the others are created
+        new_cells = new_cells.assign(
+            sheet_id=sheet_id, row_id=np.repeat(row_ids, len(col_ids)), col_id=np.tile(col_ids, len(row_ids)))
+        cell_rows = np.repeat(matched_rows, len(matched_cols))
+        cell_cols = np.tile(matched_cols, len(matched_rows))
+        is_matched = (cell_rows >= 0) & (cell_cols >= 0)
+        is_matched[is_matched] = old_ids[cell_rows[is_matched], cell_cols[is_matched]] >= 0
+
+        matched_cells = new_cells.loc[is_matched].assign(
+            id=old_ids[cell_rows[is_matched], cell_cols[is_matched]],
+            old_value=old_values[cell_rows[is_matched], cell_cols[is_matched]],
+            old_dtype=old_dtypes[cell_rows[is_matched], cell_cols[is_matched]],
+            old_filtred=old_filtred[cell_rows[is_matched], cell_cols[is_matched]],
+        )
+        changed_cells = matched_cells.loc[(matched_cells['value'] != matched_cells['old_value'])
+                                          | (matched_cells['dtype'] != matched_cells['old_dtype'])]
+        if not changed_cells.empty:
+            await self.__sheet_cell.update_values(sheet_id, changed_cells)
+
+        # The filter hid the old values, changed cells are shown and their rows get back their scroll positions
+        hidden_ids = changed_cells.loc[~changed_cells['old_filtred'], 'id'].tolist()
+        if hidden_ids:
+            await self.__sheet_filter.show_cells(sheet_id, hidden_ids)
+
+        created_cells = new_cells.loc[~is_matched]
+        if not created_cells.empty:
+            await self.__sheet_cell.copy_many(created_cells)
 
-        # Create sindexes, save created ids for following create cells
-        rows = normalizer.get_normalized_rows().assign(sheet_id=sheet_id).to_dict(orient='records')
-        cols = normalizer.get_normalized_cols().assign(sheet_id=sheet_id).to_dict(orient='records')
+        return deleted + len(changed_cells) + len(created_cells)
 
-        row_ids = await self.__sheet_row.create_many(rows)
-        col_ids = await self.__sheet_col.create_many(cols)
+    @staticmethod
+    async def _merge_sindexes(sheet_sindex: SheetSindex, sheet_id: core_types.Id_, old: pd.DataFrame,
+                              new: pd.DataFrame, matched: np.ndarray) -> np.ndarray:
+        ids = np.zeros(len(new), dtype=np.int64)
+        is_matched = matched >= 0
+        ids[is_matched] = old['id'].to_numpy()[matched[is_matched]]
+        if not is_matched.all():
+            ids[~is_matched] = await sheet_sindex.copy_many(new.loc[~is_matched].assign(sheet_id=sheet_id))
+        await sheet_sindex.update_indexes(sheet_id, ids[is_matched].tolist(), new['index'][is_matched].tolist())
+        return ids
+
+    @staticmethod
+    def _get_sindex_keys(is_freeze: pd.Series, index_values: np.ndarray) -> pd.MultiIndex:
+        # Index sindexes (frozen) are keyed by position, the others by the values of their index cells
+        keys = pd.DataFrame(index_values).astype(str)
+        keys.loc[is_freeze.to_numpy()] = ''
+        keys['is_freeze'] = is_freeze.to_numpy()
+        keys['number'] = keys.groupby(list(keys.columns), sort=False).cumcount()
+        return pd.MultiIndex.from_frame(keys)
+
+    async def _create_rows_cols_and_cells(self, sheet_id: core_types.Id_, normalizer: Normalizer) -> None:
+        # Create sindexes with preallocated ids, save them for following create cells
+        rows = normalizer.get_normalized_rows().assign(sheet_id=sheet_id)
+        cols = normalizer.get_normalized_cols().assign(sheet_id=sheet_id)
+
+        row_ids = await self.__sheet_row.copy_many(rows)
+        col_ids = await self.__sheet_col.copy_many(cols)
+        await self.__sheet_row.update_scroll_size(sheet_id)
+        await self.__sheet_col.update_scroll_size(sheet_id)
 
         # Create cells
-        repeated_row_ids = np.repeat(row_ids, len(col_ids))
-        repeated_col_ids = col_ids * len(row_ids)
         cells = normalizer.get_normalized_cells().assign(
-            sheet_id=sheet_id, row_id=repeated_row_ids, col_id=repeated_col_ids).to_dict(orient='records')
-        _ = await self.__sheet_cell.create_many(cells)
+            sheet_id=sheet_id, row_id=np.repeat(row_ids, len(col_ids)), col_id=np.tile(col_ids, len(row_ids)))
+        await self.__sheet_cell.copy_many(cells)
 
     @staticmethod
-    def _merge_into_sheet_entity(sheet_id, rows, cols, cells, ) -> entities.Sheet:
-        saved_cols = cells.columns.copy()
+    def _merge_into_sheet_entity(sheet_id, rows, cols, cells, scroll_size: entities.ScrollSize) -> entities.Sheet:
+        # Typed shadows of values are not sent, the client works with text values
+        saved_cols = cells.columns.drop([CellModel.number_value.key, CellModel.date_value.key])
         cells = pd.merge(cells, rows[['id', 'index', ]], left_on='row_id', right_on='id', suffixes=('', '_row'))
         cells = pd.merge(cells, cols[['id', 'index', ]], left_on='col_id', right_on='id', suffixes=('', '_col'))
         cells = cells.sort_values(['index', 'index_col'])[saved_cols]
@@ -408,6 +1051,36 @@ class SheetCrud(BasePostgres):
             rows=rows.to_dict(orient='records'),
             cols=cols.to_dict(orient='records'),
             cells=cells.to_dict(orient='records'),
+            scroll_size=scroll_size.model_dump(),
+        )
+        return sheet
+
+    @staticmethod
+    def _merge_into_compact_sheet_entity(sheet_id, rows, cols, cells,
+                                         scroll_size: entities.ScrollSize) -> entities.CompactSheet:
+        # Sindexes and cells go as column arrays, cells in row-major order of the sheet (missing cells have id -1).
+        # Attributes that repeat from cell to cell are replaced by ids of a small palette of styles
+        sindex_columns = ['id', 'index', 'scroll_pos', 'size', 'is_freeze', 'is_filtred', 'is_readonly']
+        style_columns = ['dtype', 'is_readonly', 'is_index', 'color', 'text_align']
+
+        row_pos = pd.Index(rows['id']).get_indexer(cells['row_id'])
+        col_pos = pd.Index(cols['id']).get_indexer(cells['col_id'])
+        flat_pos = row_pos * len(cols) + col_pos
+        ids = np.full(len(rows) * len(cols), -1, dtype=np.int64)
+        ids[flat_pos] = cells['id'].to_numpy()
+        values = np.full(len(ids), None, dtype=object)
+        values[flat_pos] = cells['value'].to_numpy()
+        style_ids = np.full(len(ids), -1, dtype=np.int64)
+        style_ids[flat_pos] = cells.groupby(style_columns, sort=False, dropna=False).ngroup().to_numpy()
+        styles = cells[style_columns].drop_duplicates()
+
+        sheet = entities.CompactSheet(
+            id=sheet_id,
+            rows={key: rows[key].to_numpy() for key in sindex_columns},
+            cols={key: cols[key].to_numpy() for key in sindex_columns},
+            cells={'id': ids, 'value': values.tolist(), 'style': style_ids},
+            styles=styles.astype(object).where(styles.notna(), None).to_dict(orient='records'),
+            scroll_size=scroll_size.model_dump(),
         )
         return sheet
 
@@ -425,7 +1098,7 @@ class SheetRepoPostgres(SheetRepo):
     async def create_one(self, data: events.SheetCreated) -> core_types.Id_:
         return await self.__sheet_crud.create_one(data)
 
-    async def get_full_sheet(self, data: events.SheetGotten) -> entities.Sheet:
+    async def get_full_sheet(self, data: events.SheetGotten) -> entities.Sheet | entities.CompactSheet:
         return await self.__sheet_crud.get_one(data)
 
     async def get_sheet_info(self, sheet_id: core_types.Id_) -> entities.SheetInfo:
@@ -438,8 +1111,8 @@ class SheetRepoPostgres(SheetRepo):
         filter_by = {"sheet_id": sheet_id}
         return await self.__sheet_crud.get_one_as_frame(filter_by)
 
-    async def overwrite_one(self, sheet_id: core_types.Id_, data: events.SheetCreated) -> None:
-        await self.__sheet_crud.overwrite_one(sheet_id, data)
+    async def overwrite_one(self, sheet_id: core_types.Id_, data: events.SheetCreated, diff: bool = False) -> int:
+        return await self.__sheet_crud.overwrite_one(sheet_id, data, diff)
 
     async def delete_many(self, filter_by: dict) -> None:
         await self.__sheet_crud.delete_many(filter_by)
@@ -448,12 +1121,10 @@ class SheetRepoPostgres(SheetRepo):
         await self.__sheet_crud.delete_one(filter_by)
 
     async def get_scroll_size(self, sheet_id: core_types.Id_) -> entities.ScrollSize:
-        raise NotImplemented
+        return await self.__sheet_crud.get_scroll_size(sheet_id)
 
     async def update_col_size(self, data: events.ColWidthUpdated) -> None:
-        filter_by = {'sheet_id': data.sheet_id, 'id': data.sindex_id}
-        data = {"size": data.new_size}
-        await self.__sheet_col.update_many(data, filter_by)
+        await self.__sheet_col.update_size(data.sheet_id, data.sindex_id, data.new_size)
 
     async def update_cell_one(self, sheet_id: core_types.Id_, data: schema.PartialUpdateCellSchema) -> None:
         await self.__sheet_cell.update_one(sheet_id, data)
@@ -464,6 +1135,19 @@ class SheetRepoPostgres(SheetRepo):
     async def delete_row_many(self, sheet_id: core_types.Id_, row_ids: list[core_types.Id_]) -> None:
         await self.__sheet_row.delete_many_by_ids(sheet_id, row_ids)
 
+    async def insert_rows(self, data: events.RowsInserted) -> list[core_types.Id_]:
+        return await self.__sheet_crud.insert_rows(data)
+
+    async def insert_cols(self, data: events.ColsInserted) -> list[core_types.Id_]:
+        return await self.__sheet_crud.insert_cols(data)
+
+    async def move_rows(self, data: events.RowsMoved) -> None:
+        await self.__sheet_row.move_many(data.sheet_id, data.row_ids, data.index)
+
+    async def rebalance(self, sheet_id: core_types.Id_) -> None:
+        await self.__sheet_row.rebalance(sheet_id)
+        await self.__sheet_col.rebalance(sheet_id)
+
     async def get_col_filter(self, data: events.ColFilterGotten) -> entities.ColFilter:
         return await self.__sheet_filter.get_col_filter(data)
 
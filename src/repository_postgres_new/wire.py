@@ -1,21 +1,27 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 
 import pandas as pd
 import pandera as pa
 import typing
 
-from sqlalchemy import TIMESTAMP, Float, String, Integer, ForeignKey
+from sqlalchemy import TIMESTAMP, Float, String, Integer, ForeignKey, UniqueConstraint, select, delete, func, \
+    bindparam
+from sqlalchemy.dialects.postgresql import insert, ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Mapped, mapped_column
 
 from src.core_types import OrderBy, Id_, DTO
 from src import core_types
 from src.report.repository import WireRepo
-from src.wire.repository import RepositoryCrud
+from src.wire.repository import WireRepository
 from src.wire.entities import Wire
 
 from .base import BasePostgres, BaseModel
 from .source import SourceModel
 
+CSV_CHUNKSIZE = 100_000
+WIRE_COLUMNS = ['source_id', 'date', 'sender', 'receiver', 'debit', 'credit', 'sub1', 'sub2', 'comment']
+
 
 class WireModel(BaseModel):
     __tablename__ = "wire"
@@ -44,6 +50,24 @@ class WireModel(BaseModel):
         )
 
 
+# Daily saldo of a source by (sender, receiver, sub1, sub2), the day is the closing utc midnight of the wires.
+# NULL subconto is kept as NULL like in wire, the key treats NULLs as equal so the upsert finds their group
+class WireRollupModel(BaseModel):
+    __tablename__ = "wire_rollup"
+    __table_args__ = (UniqueConstraint('source_id', 'day', 'sender', 'receiver', 'sub1', 'sub2',
+                                       postgresql_nulls_not_distinct=True),)
+    day: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
+    sender: Mapped[float] = mapped_column(Float, nullable=False)
+    receiver: Mapped[float] = mapped_column(Float, nullable=False)
+    sub1: Mapped[str] = mapped_column(String(800), nullable=True)
+    sub2: Mapped[str] = mapped_column(String(800), nullable=True)
+    debit: Mapped[float] = mapped_column(Float, nullable=False)
+    credit: Mapped[float] = mapped_column(Float, nullable=False)
+    saldo: Mapped[float] = mapped_column(Float, nullable=False)
+    count: Mapped[int] = mapped_column(Integer, nullable=False)
+    source_id: Mapped[int] = mapped_column(Integer, ForeignKey(SourceModel.id, ondelete='CASCADE'), nullable=False)
+
+
 class WireSchema(pa.DataFrameModel):
     source_id: pa.typing.Series[core_types.Id_]
     date: pa.typing.Series[typing.Any]
@@ -51,9 +75,9 @@ class WireSchema(pa.DataFrameModel):
     receiver: pa.typing.Series[float]
     debit: pa.typing.Series[float]
     credit: pa.typing.Series[float]
-    sub1: pa.typing.Series[str] = pa.Field(str_length={'max_value': 800})
-    sub2: pa.typing.Series[str] = pa.Field(str_length={'max_value': 800})
-    comment: pa.typing.Series[str] = pa.Field(str_length={'max_value': 800})
+    sub1: pa.typing.Series[str] = pa.Field(str_length={'max_value': 800}, nullable=True)
+    sub2: pa.typing.Series[str] = pa.Field(str_length={'max_value': 800}, nullable=True)
+    comment: pa.typing.Series[str] = pa.Field(str_length={'max_value': 800}, nullable=True)
 
     @classmethod
     async def drop_extra_columns(cls, df: pd.DataFrame) -> pd.DataFrame:
@@ -61,12 +85,85 @@ class WireSchema(pa.DataFrameModel):
         return df
 
 
-class WireRepoPostgres(BasePostgres, WireRepo, RepositoryCrud):
+class WireCsvAmountSchema(pa.DataFrameModel):
+    sender: pa.typing.Series[float]
+    receiver: pa.typing.Series[float]
+    debit: pa.typing.Series[float]
+    credit: pa.typing.Series[float]
+
+
+class WireRollup(BasePostgres):
+    model = WireRollupModel
+    __keys = ['source_id', 'day', 'sender', 'receiver', 'sub1', 'sub2']
+    __values = ['debit', 'credit', 'saldo', 'count']
+
+    async def add_wires(self, wire_df: pd.DataFrame, sign: int = 1) -> None:
+        if len(wire_df) == 0:
+            return
+
+        df = pd.DataFrame({
+            'source_id': wire_df['source_id'].astype(int),
+            'day': pd.to_datetime(wire_df['date'], utc=True).dt.ceil('D'),
+            'sender': wire_df['sender'].astype(float),
+            'receiver': wire_df['receiver'].astype(float),
+            'sub1': wire_df['sub1'].astype(object),
+            'sub2': wire_df['sub2'].astype(object),
+            'debit': wire_df['debit'].astype(float) * sign,
+            'credit': wire_df['credit'].astype(float) * sign,
+        })
+        df['saldo'] = df['debit'] - df['credit']
+        df['count'] = sign
+        df = df.groupby(self.__keys, as_index=False, sort=False, dropna=False).sum()
+        for col in ['sub1', 'sub2']:
+            df[col] = df[col].where(df[col].notna(), None)
+
+        # Upsert all groups in one statement, the arrays are unnested in lockstep
+        table = self.model.__table__
+        columns = self.__keys + self.__values
+        unnested = [
+            func.unnest(bindparam(f'{col}_values', df[col].tolist(), type_=ARRAY(table.c[col].type))).label(col)
+            for col in columns
+        ]
+        stmt = insert(self.model).from_select(columns, select(*unnested))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=self.__keys,
+            set_={col: table.c[col] + stmt.excluded[col] for col in self.__values},
+        )
+        await self._session.execute(stmt)
+
+        if sign < 0:
+            source_ids = df['source_id'].unique().tolist()
+            stmt = delete(self.model).where(self.model.source_id.in_(source_ids), self.model.count <= 0)
+            await self._session.execute(stmt)
+
+    async def remove_wires(self, wire_df: pd.DataFrame) -> None:
+        await self.add_wires(wire_df, sign=-1)
+
+    async def get_rollup_as_frame(self, source_id: core_types.Id_) -> pd.DataFrame:
+        df = await self.get_many_as_frame({"source_id": source_id}, order_by='day')
+        if len(df) == 0:
+            raise LookupError(f'wire rollup with source_id={source_id} is not found')
+        df = df.rename({'day': 'date'}, axis=1)
+        return df[['date', 'sender', 'receiver', 'debit', 'credit', 'sub1', 'sub2']]
+
+
+class WireRepoPostgres(BasePostgres, WireRepo, WireRepository):
     model = WireModel
 
+    def __init__(self, session: AsyncSession):
+        super().__init__(session)
+        self.__wire_rollup = WireRollup(session)
+
     async def create_one(self, data: DTO) -> Wire:
         model: WireModel = await super().create_one(data)
-        return model.to_entity()
+        wire = model.to_entity()
+        await self.__wire_rollup.add_wires(pd.DataFrame([wire.model_dump()]))
+        return wire
+
+    async def create_many(self, data: list[DTO]) -> None:
+        await super().create_many(data)
+        wire_df = pd.DataFrame(self._parse_dto(data)).reindex(columns=WIRE_COLUMNS)
+        await self.__wire_rollup.add_wires(wire_df)
 
     async def get_one(self, filter_by: dict) -> Wire:
         model: WireModel = await super().get_one(filter_by)
@@ -79,12 +176,32 @@ class WireRepoPostgres(BasePostgres, WireRepo, RepositoryCrud):
         return entities
 
     async def update_one(self, data: DTO, filter_by: dict) -> Wire:
-        updated: WireModel = await super().update_one(data, filter_by)
-        return updated.to_entity()
+        old: Wire = (await super().get_one(filter_by)).to_entity()
+        updated: Wire = (await super().update_one(data, filter_by)).to_entity()
+        await self.__wire_rollup.remove_wires(pd.DataFrame([old.model_dump()]))
+        await self.__wire_rollup.add_wires(pd.DataFrame([updated.model_dump()]))
+        return updated
+
+    async def update_many_via_id(self, data: list[DTO]) -> list[Id_]:
+        ids = [x['id'] if isinstance(x, dict) else x.id for x in data]
+        old_df = await super().get_many_as_frame({"id__$": ids})
+        await super().update_many_via_id(data)
+        new_df = await super().get_many_as_frame({"id__$": ids})
+        await self.__wire_rollup.remove_wires(old_df)
+        await self.__wire_rollup.add_wires(new_df)
+        return sorted(set(old_df['source_id'].tolist()) | set(new_df['source_id'].tolist()))
 
     async def delete_one(self, filter_by: dict) -> Wire:
         model: WireModel = await super().delete_one(filter_by)
-        return model.to_entity()
+        wire = model.to_entity()
+        await self.__wire_rollup.remove_wires(pd.DataFrame([wire.model_dump()]))
+        return wire
+
+    async def delete_many(self, filter_by: dict) -> list[Id_]:
+        old_df = await super().get_many_as_frame(filter_by)
+        await super().delete_many(filter_by)
+        await self.__wire_rollup.remove_wires(old_df)
+        return sorted(set(old_df['source_id'].tolist()))
 
     async def get_many_as_frame(self, filter_by: dict, order_by: OrderBy = None, asc=True, slice_from: int = None,
                                 slice_to: int = None) -> pd.DataFrame:
@@ -100,5 +217,69 @@ class WireRepoPostgres(BasePostgres, WireRepo, RepositoryCrud):
                           order_by: OrderBy = None, asc=True, ) -> list[dict]:
         return (await self.get_uniques_as_frame(columns_by, filter_by, order_by, asc)).to_dict(orient='records')
 
+    async def get_rollup_as_frame(self, source_id: core_types.Id_) -> pd.DataFrame:
+        return await self.__wire_rollup.get_rollup_as_frame(source_id)
+
+    async def get_start_date(self, source_id: core_types.Id_) -> pd.Timestamp:
+        stmt = select(func.min(self.model.date)).where(self.model.source_id == source_id)
+        start_date = (await self._session.execute(stmt)).scalar()
+        if start_date is None:
+            raise LookupError(f'wires with source_id={source_id} is not found')
+        return pd.Timestamp(start_date)
+
+    async def get_saldo_as_frame(self, source_id: core_types.Id_, breaks: pd.DatetimeIndex,
+                                 ccols: list[str]) -> pd.DataFrame:
+        breaks = pd.DatetimeIndex(breaks)
+        if breaks.tz is None:
+            breaks = breaks.tz_localize('UTC')
+
+        # width_bucket is left-closed, shifting dates by the smallest step makes buckets right-closed like pd.cut.
+        # Buckets 1..n-1 lie between the breaks, 0 and n are outside of them. The result holds finrep bucket codes
+        bounds = bindparam('breaks', breaks.to_pydatetime().tolist(), type_=ARRAY(TIMESTAMP(timezone=True)))
+        bucket = func.width_bucket(self.model.date - timedelta(microseconds=1), bounds, type_=Integer)
+        cols = [self.model.__table__.c[col] for col in ccols]
+        stmt = (
+            select(bucket.label('bucket'), *cols, func.sum(self.model.debit - self.model.credit).label('saldo'))
+            .where(self.model.source_id == source_id,
+                   bucket.between(1, len(breaks) - 1),
+                   *[col.is_not(None) for col in cols])
+            .group_by(bucket, *cols)
+        )
+        saldo_df = await self._get_columns_as_frame(stmt)
+        saldo_df['interval'] = saldo_df.pop('bucket') - 1
+        return saldo_df[['interval'] + ccols + ['saldo']]
+
     async def get_wire_dataframe(self, filter_by: dict, order_by: core_types.OrderBy = None) -> pd.DataFrame:
         return await self.get_many_as_frame(filter_by, order_by)
+
+    async def append_many_from_csv(self, source_id: core_types.Id_, file: typing.BinaryIO) -> int:
+        columns = WIRE_COLUMNS
+        connection = await self._get_driver_connection()
+
+        total = 0
+        chunks = pd.read_csv(file, chunksize=CSV_CHUNKSIZE, dtype={'sub1': str, 'sub2': str, 'comment': str})
+        for chunk in chunks:
+            values = self._coerce_csv_chunk(chunk, source_id)
+            records = zip(*[values[col] for col in columns])
+            await connection.copy_records_to_table(self.model.__tablename__, records=records, columns=columns)
+            await self.__wire_rollup.add_wires(pd.DataFrame(values))
+            total += len(chunk)
+        return total
+
+    @staticmethod
+    def _coerce_csv_chunk(chunk: pd.DataFrame, source_id: core_types.Id_) -> dict[str, list]:
+        values = {
+            'source_id': [source_id] * len(chunk),
+            'date': pd.to_datetime(chunk['date'], utc=True).dt.to_pydatetime().tolist(),
+        }
+        # NaN is a valid float8, blank amounts are rejected here instead of reaching the NOT NULL columns
+        amounts = chunk[['sender', 'receiver', 'debit', 'credit']].apply(pd.to_numeric).astype(float)
+        WireCsvAmountSchema.validate(amounts)
+        for col in amounts.columns:
+            values[col] = amounts[col].tolist()
+        for col in ['sub1', 'sub2', 'comment']:
+            if col in chunk.columns:
+                values[col] = chunk[col].astype(object).where(chunk[col].notna(), None).tolist()
+            else:
+                values[col] = [None] * len(chunk)
+        return values
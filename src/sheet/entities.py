@@ -1,3 +1,4 @@
+import typing
 from typing import TypedDict
 
 import pandas as pd
@@ -41,18 +42,36 @@ class Sindex(TypedDict):
     sheet_id: core_types.Id_
 
 
+class ScrollSize(BaseModel):
+    count_rows: int
+    count_cols: int
+    scroll_height: int
+    scroll_width: int
+
+
 class Sheet(TypedDict):
     id: core_types.Id_
     rows: list[Sindex]
     cols: list[Sindex]
     cells: list[Cell]
+    scroll_size: dict
 
 
-class ScrollSize(BaseModel):
-    count_rows: int
-    count_cols: int
-    scroll_height: int
-    scroll_width: int
+class CellStyle(TypedDict):
+    dtype: enums.Dtype
+    is_readonly: bool
+    is_index: bool
+    color: str
+    text_align: enums.CellTextAlign
+
+
+class CompactSheet(TypedDict):
+    id: core_types.Id_
+    rows: dict[str, list]
+    cols: dict[str, list]
+    cells: dict[str, list]
+    styles: list[CellStyle]
+    scroll_size: dict
 
 
 """
@@ -64,18 +83,34 @@ class FilterItem(BaseModel):
     value: str
     dtype: enums.Dtype
     is_filtred: bool
+    count: typing.Optional[int] = None
+
+
+class FilterPredicate(BaseModel):
+    operator: enums.FilterOperator
+    dtype: enums.Dtype = 'TEXT'
+    value: typing.Optional[str] = None
+    value_to: typing.Optional[str] = None
 
 
 class ColFilter(BaseModel):
     sheet_id: core_types.Id_
     col_id: core_types.Id_
-    items: list[FilterItem]
+    items: list[FilterItem] = []
+    predicate: typing.Optional[FilterPredicate] = None
+    total_count: typing.Optional[int] = None
+
+
+class SortKey(BaseModel):
+    col_id: core_types.Id_
+    ascending: bool
 
 
 class ColSorter(BaseModel):
     sheet_id: core_types.Id_
     col_id: core_types.Id_
     ascending: bool
+    then_by: list[SortKey] = []
 
 
 class ColFilterRetrieve(BaseModel):
@@ -12,3 +12,8 @@ class CellDtype(enum.Enum):
 
 
 CellTextAlign = typing.Literal['left', 'center', 'right']
+
+FilterSearchMode = typing.Literal['starts_with', 'contains']
+
+FilterOperator = typing.Literal['eq', 'gt', 'ge', 'lt', 'le', 'between', 'contains', 'starts_with', 'is_empty',
+                                'is_not_empty']
@@ -1,6 +1,7 @@
 import typing
 
 import pandas as pd
+from pydantic import Field
 
 from src import core_types
 from src.core_types import Event
@@ -19,11 +20,20 @@ class SheetGotten(Event):
     sheet_id: core_types.Id_
     from_scroll: typing.Optional[int] = None
     to_scroll: typing.Optional[int] = None
+    compact: bool = False
+
+
+class ScrollSizeGotten(Event):
+    sheet_id: core_types.Id_
 
 
 class ColFilterGotten(Event):
     sheet_id: core_types.Id_
     col_id: core_types.Id_
+    search: typing.Optional[str] = None
+    search_mode: enums.FilterSearchMode = 'starts_with'
+    paginate_from: typing.Optional[int] = None
+    paginate_to: typing.Optional[int] = None
 
 
 class ColFilterUpdated(Event):
@@ -56,6 +66,30 @@ class RowsDeleted(Event):
     row_ids: list[core_types.Id_]
 
 
+class RowsInserted(Event):
+    sheet_id: core_types.Id_
+    index: int = Field(ge=0)
+    count: int = Field(1, ge=1)
+    size: typing.Optional[int] = Field(None, gt=0)
+
+
+class ColsInserted(Event):
+    sheet_id: core_types.Id_
+    index: int = Field(ge=0)
+    count: int = Field(1, ge=1)
+    size: typing.Optional[int] = Field(None, gt=0)
+
+
+class RowsMoved(Event):
+    sheet_id: core_types.Id_
+    row_ids: list[core_types.Id_]
+    index: int
+
+
+class SheetRebalanced(Event):
+    sheet_id: core_types.Id_
+
+
 class SheetInfoUpdated(Event):
     sheet_id: core_types.Id_
     data: dict
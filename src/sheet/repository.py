@@ -21,7 +21,7 @@ class SheetRepo(ABC):
         raise NotImplemented
 
     @abstractmethod
-    async def get_full_sheet(self, data: events.SheetGotten) -> entities.Sheet:
+    async def get_full_sheet(self, data: events.SheetGotten) -> entities.Sheet | entities.CompactSheet:
         raise NotImplemented
 
     @abstractmethod
@@ -29,7 +29,7 @@ class SheetRepo(ABC):
         raise NotImplemented
 
     @abstractmethod
-    async def overwrite_one(self, sheet_id: core_types.Id_, data: events.SheetCreated) -> None:
+    async def overwrite_one(self, sheet_id: core_types.Id_, data: events.SheetCreated, diff: bool = False) -> int:
         raise NotImplemented
 
     @abstractmethod
@@ -60,6 +60,22 @@ class SheetRepo(ABC):
     async def delete_row_many(self, sheet_id: core_types.Id_, row_ids: list[core_types.Id_]) -> None:
         raise NotImplemented
 
+    @abstractmethod
+    async def insert_rows(self, data: events.RowsInserted) -> list[core_types.Id_]:
+        raise NotImplemented
+
+    @abstractmethod
+    async def insert_cols(self, data: events.ColsInserted) -> list[core_types.Id_]:
+        raise NotImplemented
+
+    @abstractmethod
+    async def move_rows(self, data: events.RowsMoved) -> None:
+        raise NotImplemented
+
+    @abstractmethod
+    async def rebalance(self, sheet_id: core_types.Id_) -> None:
+        raise NotImplemented
+
     @abstractmethod
     async def get_col_filter(self, data: events.ColFilterGotten) -> entities.ColFilter:
         raise NotImplemented
@@ -1,11 +1,11 @@
 import loguru
-from fastapi import APIRouter, Depends, status
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, status, BackgroundTasks
+from fastapi.responses import JSONResponse, ORJSONResponse
 
 from src.repository_postgres_new.sheet import SheetRepoPostgres
 from src import db, core_types, helpers
 from src.messagebus import messagebus
-from . import schema, entities, events
+from . import schema, entities, events, enums
 from .service import SheetService
 
 router = APIRouter(
@@ -16,22 +16,40 @@ router = APIRouter(
 
 @router.get("/{sheet_id}")
 @helpers.async_timeit
-async def get_one_sheet(sheet_id: core_types.Id_, from_scroll: int = None, to_scroll: int = None,
+async def get_one_sheet(sheet_id: core_types.Id_, from_scroll: int = None, to_scroll: int = None, compact: bool = False,
                         get_asession=Depends(db.get_async_session)) -> JSONResponse:
     async with get_asession as session:
-        event = events.SheetGotten(sheet_id=sheet_id, from_scroll=from_scroll, to_scroll=to_scroll)
+        event = events.SheetGotten(sheet_id=sheet_id, from_scroll=from_scroll, to_scroll=to_scroll, compact=compact)
         results = await messagebus.handle(event, session)
-        sheet: entities.Sheet = results[events.SheetGotten]
+        sheet: entities.Sheet | entities.CompactSheet = results[events.SheetGotten]
         await session.commit()
+        # Compact sheet holds numpy arrays, orjson serializes them without converting to python lists
+        if compact:
+            return ORJSONResponse(content=sheet)
         return JSONResponse(content=sheet)
 
 
+@router.get("/{sheet_id}/scroll-size")
+@helpers.async_timeit
+async def get_scroll_size(sheet_id: core_types.Id_,
+                          get_asession=Depends(db.get_async_session)) -> entities.ScrollSize:
+    async with get_asession as session:
+        event = events.ScrollSizeGotten(sheet_id=sheet_id)
+        results = await messagebus.handle(event, session)
+        scroll_size: entities.ScrollSize = results[events.ScrollSizeGotten]
+        await session.commit()
+        return scroll_size
+
+
 @router.get("/{sheet_id}/retrieve-unique-cells")
 @helpers.async_timeit
-async def get_col_filter(sheet_id: core_types.Id_, col_id: core_types.Id_,
+async def get_col_filter(sheet_id: core_types.Id_, col_id: core_types.Id_, search: str = None,
+                         search_mode: enums.FilterSearchMode = 'starts_with',
+                         paginate_from: int = None, paginate_to: int = None,
                          get_asession=Depends(db.get_async_session)) -> entities.ColFilter:
     async with get_asession as session:
-        event = events.ColFilterGotten(sheet_id=sheet_id, col_id=col_id)
+        event = events.ColFilterGotten(sheet_id=sheet_id, col_id=col_id, search=search, search_mode=search_mode,
+                                       paginate_from=paginate_from, paginate_to=paginate_to)
         results = await messagebus.handle(event, session)
         col_filter: entities.ColFilter = results[events.ColFilterGotten]
         await session.commit()
@@ -113,3 +131,52 @@ async def delete_rows(sheet_id: core_types.Id_, row_ids: list[core_types.Id_],
         await messagebus.handle(event, session)
         await session.commit()
         return 1
+
+
+async def rebalance_sheet(sheet_id: core_types.Id_, get_asession) -> None:
+    # Inserts and moves leave positions of the following sindexes stale, they are recalculated after the response
+    async with get_asession as session:
+        event = events.SheetRebalanced(sheet_id=sheet_id)
+        await messagebus.handle(event, session)
+        await session.commit()
+
+
+@router.post("/{sheet_id}/insert-rows")
+@helpers.async_timeit
+async def insert_rows(sheet_id: core_types.Id_, data: schema.InsertSindexesSchema, background_tasks: BackgroundTasks,
+                      get_asession=Depends(db.get_async_session),
+                      get_background_asession=Depends(db.get_async_session, use_cache=False)) -> list[core_types.Id_]:
+    async with get_asession as session:
+        event = events.RowsInserted(sheet_id=sheet_id, index=data.index, count=data.count, size=data.size)
+        results = await messagebus.handle(event, session)
+        row_ids: list[core_types.Id_] = results[events.RowsInserted]
+        await session.commit()
+        background_tasks.add_task(rebalance_sheet, sheet_id, get_background_asession)
+        return row_ids
+
+
+@router.post("/{sheet_id}/insert-cols")
+@helpers.async_timeit
+async def insert_cols(sheet_id: core_types.Id_, data: schema.InsertSindexesSchema, background_tasks: BackgroundTasks,
+                      get_asession=Depends(db.get_async_session),
+                      get_background_asession=Depends(db.get_async_session, use_cache=False)) -> list[core_types.Id_]:
+    async with get_asession as session:
+        event = events.ColsInserted(sheet_id=sheet_id, index=data.index, count=data.count, size=data.size)
+        results = await messagebus.handle(event, session)
+        col_ids: list[core_types.Id_] = results[events.ColsInserted]
+        await session.commit()
+        background_tasks.add_task(rebalance_sheet, sheet_id, get_background_asession)
+        return col_ids
+
+
+@router.patch("/{sheet_id}/move-rows")
+@helpers.async_timeit
+async def move_rows(sheet_id: core_types.Id_, data: schema.MoveSindexesSchema, background_tasks: BackgroundTasks,
+                    get_asession=Depends(db.get_async_session),
+                    get_background_asession=Depends(db.get_async_session, use_cache=False)) -> int:
+    async with get_asession as session:
+        event = events.RowsMoved(sheet_id=sheet_id, row_ids=data.sindex_ids, index=data.index)
+        await messagebus.handle(event, session)
+        await session.commit()
+        background_tasks.add_task(rebalance_sheet, sheet_id, get_background_asession)
+        return 1
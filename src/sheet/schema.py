@@ -1,6 +1,6 @@
 import typing
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from src import core_types
 from . import entities, enums
@@ -11,6 +11,17 @@ class UpdateSindexSizeSchema(BaseModel):
     sindex_id: core_types.Id_
 
 
+class InsertSindexesSchema(BaseModel):
+    index: int = Field(ge=0)
+    count: int = Field(1, ge=1)
+    size: typing.Optional[int] = Field(None, gt=0)
+
+
+class MoveSindexesSchema(BaseModel):
+    sindex_ids: list[core_types.Id_]
+    index: int
+
+
 class PartialUpdateCellSchema(BaseModel):
     id: core_types.Id_
     sheet_id: core_types.Id_
@@ -16,10 +16,11 @@ class SheetService:
         sheet_id = await self.sheet_repo.create_one(data)
         return sheet_id
 
-    async def overwrite_one(self, sheet_id: core_types.Id_, data: events.SheetCreated) -> None:
-        await self.sheet_repo.overwrite_one(sheet_id, data)
+    async def overwrite_one(self, sheet_id: core_types.Id_, data: events.SheetCreated, diff: bool = False) -> int:
+        changed = await self.sheet_repo.overwrite_one(sheet_id, data, diff)
+        return changed
 
-    async def get_full_sheet(self, data: events.SheetGotten) -> entities.Sheet:
+    async def get_full_sheet(self, data: events.SheetGotten) -> entities.Sheet | entities.CompactSheet:
         sheet_schema = await self.sheet_repo.get_full_sheet(data=data)
         return sheet_schema
 
@@ -35,6 +36,10 @@ class SheetService:
         sheet_df = await self.sheet_repo.get_one_as_frame(sheet_id=data.sheet_id)
         return sheet_df
 
+    async def get_scroll_size(self, data: events.ScrollSizeGotten) -> entities.ScrollSize:
+        scroll_size = await self.sheet_repo.get_scroll_size(data.sheet_id)
+        return scroll_size
+
     async def get_col_filter(self, data: events.ColFilterGotten) -> entities.ColFilter:
         col_filter = await self.sheet_repo.get_col_filter(data)
         return col_filter
@@ -59,3 +64,17 @@ class SheetService:
 
     async def delete_row_many(self, sheet_id: core_types.Id_, row_ids: list[core_types.Id_]) -> None:
         await self.sheet_repo.delete_row_many(sheet_id, row_ids)
+
+    async def insert_rows(self, data: events.RowsInserted) -> list[core_types.Id_]:
+        row_ids = await self.sheet_repo.insert_rows(data)
+        return row_ids
+
+    async def insert_cols(self, data: events.ColsInserted) -> list[core_types.Id_]:
+        col_ids = await self.sheet_repo.insert_cols(data)
+        return col_ids
+
+    async def move_rows(self, data: events.RowsMoved) -> None:
+        await self.sheet_repo.move_rows(data)
+
+    async def rebalance(self, sheet_id: core_types.Id_) -> None:
+        await self.sheet_repo.rebalance(sheet_id)
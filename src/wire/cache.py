@@ -0,0 +1,54 @@
+from collections import OrderedDict
+from datetime import datetime
+
+import pandas as pd
+from loguru import logger
+
+from src import config, core_types
+
+
+# LRU cache of wire frames keyed by (source_id, source.updated_at), only the last version of a source is kept.
+# Frames are shared with callers through shallow copies: adding or dropping columns is safe,
+# mutating values in place is not and would corrupt the cached frame
+class WireFrameCache:
+
+    def __init__(self, max_bytes: int = config.WIRE_FRAME_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.__frames: OrderedDict[core_types.Id_, tuple[datetime, pd.DataFrame, int]] = OrderedDict()
+        self.__total_bytes = 0
+
+    def get(self, source_id: core_types.Id_, version: datetime) -> pd.DataFrame | None:
+        item = self.__frames.get(source_id)
+        if item is None or item[0] != version:
+            return None
+        self.__frames.move_to_end(source_id)
+        return item[1].copy(deep=False)
+
+    def put(self, source_id: core_types.Id_, version: datetime, df: pd.DataFrame) -> None:
+        self.invalidate(source_id)
+
+        nbytes = int(df.memory_usage(deep=True).sum())
+        if nbytes > self.max_bytes:
+            logger.warning(f"wire frame of source {source_id} ({nbytes} bytes) exceeds cache budget")
+            return
+
+        self.__frames[source_id] = (version, df.copy(deep=False), nbytes)
+        self.__total_bytes += nbytes
+        while self.__total_bytes > self.max_bytes:
+            _, (_, _, evicted_bytes) = self.__frames.popitem(last=False)
+            self.__total_bytes -= evicted_bytes
+
+    def invalidate(self, source_id: core_types.Id_) -> None:
+        item = self.__frames.pop(source_id, None)
+        if item is not None:
+            self.__total_bytes -= item[2]
+
+    def clear(self) -> None:
+        self.__frames.clear()
+        self.__total_bytes = 0
+
+    def get_total_bytes(self) -> int:
+        return self.__total_bytes
+
+
+wire_frame_cache = WireFrameCache()
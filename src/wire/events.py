@@ -51,6 +51,11 @@ class WireManyCreated(Event):
     wires: list[dict]
 
 
+class WireCsvAppended(Event):
+    source_id: core_types.Id_
+    file: typing.Any
+
+
 class WirePartialUpdated(Event):
     wire_id: typing.Optional[core_types.Id_] = None
     date: typing.Optional[datetime] = None
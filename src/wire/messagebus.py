@@ -9,12 +9,12 @@ from src.repository_postgres_new import SourceRepoPostgres, WireRepoPostgres
 
 from . import events
 from .entities import Wire
-from .service import CrudService
+from .service import CrudService, WireService
 
 
 async def handle_wire_created(event: events.WireCreated, session: AsyncSession, queue: deque) -> Wire:
     wire_repo = WireRepoPostgres(session)
-    wire_service = CrudService(wire_repo)
+    wire_service = WireService(wire_repo)
     created: Wire = await wire_service.create_one(event)
     queue.append(events.SourceUpdated(source_id=created.source_id))
     return created
@@ -22,7 +22,7 @@ async def handle_wire_created(event: events.WireCreated, session: AsyncSession,
 
 async def handle_wire_deleted(event: events.WireDeleted, session: AsyncSession, queue: deque) -> core_types.Id_:
     wire_repo = WireRepoPostgres(session)
-    wire_service = CrudService(wire_repo)
+    wire_service = WireService(wire_repo)
     deleted = await wire_service.delete_one(filter_by={"id": event.wire_id})
     queue.append(events.SourceUpdated(source_id=deleted.source_id))
     return deleted.id
@@ -1,3 +1,4 @@
+import typing
 from abc import ABC, abstractmethod
 
 import pandas as pd
@@ -51,3 +52,32 @@ class RepositoryCrud(ABC):
     @abstractmethod
     async def delete_many(self, filter_by: dict) -> None:
         raise NotImplemented
+
+
+class WireRepository(RepositoryCrud, ABC):
+
+    # Bulk changes return source ids of the touched wires, the service invalidates cached frames with them
+    @abstractmethod
+    async def update_many_via_id(self, data: list[DTO]) -> list[core_types.Id_]:
+        raise NotImplemented
+
+    @abstractmethod
+    async def delete_many(self, filter_by: dict) -> list[core_types.Id_]:
+        raise NotImplemented
+
+    @abstractmethod
+    async def append_many_from_csv(self, source_id: core_types.Id_, file: typing.BinaryIO) -> int:
+        raise NotImplemented
+
+    @abstractmethod
+    async def get_rollup_as_frame(self, source_id: core_types.Id_) -> pd.DataFrame:
+        raise NotImplemented
+
+    @abstractmethod
+    async def get_start_date(self, source_id: core_types.Id_) -> pd.Timestamp:
+        raise NotImplemented
+
+    @abstractmethod
+    async def get_saldo_as_frame(self, source_id: core_types.Id_, breaks: pd.DatetimeIndex,
+                                 ccols: list[str]) -> pd.DataFrame:
+        raise NotImplemented
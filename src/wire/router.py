@@ -1,7 +1,6 @@
 import datetime
 import typing
 
-import pandas as pd
 from fastapi import APIRouter, UploadFile, Depends
 from fastapi.responses import JSONResponse
 from loguru import logger
@@ -12,6 +11,7 @@ from src.messagebus import messagebus as msgbus
 from src.repository_postgres_new import SourceRepoPostgres, WireRepoPostgres
 
 from . import entities, schema, messagebus, events
+from .cache import wire_frame_cache
 from .service import CrudService
 
 router_source = APIRouter(
@@ -54,6 +54,7 @@ async def delete_source(source_id: core_types.Id_, get_asession=Depends(db.get_a
         source_service = CrudService(source_repo)
         deleted: entities.Source = await source_service.delete_one({"id": source_id})
         await session.commit()
+        wire_frame_cache.invalidate(deleted.id)
         return deleted.id
 
 
@@ -71,10 +72,7 @@ async def get_plan_items(source_id: core_types.Id_, get_asession=Depends(db.get_
 @helpers.async_timeit
 async def bulk_append_wire_from_csv(source_id: core_types.Id_, file: UploadFile,
                                     get_asession=Depends(db.get_async_session)) -> int:
-    df = pd.read_csv(file.file, parse_dates=['date'])
-    df['date'] = pd.to_datetime(df['date'], utc=True)
-    df['source_id'] = source_id
-    event = events.WireManyCreated(source_id=source_id, wires=df.to_dict(orient='records'))
+    event = events.WireCsvAppended(source_id=source_id, file=file.file)
     async with get_asession as session:
         _ = await msgbus.handle(event, session)
         await session.commit()
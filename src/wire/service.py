@@ -1,9 +1,13 @@
+import typing
+from datetime import datetime
+
 import pandas as pd
 import pydantic
 
 from src import core_types
 from src.core_types import OrderBy, DTO
 from . import repository, entities
+from .cache import WireFrameCache, wire_frame_cache
 
 
 class CrudService:
@@ -45,6 +49,69 @@ class CrudService:
         await self.__crud_repo.delete_many(filter_by)
 
 
+class WireService(CrudService):
+
+    def __init__(self, wire_repo: repository.WireRepository, frame_cache: WireFrameCache = wire_frame_cache):
+        super().__init__(wire_repo)
+        self.__wire_repo = wire_repo
+        self.__frame_cache = frame_cache
+
+    async def get_source_frame(self, source_id: core_types.Id_, version: datetime) -> pd.DataFrame:
+        wire_df = self.__frame_cache.get(source_id, version)
+        if wire_df is None:
+            wire_df = await self.get_many_as_frame({"source_id": source_id})
+            self.__frame_cache.put(source_id, version, wire_df)
+        return wire_df
+
+    async def get_rollup_frame(self, source_id: core_types.Id_) -> pd.DataFrame:
+        return await self.__wire_repo.get_rollup_as_frame(source_id)
+
+    async def get_start_date(self, source_id: core_types.Id_) -> pd.Timestamp:
+        return await self.__wire_repo.get_start_date(source_id)
+
+    async def get_saldo_frame(self, source_id: core_types.Id_, breaks: pd.DatetimeIndex,
+                              ccols: list[str]) -> pd.DataFrame:
+        return await self.__wire_repo.get_saldo_as_frame(source_id, breaks, ccols)
+
+    async def create_one(self, data: pydantic.BaseModel) -> entities.Wire:
+        created: entities.Wire = await super().create_one(data)
+        self.__frame_cache.invalidate(created.source_id)
+        return created
+
+    async def create_many(self, data: list[DTO]) -> None:
+        await super().create_many(data)
+        source_ids = {x['source_id'] if isinstance(x, dict) else x.source_id for x in data}
+        for source_id in source_ids:
+            self.__frame_cache.invalidate(source_id)
+
+    async def append_many_from_csv(self, source_id: core_types.Id_, file: typing.BinaryIO) -> int:
+        count = await self.__wire_repo.append_many_from_csv(source_id, file)
+        self.__frame_cache.invalidate(source_id)
+        return count
+
+    async def update_one(self, data: DTO, filter_by: dict, ) -> entities.Wire:
+        updated: entities.Wire = await super().update_one(data, filter_by)
+        self.__frame_cache.invalidate(updated.source_id)
+        return updated
+
+    # source.updated_at is the transaction start time, so a frame cached earlier in the same transaction
+    # keeps a valid version after the change, the cache has to be invalidated explicitly
+    async def update_many_via_id(self, data: list[DTO]) -> None:
+        source_ids = await self.__wire_repo.update_many_via_id(data)
+        for source_id in source_ids:
+            self.__frame_cache.invalidate(source_id)
+
+    async def delete_one(self, filter_by: dict) -> entities.Wire:
+        deleted: entities.Wire = await super().delete_one(filter_by)
+        self.__frame_cache.invalidate(deleted.source_id)
+        return deleted
+
+    async def delete_many(self, filter_by: dict) -> None:
+        source_ids = await self.__wire_repo.delete_many(filter_by)
+        for source_id in source_ids:
+            self.__frame_cache.invalidate(source_id)
+
+
 class PlanItemService(CrudService):
 
     async def create_many_from_wire_df(self, source_id: core_types.Id_, wire_df: pd.DataFrame) -> None:
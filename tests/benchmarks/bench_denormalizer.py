@@ -0,0 +1,69 @@
+# Denormalizer.cells_to_table: grids reshaped with numpy vs values split into a python list of lists
+# Not collected by pytest, run with: python -m tests.benchmarks.bench_denormalizer [cell counts...]
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from src import helpers
+from src.repository_postgres_new.normalizer import Normalizer, Denormalizer
+from src.sheet import enums
+
+SIZES = [100_000, 1_000_000]
+COUNT_COLS = 5
+
+
+def create_cells(size: int) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    count_rows = size // COUNT_COLS
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.random((count_rows, COUNT_COLS - 1)).round(2),
+                      columns=[f"col_{i}" for i in range(COUNT_COLS - 1)],
+                      index=pd.Index([f"article_{i}" for i in range(count_rows)], name='article'))
+    normalizer = Normalizer(df, drop_index=False, drop_columns=False)
+    normalizer.normalize()
+    # Typed values come from the database as float64
+    cells = normalizer.get_normalized_cells().astype({'number_value': np.float64})
+    return normalizer.get_normalized_rows(), normalizer.get_normalized_cols(), cells
+
+
+def with_array_split(rows: pd.DataFrame, cols: pd.DataFrame, cells: pd.DataFrame) -> pd.DataFrame:
+    # Previous implementation: masked .loc conversions, then a python list of lists
+    cells = cells.copy()
+    top_index, left_index = rows['is_freeze'].sum(), cols['is_freeze'].sum()
+    value = cells['value'].copy()
+    is_text = cells['dtype'] == enums.CellDtype.TEXT.value
+    is_number = cells['dtype'] == enums.CellDtype.NUMBER.value
+    value.loc[is_text] = value.loc[is_text].astype(str)
+    value.loc[is_number] = cells.loc[is_number, 'number_value']
+    table = pd.DataFrame(helpers.array_split(value.tolist(), len(cols)))
+    table.columns = pd.Index(table.iloc[0], name='index')
+    table = table[:][top_index:].reset_index(drop=True)
+    index_cols = [f"__lvl_{i}" for i in range(0, left_index)]
+    table.columns = index_cols + list(table.columns[left_index:])
+    return table.set_index(index_cols)
+
+
+def with_denormalizer(rows: pd.DataFrame, cols: pd.DataFrame, cells: pd.DataFrame) -> pd.DataFrame:
+    denormalizer = Denormalizer(rows, cols, cells)
+    denormalizer.denormalize()
+    return denormalizer.get_denormalized()
+
+
+def measure(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main(sizes: list[int]):
+    for size in sizes:
+        rows, cols, cells = create_cells(size)
+        split = measure(with_array_split, rows, cols, cells)
+        reshaped = measure(with_denormalizer, rows, cols, cells)
+        print(f"cells={len(cells):>10,}  list of lists {split * 1000:6.0f}ms, "
+              f"numpy grids {reshaped * 1000:5.0f}ms (x{split / reshaped:4.1f})")
+
+
+if __name__ == "__main__":
+    main([int(x) for x in sys.argv[1:]] or SIZES)
@@ -0,0 +1,59 @@
+# Bucketing of wires by interval: pd.cut + groupby on the Interval categorical vs Buckets codes + groupby on int64
+# Not collected by pytest, run with: python -m tests.benchmarks.bench_interval [sizes...]
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.finrep.interval import Buckets
+
+SIZES = [1_000_000, 10_000_000]
+
+
+def create_wires(size: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    start = pd.Timestamp("2020-01-01", tz="UTC").value
+    end = pd.Timestamp("2023-01-01", tz="UTC").value
+    return pd.DataFrame({
+        "date": pd.to_datetime(rng.integers(start, end, size), utc=True),
+        "sender": rng.integers(0, 100, size).astype(float),
+        "saldo": rng.random(size) * 1000,
+    })
+
+
+def with_pd_cut(wires: pd.DataFrame, breaks: pd.DatetimeIndex) -> pd.DataFrame:
+    wires = wires.copy()
+    wires['interval'] = pd.cut(wires['date'], breaks, right=True)
+    return wires[['interval', 'sender', 'saldo']].dropna().groupby(['interval', 'sender']).sum()
+
+
+def with_buckets(wires: pd.DataFrame, breaks: pd.DatetimeIndex) -> pd.DataFrame:
+    codes = Buckets(breaks).get_codes(wires['date'])
+    wires = wires[['sender', 'saldo']].assign(interval=codes).loc[codes >= 0]
+    return wires.groupby(['interval', 'sender']).sum()
+
+
+def measure(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main(sizes: list[int]):
+    for freq in ["1D", "1M"]:
+        breaks = pd.date_range("2019-12-31", "2023-01-01", freq=freq)
+        for size in sizes:
+            wires = create_wires(size)
+            cut = measure(pd.cut, wires['date'], breaks)
+            codes = measure(Buckets(breaks).get_codes, wires['date'])
+            cut_total = measure(with_pd_cut, wires, breaks)
+            codes_total = measure(with_buckets, wires, breaks)
+            print(f"freq={freq:<3} wires={size:>10,}  "
+                  f"bucketing: pd.cut {cut * 1000:6.0f}ms, codes {codes * 1000:5.0f}ms (x{cut / codes:4.1f})  "
+                  f"with groupby: pd.cut {cut_total * 1000:6.0f}ms, codes {codes_total * 1000:6.0f}ms "
+                  f"(x{cut_total / codes_total:4.1f})")
+
+
+if __name__ == "__main__":
+    main([int(x) for x in sys.argv[1:]] or SIZES)
@@ -0,0 +1,54 @@
+# Normalizer text values and dtypes of cells: vectorized per column vs get_dtype applied to every cell
+# Not collected by pytest, run with: python -m tests.benchmarks.bench_normalizer [cell counts...]
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.repository_postgres_new.normalizer import Normalizer
+
+SIZES = [100_000, 1_000_000]
+COUNT_COLS = 5
+
+
+def create_frame(size: int) -> pd.DataFrame:
+    count_rows = size // COUNT_COLS
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(rng.random((count_rows, COUNT_COLS - 1)).round(2),
+                        columns=[f"col_{i}" for i in range(COUNT_COLS - 1)],
+                        index=pd.Index([f"article_{i}" for i in range(count_rows)], name='article'))
+
+
+def with_apply(df: pd.DataFrame) -> pd.DataFrame:
+    # Previous implementation: double transpose and stack of the whole table, get_dtype applied per cell
+    table = df.reset_index().transpose().reset_index().transpose()
+    flatten = pd.DataFrame(table.stack().values, columns=['value'])
+    flatten['dtype'] = flatten['value'].apply(lambda x: Normalizer.get_dtype(type(x)))
+    flatten['value'] = flatten['value'].astype(str)
+    return flatten
+
+
+def with_value_grid(df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    table = df.reset_index()
+    header = Normalizer.create_header(table, drop_columns=False)
+    return Normalizer.create_value_grid(table, header)
+
+
+def measure(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main(sizes: list[int]):
+    for size in sizes:
+        df = create_frame(size)
+        applied = measure(with_apply, df)
+        vectorized = measure(with_value_grid, df)
+        print(f"cells={size:>10,}  apply per cell {applied * 1000:6.0f}ms, "
+              f"vectorized {vectorized * 1000:5.0f}ms (x{applied / vectorized:4.1f})")
+
+
+if __name__ == "__main__":
+    main([int(x) for x in sys.argv[1:]] or SIZES)
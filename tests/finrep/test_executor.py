@@ -0,0 +1,33 @@
+import pandas as pd
+import pytest
+
+from src.finrep import executor
+
+
+@pytest.fixture()
+def wire_df():
+    return pd.DataFrame({
+        "date": pd.to_datetime(["2023-01-10", "2023-02-10", "2023-02-20", "2023-03-10"], utc=True),
+        "sender": [10.0, 20.0, 10.0, 20.0],
+        "receiver": [60.0, 60.0, 62.0, 62.0],
+        "debit": [100.0, 20.0, 30.0, 0.0],
+        "credit": [0.0, 0.0, 5.0, 40.0],
+        "sub1": ["first", "second", "first", "second"],
+    })
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("kind", ["PROCESS", "THREAD"])
+async def test_executor_gives_the_same_group_as_inline(monkeypatch, wire_df, kind):
+    monkeypatch.setattr(executor, "FINREP_EXECUTOR", "INLINE")
+    expected = await executor.run(executor.create_group_df, "PROFIT", wire_df, ["sender", "sub1"], [])
+
+    executor.shutdown()
+    monkeypatch.setattr(executor, "FINREP_EXECUTOR", kind)
+    monkeypatch.setattr(executor, "FINREP_MAX_WORKERS", 1)
+    try:
+        actual = await executor.run(executor.create_group_df, "PROFIT", wire_df, ["sender", "sub1"], [])
+    finally:
+        executor.shutdown()
+
+    pd.testing.assert_frame_equal(actual, expected)
@@ -60,3 +60,21 @@ def test_create_simple_profit_group(wire_df):
     wire = Wire(wire_df)
     real_group_df: pd.DataFrame = ProfitGroup.from_wire(wire, ccols=['sender']).get_group_df()
     pd.testing.assert_frame_equal(expected_group_df, real_group_df)
+
+
+def test_group_mapping_joins_like_merge():
+    group_df = pd.DataFrame({
+        'sender': [1.0, 1.0, 2.0, 2.0, 3.0, None],
+        'sub1': ['a', 'b', 'a', 'a', 'a', 'a'],
+        'level 1': ['x', 'y', 'z', 'w', 'x', 'x'],
+        'reverse': False,
+    })
+    wires = pd.DataFrame({
+        'sender': [2.0, 1.0, 4.0, 1.0, 3.0, 2.0],
+        'sub1': ['a', 'b', 'a', 'c', 'a', 'b'],
+    })
+    wire_rows, group_rows = ProfitGroup(group_df, ccols=['sender', 'sub1']).get_mapping(['sender', 'sub1']).join(wires)
+
+    expected = pd.merge(wires.reset_index(), group_df.reset_index(), on=['sender', 'sub1'], how='inner')
+    assert wire_rows.tolist() == expected['index_x'].tolist()
+    assert group_rows.tolist() == expected['index_y'].tolist()
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.finrep.interval import Buckets
+
+
+@pytest.fixture(scope='module')
+def dates():
+    rng = np.random.default_rng(0)
+    start = pd.Timestamp("2021-01-01", tz="UTC").value
+    end = pd.Timestamp("2021-08-01", tz="UTC").value
+    dates = pd.Series(pd.to_datetime(rng.integers(start, end, 10_000), utc=True)).dt.floor('us')
+    bounds = pd.Series(pd.to_datetime([
+        "2021-01-31T00:00:00Z", "2021-01-31T00:00:00.000001Z", "2021-01-30T23:59:59.999999Z",
+        "2020-12-31T00:00:00Z", "2021-07-31T00:00:00Z", "2021-07-31T00:00:00.000001Z", None,
+    ], utc=True, format='ISO8601'))
+    return pd.concat([dates, bounds], ignore_index=True)
+
+
+@pytest.mark.parametrize("breaks", [
+    pd.date_range("2020-12-31", "2021-07-31", freq="1D"),
+    pd.date_range("2020-12-31", "2021-07-31", freq="1M"),
+    pd.date_range("2020-12-31 06:00", "2021-07-31", freq="6h"),
+    pd.DatetimeIndex(["2020-12-31 00:00:00.5", "2021-03-01 13:00:00.25", "2021-07-31"]),
+])
+def test_bucket_codes_are_the_same_as_pd_cut_codes(dates, breaks):
+    expected = pd.cut(dates, breaks, right=True).cat.codes.to_numpy()
+    assert np.array_equal(Buckets(breaks).get_codes(dates), expected)
+
+
+def test_bucket_labels_are_right_bounds():
+    breaks = pd.date_range("2020-12-31", "2021-03-31", freq="1M")
+    buckets = Buckets(breaks)
+    assert len(buckets) == 3
+    assert list(buckets.get_labels()) == [x.right.date() for x in pd.IntervalIndex.from_breaks(breaks)]
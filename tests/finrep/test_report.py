@@ -6,8 +6,8 @@ from pathlib import Path
 
 from src.finrep.wire import Wire
 from src.finrep.group import BalanceGroup, ProfitGroup
-from src.finrep.interval import Interval
-from src.finrep.report import BalanceReport, ProfitReport
+from src.finrep.interval import Interval, Buckets
+from src.finrep.report import Report, BalanceReport, ProfitReport
 
 from src.helpers import log
 from tests.conftest import BASE_FILE_PATH
@@ -129,3 +129,44 @@ def test_create_complex_profit(wire: Wire, complex_profit_group: ProfitGroup, in
         .get_report_df()
     )
     pd.testing.assert_frame_equal(expected_report_df, real_report_df)
+
+
+@pytest.mark.parametrize("path, index_names", [
+    (SIMPLE_BALANCE_REPORT, ['level 0', 'level 1']),
+    (COMPLEX_BALANCE_REPORT, ['level 0', 'level 1', 'level 2']),
+    (COMPLEX_PROFIT_REPORT, ['level 1', 'level 2']),
+])
+def test_split_df_by_intervals_restores_report(path, index_names):
+    with open(path) as data:
+        expected = pd.read_json(data, encoding='utf8', orient='records').set_index(index_names)
+    dates = [pd.to_datetime(int(x), unit='ms') if x.isdigit() else pd.to_datetime(x) for x in expected.columns]
+    expected.columns = [x.date() for x in dates]
+
+    # Long frame of (index, interval code, saldo) like Report builds before splitting
+    long_df = expected.set_axis(range(len(expected.columns)), axis=1).stack().rename('saldo').reset_index(-1)
+    long_df.columns = ['interval', 'saldo']
+    buckets = Buckets(pd.DatetimeIndex([dates[0] - pd.Timedelta(1, unit='D')] + dates))
+
+    pd.testing.assert_frame_equal(Report._split_df_by_intervals(long_df, buckets), expected)
+
+
+def test_calculate_total_restores_profit_report_totals():
+    with open(COMPLEX_PROFIT_REPORT) as data:
+        expected = pd.read_json(data).set_index(['level 1', 'level 2'])
+    lines = expected.loc[expected.index.get_level_values('level 2') != 'TOTAL']
+
+    real = Report._calculate_total(lines, ['level 1', 'level 2'])
+    pd.testing.assert_frame_equal(real, expected)
+
+
+def test_calculate_total_puts_every_level_total_before_its_lines():
+    index_names = ['level 1', 'level 2', 'level 3']
+    index = pd.MultiIndex.from_tuples([('A', 'x', 1), ('A', 'x', 2), ('A', 'y', 3), ('B', 'z', 4)], names=index_names)
+    lines = pd.DataFrame({'saldo': [1.0, 2.0, 4.0, 8.0]}, index=index)
+
+    real = Report._calculate_total(lines, index_names)
+    assert real.index.tolist() == [
+        ('A', 'TOTAL', 'TOTAL'), ('A', 'x', 'TOTAL'), ('A', 'x', 1), ('A', 'x', 2), ('A', 'y', 'TOTAL'), ('A', 'y', 3),
+        ('B', 'TOTAL', 'TOTAL'), ('B', 'z', 'TOTAL'), ('B', 'z', 4),
+    ]
+    assert real['saldo'].tolist() == [7.0, 3.0, 1.0, 2.0, 4.0, 4.0, 8.0, 8.0, 8.0]
@@ -2,10 +2,12 @@ import numpy as np
 import pandas as pd
 import pytest
 import pytest_asyncio
-from sqlalchemy import insert
+from sqlalchemy import insert, select, func
 
+from src.repository_postgres_new import base
 from src.repository_postgres_new.normalizer import Normalizer
-from src.repository_postgres_new.sheet import RowModel, ColModel, CellModel, SheetModel
+from src.repository_postgres_new.sheet import RowModel, ColModel, CellModel, SheetModel, SheetRepoPostgres, SheetRow, \
+    SheetCol, SheetCell
 from .conftest import override_get_async_session, client
 
 
@@ -53,6 +55,13 @@ async def insert_fake_sheet():
         _ = await session.execute(insert(RowModel).values(rows.to_dict(orient='records')))
         _ = await session.execute(insert(ColModel).values(cols.to_dict(orient='records')))
         _ = await session.execute(insert(CellModel), cells.to_dict(orient='records'))
+        # Ids are set by hand, sequences go on after them
+        for model in (RowModel, ColModel, CellModel):
+            table = model.__table__.name
+            last_id = select(func.max(model.id)).scalar_subquery()
+            _ = await session.execute(select(func.setval(func.pg_get_serial_sequence(table, 'id'), last_id)))
+        await SheetRow(session).update_scroll_size(sheet_id)
+        await SheetCol(session).update_scroll_size(sheet_id)
         await session.commit()
 
 
@@ -64,6 +73,63 @@ async def test_get_one_sheet_return_200():
     assert response.status_code == 200
 
 
+@pytest.mark.asyncio
+async def test_get_one_sheet_returns_rows_of_scroll_window_only():
+    sheet_id = 13
+    url = f"/sheet/{sheet_id}"
+    response = client.get(url, params={"from_scroll": 70, "to_scroll": 120})
+    assert response.status_code == 200
+
+    sheet = response.json()
+    # The frozen header row is always sent, the row at 60 covers from_scroll
+    assert [row['index'] for row in sheet['rows']] == [0, 3, 4]
+    assert len(sheet['cols']) == 3
+    assert {cell['row_id'] for cell in sheet['cells']} == {row['id'] for row in sheet['rows']}
+    assert len(sheet['cells']) == 9
+
+
+@pytest.mark.asyncio
+async def test_get_one_compact_sheet_has_same_cells_in_row_major_order():
+    sheet_id = 13
+    url = f"/sheet/{sheet_id}"
+    sheet = client.get(url).json()
+    compact = client.get(url, params={"compact": True}).json()
+
+    assert compact['rows']['id'] == [row['id'] for row in sheet['rows']]
+    assert compact['cols']['id'] == [col['id'] for col in sheet['cols']]
+    assert compact['cells']['id'] == [cell['id'] for cell in sheet['cells']]
+    assert compact['cells']['value'] == [cell['value'] for cell in sheet['cells']]
+
+    styles = [compact['styles'][i] for i in compact['cells']['style']]
+    assert styles == [{key: cell[key] for key in styles[0]} for cell in sheet['cells']]
+    assert compact['scroll_size'] == sheet['scroll_size']
+    assert sheet['scroll_size'] == {"count_rows": 10, "count_cols": 3, "scroll_height": 300, "scroll_width": 360}
+
+
+@pytest.mark.asyncio
+async def test_get_one_as_frame_return_denormalized_table():
+    sheet_id = 13
+    async with override_get_async_session() as session:
+        df = await SheetRepoPostgres(session).get_one_as_frame(sheet_id)
+
+    assert list(df.columns) == ["first_col", "second_col", "third_col"]
+    assert df["first_col"].tolist() == [10.0, 20.0, 30.0, 40.0, 50.0, 60.0, 70.0, 80.0, 90.0, 100.0]
+    assert df["second_col"].tolist()[:3] == ["Hello", "World", "Jimmy"]
+    assert df["third_col"].tolist()[:3] == [False, True, True]
+
+
+@pytest.mark.asyncio
+async def test_get_many_as_frame_keeps_order_across_chunks(monkeypatch):
+    sheet_id = 13
+    monkeypatch.setattr(base, 'FETCH_CHUNKSIZE', 4)
+    async with override_get_async_session() as session:
+        cells = await SheetCell(session).get_many_as_frame({"sheet_id": sheet_id}, 'id', asc=False)
+        stmt = select(CellModel.id, CellModel.value).where(CellModel.sheet_id == sheet_id).order_by(CellModel.id.desc())
+        expected = (await session.execute(stmt)).all()
+
+    assert list(zip(cells['id'], cells['value'])) == expected
+
+
 @pytest.mark.asyncio
 async def test_get_col_filter_return_properly_data():
     sheet_id = 13
@@ -73,16 +139,45 @@ async def test_get_col_filter_return_properly_data():
     assert response.status_code == 200
 
     expected = [
-        {"value": "Bobby", "dtype": "TEXT", "is_filtred": True, },
-        {"value": "Hello", "dtype": "TEXT", "is_filtred": True, },
-        {"value": "Jane", "dtype": "TEXT", "is_filtred": True, },
-        {"value": "Jimmy", "dtype": "TEXT", "is_filtred": True, },
-        {"value": "Kelly", "dtype": "TEXT", "is_filtred": True, },
-        {"value": "Romeo", "dtype": "TEXT", "is_filtred": True, },
-        {"value": "World", "dtype": "TEXT", "is_filtred": True, },
+        {"value": "Bobby", "dtype": "TEXT", "is_filtred": True, "count": 1, },
+        {"value": "Hello", "dtype": "TEXT", "is_filtred": True, "count": 2, },
+        {"value": "Jane", "dtype": "TEXT", "is_filtred": True, "count": 1, },
+        {"value": "Jimmy", "dtype": "TEXT", "is_filtred": True, "count": 1, },
+        {"value": "Kelly", "dtype": "TEXT", "is_filtred": True, "count": 2, },
+        {"value": "Romeo", "dtype": "TEXT", "is_filtred": True, "count": 2, },
+        {"value": "World", "dtype": "TEXT", "is_filtred": True, "count": 1, },
     ]
     real = list(response.json()['items'])
     assert expected == real
+    assert response.json()['total_count'] == 7
+
+
+@pytest.mark.asyncio
+async def test_get_col_filter_return_page_of_searched_values():
+    sheet_id = 13
+    url = f"/sheet/{sheet_id}/retrieve-unique-cells"
+    params = {"col_id": 2, "search": "o", "search_mode": "contains", "paginate_from": 1, "paginate_to": 3}
+    response = client.get(url, params=params)
+    assert response.status_code == 200
+
+    col_filter = response.json()
+    # Bobby, Hello, Romeo and World contain "o", total is counted for the first page only
+    assert [x['value'] for x in col_filter['items']] == ["Hello", "Romeo"]
+    assert col_filter['total_count'] is None
+    assert client.get(url, params=params | {"paginate_from": 0}).json()['total_count'] == 4
+
+
+@pytest.mark.asyncio
+async def test_get_col_filter_searches_by_prefix_by_default():
+    sheet_id = 13
+    url = f"/sheet/{sheet_id}/retrieve-unique-cells"
+    col_filter = client.get(url, params={"col_id": 2, "search": "j"}).json()
+    assert [x['value'] for x in col_filter['items']] == ["Jane", "Jimmy"]
+    assert col_filter['total_count'] == 2
+
+    # No value starts with "o", LIKE wildcards are escaped
+    assert client.get(url, params={"col_id": 2, "search": "o"}).json()['items'] == []
+    assert client.get(url, params={"col_id": 2, "search": "_o"}).json()['items'] == []
 
 
 @pytest.mark.asyncio
@@ -183,3 +278,63 @@ async def test_delete_rows_return_200():
     row_ids = [2, 3, 4]
     response = client.patch(url, json=row_ids)
     assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_insert_and_move_rows_return_200():
+    sheet_id = 13
+    response = client.post(f"/sheet/{sheet_id}/insert-rows", json={"index": 2, "count": 2})
+    assert response.status_code == 200
+    row_ids = response.json()
+    assert len(row_ids) == 2
+
+    response = client.post(f"/sheet/{sheet_id}/insert-cols", json={"index": 1})
+    assert response.status_code == 200
+
+    response = client.patch(f"/sheet/{sheet_id}/move-rows", json={"sindex_ids": row_ids, "index": 100})
+    assert response.status_code == 200
+    rows = client.get(f"/sheet/{sheet_id}").json()['rows']
+    assert [row['id'] for row in rows[-2:]] == row_ids
+
+    # Stale positions were rebalanced after the responses
+    async with override_get_async_session() as session:
+        stmt = select(SheetModel.is_rows_stale, SheetModel.is_cols_stale).where(SheetModel.id == sheet_id)
+        assert tuple((await session.execute(stmt)).one()) == (False, False)
+
+
+@pytest.mark.asyncio
+async def test_insert_rows_rejects_empty_or_negative_params():
+    sheet_id = 13
+    before = client.get(f"/sheet/{sheet_id}").json()['rows']
+    for params in ({"index": 2, "count": 0}, {"index": -1}, {"index": 2, "size": 0}):
+        response = client.post(f"/sheet/{sheet_id}/insert-rows", json=params)
+        assert response.status_code == 422
+    assert client.get(f"/sheet/{sheet_id}").json()['rows'] == before
+
+
+@pytest.mark.asyncio
+async def test_sindex_scroll_pos_follow_sizes_filters_and_freeze():
+    sheet_id = 13
+    _ = client.patch(f"/sheet/{sheet_id}/update-col-width", json={"sindex_id": 2, "new_size": 50})
+    col_filter = {
+        "sheet_id": sheet_id,
+        "col_id": 2,
+        "items": [{"value": "Kelly", "dtype": "TEXT", "is_filtred": False, }],
+    }
+    _ = client.patch(f"/sheet/{sheet_id}/update-col-filter", json=col_filter)
+
+    async with override_get_async_session() as session:
+        rows = await SheetRow(session).get_many_as_frame({"sheet_id": sheet_id}, 'index')
+        cols = await SheetCol(session).get_many_as_frame({"sheet_id": sheet_id}, 'index')
+    scroll_size = client.get(f"/sheet/{sheet_id}/scroll-size").json()
+    _ = client.delete(f"/sheet/{sheet_id}/clear-all-filters")
+
+    assert (~rows['is_filtred']).sum() == 2
+    scrolled_rows = rows.loc[rows['is_filtred'] & ~rows['is_freeze']]
+    scrolled_cols = cols.loc[cols['is_filtred'] & ~cols['is_freeze']]
+    assert scroll_size == {"count_rows": len(scrolled_rows), "count_cols": len(scrolled_cols),
+                           "scroll_height": scrolled_rows['size'].sum(), "scroll_width": scrolled_cols['size'].sum()}
+    for sindexes in (rows, cols):
+        size = sindexes['size'].where(sindexes['is_filtred'] & ~sindexes['is_freeze'], 0)
+        expected = (size.cumsum() - size).where(~sindexes['is_freeze'], -1)
+        assert sindexes['scroll_pos'].tolist() == expected.tolist()
@@ -0,0 +1,401 @@
+import pandas as pd
+import pytest
+from sqlalchemy import select, literal_column
+
+from src.repository_postgres_new.sheet import SheetRepoPostgres, SheetRow, SheetCell, SheetCol, RowModel
+from src.repository_postgres_new.normalizer import SORT_KEY_GAP
+from src.sheet import events, entities, schema
+from .conftest import override_get_async_session
+
+
+@pytest.mark.asyncio
+async def test_create_and_overwrite_sheet_round_trip():
+    df = pd.DataFrame({
+        "name": ["Hello", "World", "Jimmy"],
+        "amount": [10.5, 20.0, 30.25],
+        "flag": [True, False, True],
+    })
+    async with override_get_async_session() as session:
+        repo = SheetRepoPostgres(session)
+        sheet_id = await repo.create_one(events.SheetCreated(df=df, drop_index=True, drop_columns=False))
+        await session.commit()
+
+        created = await repo.get_one_as_frame(sheet_id)
+        pd.testing.assert_frame_equal(created, df, check_dtype=False, check_names=False)
+
+        new_df = df.head(2).assign(amount=[1.0, 2.0])
+        await repo.overwrite_one(sheet_id, events.SheetCreated(df=new_df, drop_index=True, drop_columns=False))
+        await session.commit()
+
+        overwritten = await repo.get_one_as_frame(sheet_id)
+        pd.testing.assert_frame_equal(overwritten, new_df, check_dtype=False, check_names=False)
+
+        rows = await SheetRow(session).get_many_as_frame({"sheet_id": sheet_id}, 'index')
+        cells = await SheetCell(session).get_many_as_frame({"sheet_id": sheet_id})
+        assert len(rows) == 3
+        assert sorted(cells['row_id'].unique()) == sorted(rows['id'])
+
+
+@pytest.mark.asyncio
+async def test_overwrite_by_diff_keeps_ids_of_unchanged_rows_and_cells():
+    df = pd.DataFrame(
+        {"jan": [1.0, 2.0, 3.0], "feb": [4.0, 5.0, 6.0]},
+        index=pd.Index(["cash", "bank", "debt"], name="article"),
+    )
+    async with override_get_async_session() as session:
+        repo = SheetRepoPostgres(session)
+        sheet_id = await repo.create_one(events.SheetCreated(df=df, drop_index=False, drop_columns=False))
+        await session.commit()
+        old_cells = await SheetCell(session).get_many_as_frame({"sheet_id": sheet_id})
+        old_rows = await SheetRow(session).get_many_as_frame({"sheet_id": sheet_id}, 'index')
+
+        # One value changed, "debt" row dropped, "loan" row and "mar" col added, rows reordered
+        new_df = pd.DataFrame(
+            {"jan": [2.0, 1.5, 7.0], "feb": [5.0, 4.0, 8.0], "mar": [0.0, 0.0, 0.0]},
+            index=pd.Index(["bank", "cash", "loan"], name="article"),
+        )
+        changed = await repo.overwrite_one(
+            sheet_id, events.SheetCreated(df=new_df, drop_index=False, drop_columns=False), diff=True)
+        await session.commit()
+
+        # Same frame as a sheet created from scratch
+        created_id = await repo.create_one(events.SheetCreated(df=new_df, drop_index=False, drop_columns=False))
+        pd.testing.assert_frame_equal(await repo.get_one_as_frame(sheet_id), await repo.get_one_as_frame(created_id))
+        assert await repo.get_scroll_size(sheet_id) == await repo.get_scroll_size(created_id)
+
+        # 3 cells of the deleted row, 1 updated cell, 3 cells of the new row and 4 of the new col
+        assert changed == 3 + 1 + 3 + 4
+
+        new_cells = await SheetCell(session).get_many_as_frame({"sheet_id": sheet_id})
+        new_rows = await SheetRow(session).get_many_as_frame({"sheet_id": sheet_id}, 'index')
+        kept_row_ids = set(old_rows['id'].iloc[:3])
+        assert kept_row_ids <= set(new_rows['id'])
+        assert set(old_cells.loc[old_cells['row_id'].isin(kept_row_ids), 'id']) <= set(new_cells['id'])
+        assert new_rows['scroll_pos'].tolist() == [-1, 0, 30, 60]
+
+
+@pytest.mark.asyncio
+async def test_overwrite_by_diff_shows_changed_cells_hidden_by_filter():
+    df = pd.DataFrame({"jan": [1.0, 2.0, 3.0], "feb": [4.0, 5.0, 6.0]},
+                      index=pd.Index(["cash", "bank", "debt"], name="article"))
+    async with override_get_async_session() as session:
+        repo = SheetRepoPostgres(session)
+        sheet_id = await repo.create_one(events.SheetCreated(df=df, drop_index=False, drop_columns=False))
+        cols = await SheetCol(session).get_many_as_frame({"sheet_id": sheet_id}, 'index')
+        jan_col_id = int(cols['id'].iloc[1])
+        col_filter = entities.ColFilter(sheet_id=sheet_id, col_id=jan_col_id,
+                                        items=[entities.FilterItem(value="2.0", dtype='NUMBER', is_filtred=False),
+                                               entities.FilterItem(value="3.0", dtype='NUMBER', is_filtred=False)])
+        await repo.update_col_filter(events.ColFilterUpdated(sheet_id=sheet_id, col_filter=col_filter))
+
+        # "bank" is hidden by its changed jan value, "debt" is hidden by the unchanged one
+        new_df = df.assign(jan=[1.0, 20.0, 3.0])
+        await repo.overwrite_one(sheet_id, events.SheetCreated(df=new_df, drop_index=False, drop_columns=False),
+                                 diff=True)
+
+        rows = await SheetRow(session).get_many_as_frame({"sheet_id": sheet_id}, 'index')
+        cells = await SheetCell(session).get_many_as_frame({"sheet_id": sheet_id, "col_id": jan_col_id})
+        assert rows['count_hidden_cells'].tolist() == [0, 0, 0, 1]
+        assert rows['is_filtred'].tolist() == [True, True, True, False]
+        assert rows['scroll_pos'].tolist() == [-1, 0, 30, 60]
+        assert (~cells['is_filtred']).sum() == 1
+        assert await repo.get_scroll_size(sheet_id) == entities.ScrollSize(
+            count_rows=2, count_cols=2, scroll_height=60, scroll_width=240)
+
+
+@pytest.mark.asyncio
+async def test_sort_uses_typed_number_values():
+    df = pd.DataFrame({"amount": [9, 100, 2.5, 10], "name": ["a", "b", "c", "d"]})
+    async with override_get_async_session() as session:
+        repo = SheetRepoPostgres(session)
+        sheet_id = await repo.create_one(events.SheetCreated(df=df, drop_index=True, drop_columns=False))
+        cols = await SheetCol(session).get_many_as_frame({"sheet_id": sheet_id}, 'index')
+        cells = await SheetCell(session).get_many_as_frame({"sheet_id": sheet_id})
+        assert cells['number_value'].dropna().tolist() == [9.0, 100.0, 2.5, 10.0]
+
+        # Text order would be 10, 100, 2.5, 9
+        amount_col_id = int(cols['id'].iloc[0])
+        await repo.update_col_sorter(entities.ColSorter(sheet_id=sheet_id, col_id=amount_col_id, ascending=True))
+        sorted_df = await repo.get_one_as_frame(sheet_id)
+        assert sorted_df['amount'].tolist() == [2.5, 9.0, 10.0, 100.0]
+
+        # Edited cells get their typed value too
+        cell_id = int(cells.loc[cells['number_value'] == 100, 'id'].iloc[0])
+        await repo.update_cell_many(sheet_id, [schema.PartialUpdateCellSchema(
+            id=cell_id, sheet_id=sheet_id, value='1', dtype='NUMBER')])
+        await repo.update_col_sorter(entities.ColSorter(sheet_id=sheet_id, col_id=amount_col_id, ascending=False))
+        sorted_df = await repo.get_one_as_frame(sheet_id)
+        assert sorted_df['amount'].tolist() == [10.0, 9.0, 2.5, 1.0]
+        assert sorted_df['name'].tolist() == ["d", "a", "c", "b"]
+
+
+@pytest.mark.asyncio
+async def test_sort_writes_only_moved_rows():
+    df = pd.DataFrame({"amount": [1, 2, 4, 3, 5]})
+    async with override_get_async_session() as session:
+        repo = SheetRepoPostgres(session)
+        sheet_id = await repo.create_one(events.SheetCreated(df=df, drop_index=True, drop_columns=False))
+        await session.commit()
+        col_id = int((await SheetCol(session).get_many_as_frame({"sheet_id": sheet_id}, 'index'))['id'].iloc[0])
+        sorter = entities.ColSorter(sheet_id=sheet_id, col_id=col_id, ascending=True)
+
+        # xmin of a row changes when the row is written
+        rows = RowModel.__table__
+        stmt = select(rows.c.id, literal_column('xmin::text')).where(rows.c.sheet_id == sheet_id).order_by(rows.c.id)
+
+        async def get_written_rows() -> list[bool]:
+            before = (await session.execute(stmt)).all()
+            await repo.update_col_sorter(sorter)
+            await session.commit()
+            after = (await session.execute(stmt)).all()
+            return [x != y for x, y in zip(before, after)]
+
+        assert await get_written_rows() == [False, False, False, True, True, False]
+        assert await get_written_rows() == [False] * 6
+        assert (await repo.get_one_as_frame(sheet_id))['amount'].tolist() == [1, 2, 3, 4, 5]
+
+
+@pytest.mark.asyncio
+async def test_col_filters_count_hidden_cells_of_rows():
+    df = pd.DataFrame({"name": ["a", "b", "c", "a"], "kind": ["x", "x", "y", "y"]})
+    async with override_get_async_session() as session:
+        repo = SheetRepoPostgres(session)
+        sheet_id = await repo.create_one(events.SheetCreated(df=df, drop_index=True, drop_columns=False))
+        cols = await SheetCol(session).get_many_as_frame({"sheet_id": sheet_id}, 'index')
+        name_col_id, kind_col_id = cols['id'].tolist()
+
+        async def update_col_filter(col_id: int, flags: dict[str, bool]):
+            items = [entities.FilterItem(value=value, dtype='TEXT', is_filtred=flag) for value, flag in flags.items()]
+            col_filter = entities.ColFilter(sheet_id=sheet_id, col_id=col_id, items=items)
+            await repo.update_col_filter(events.ColFilterUpdated(sheet_id=sheet_id, col_filter=col_filter))
+            return await SheetRow(session).get_many_as_frame({"sheet_id": sheet_id}, 'index')
+
+        rows = await update_col_filter(name_col_id, {"a": False, "b": True})
+        assert rows['count_hidden_cells'].tolist() == [0, 1, 0, 0, 1]
+        # Header cell with the same value as a hidden one stays visible
+        rows = await update_col_filter(kind_col_id, {"x": False, "kind": False})
+        assert rows['count_hidden_cells'].tolist() == [0, 2, 1, 0, 1]
+        assert rows['is_filtred'].tolist() == [True, False, False, True, False]
+        assert rows['scroll_pos'].tolist() == [-1, 0, 0, 0, 30]
+
+        # Row stays hidden while another col hides it
+        rows = await update_col_filter(name_col_id, {"a": True})
+        assert rows['count_hidden_cells'].tolist() == [0, 1, 1, 0, 0]
+        assert rows['is_filtred'].tolist() == [True, False, False, True, True]
+
+        await repo.clear_all_filters(sheet_id)
+        rows = await SheetRow(session).get_many_as_frame({"sheet_id": sheet_id}, 'index')
+        assert rows['count_hidden_cells'].tolist() == [0, 0, 0, 0, 0]
+        assert rows['scroll_pos'].tolist() == [-1, 0, 30, 60, 90]
+
+
+@pytest.mark.asyncio
+async def test_col_filter_keeps_the_same_text_of_different_dtypes_apart():
+    df = pd.DataFrame({"code": ["1", 1, "1", "a"]})
+    async with override_get_async_session() as session:
+        repo = SheetRepoPostgres(session)
+        sheet_id = await repo.create_one(events.SheetCreated(df=df, drop_index=True, drop_columns=False))
+        col_id = int((await SheetCol(session).get_many_as_frame({"sheet_id": sheet_id}, 'index'))['id'].iloc[0])
+
+        col_filter = await repo.get_col_filter(events.ColFilterGotten(sheet_id=sheet_id, col_id=col_id))
+        assert [(x.value, x.dtype, x.count) for x in col_filter.items] == [("1", "NUMBER", 1), ("1", "TEXT", 2),
+                                                                          ("a", "TEXT", 1)]
+        assert col_filter.total_count == 3
+
+        # Only the number is hidden
+        items = [entities.FilterItem(value="1", dtype='NUMBER', is_filtred=False),
+                 entities.FilterItem(value="1", dtype='TEXT', is_filtred=True)]
+        col_filter = entities.ColFilter(sheet_id=sheet_id, col_id=col_id, items=items)
+        await repo.update_col_filter(events.ColFilterUpdated(sheet_id=sheet_id, col_filter=col_filter))
+        rows = await SheetRow(session).get_many_as_frame({"sheet_id": sheet_id}, 'index')
+        assert rows['is_filtred'].tolist() == [True, True, False, True, True]
+
+        # Col of another sheet has no values here
+        other = await repo.get_col_filter(events.ColFilterGotten(sheet_id=sheet_id + 1, col_id=col_id))
+        assert other.items == [] and other.total_count == 0
+
+
+@pytest.mark.asyncio
+async def test_col_filter_by_predicate_uses_typed_values():
+    df = pd.DataFrame({
+        "amount": [9, 100, 2.5, 10],
+        "name": ["Bank 50%", "cash", "", "Bank"],
+        "date": pd.to_datetime(["2023-01-05", "2023-02-01", "2022-12-31", "2023-03-15"]),
+    })
+    async with override_get_async_session() as session:
+        repo = SheetRepoPostgres(session)
+        sheet_id = await repo.create_one(events.SheetCreated(df=df, drop_index=True, drop_columns=False))
+        amount_col_id, name_col_id, date_col_id = (
+            await SheetCol(session).get_many_as_frame({"sheet_id": sheet_id}, 'index'))['id'].tolist()
+
+        async def get_visible(col_id: int, **predicate) -> list[bool]:
+            col_filter = entities.ColFilter(sheet_id=sheet_id, col_id=col_id,
+                                            predicate=entities.FilterPredicate(**predicate))
+            await repo.update_col_filter(events.ColFilterUpdated(sheet_id=sheet_id, col_filter=col_filter))
+            rows = await SheetRow(session).get_many_as_frame({"sheet_id": sheet_id}, 'index')
+            await repo.clear_all_filters(sheet_id)
+            return rows['is_filtred'].tolist()[1:]
+
+        # Text comparison would put "100" between "10" and "2.5"
+        assert await get_visible(amount_col_id, operator='between', dtype='NUMBER', value='5', value_to='50') \
+               == [True, False, False, True]
+        assert await get_visible(amount_col_id, operator='gt', dtype='NUMBER', value='9') == [False, True, False, True]
+        assert await get_visible(name_col_id, operator='contains', value='50%') == [True, False, False, False]
+        assert await get_visible(name_col_id, operator='starts_with', value='bank') == [True, False, False, True]
+        assert await get_visible(name_col_id, operator='is_empty') == [False, False, True, False]
+        assert await get_visible(date_col_id, operator='ge', dtype='DATE', value='2023-02-01') \
+               == [False, True, False, True]
+
+
+@pytest.mark.asyncio
+async def test_sort_by_many_cols_is_stable_and_keeps_header_on_top():
+    df = pd.DataFrame({"kind": ["b", "a", "b", "a", "a"], "amount": [1, 2, 3, 2, 1], "n": [0, 1, 2, 3, 4]})
+    async with override_get_async_session() as session:
+        repo = SheetRepoPostgres(session)
+        sheet_id = await repo.create_one(events.SheetCreated(df=df, drop_index=True, drop_columns=False))
+        kind_col_id, amount_col_id, _ = (
+            await SheetCol(session).get_many_as_frame({"sheet_id": sheet_id}, 'index'))['id'].tolist()
+
+        await repo.update_col_sorter(entities.ColSorter(
+            sheet_id=sheet_id, col_id=kind_col_id, ascending=True,
+            then_by=[entities.SortKey(col_id=amount_col_id, ascending=False)]))
+        assert (await repo.get_one_as_frame(sheet_id))['n'].tolist() == [1, 3, 4, 2, 0]
+
+        # Equal kinds keep the previous order
+        await repo.update_col_sorter(entities.ColSorter(sheet_id=sheet_id, col_id=kind_col_id, ascending=False))
+        assert (await repo.get_one_as_frame(sheet_id))['n'].tolist() == [2, 0, 1, 3, 4]
+
+        rows = await SheetRow(session).get_many_as_frame({"sheet_id": sheet_id}, 'index')
+        assert rows['is_freeze'].tolist() == [True, False, False, False, False, False]
+        assert rows['index'].tolist() == [0, 1, 2, 3, 4, 5]
+        assert rows['scroll_pos'].tolist() == [-1, 0, 30, 60, 90, 120]
+
+
+@pytest.mark.asyncio
+async def test_row_delete_and_col_resize_shift_only_the_tail():
+    df = pd.DataFrame({"name": ["a", "b", "c", "d", "e", "f", "g"], "amount": range(7), "flag": [True] * 7})
+    async with override_get_async_session() as session:
+        repo = SheetRepoPostgres(session)
+        sheet_id = await repo.create_one(events.SheetCreated(df=df, drop_index=True, drop_columns=False))
+        cols = await SheetCol(session).get_many_as_frame({"sheet_id": sheet_id}, 'index')
+        rows = await SheetRow(session).get_many_as_frame({"sheet_id": sheet_id}, 'index')
+        col_filter = entities.ColFilter(sheet_id=sheet_id, col_id=int(cols['id'].iloc[0]),
+                                        items=[entities.FilterItem(value="c", dtype='TEXT', is_filtred=False)])
+        await repo.update_col_filter(events.ColFilterUpdated(sheet_id=sheet_id, col_filter=col_filter))
+
+        # Rows "b", "c" (hidden) and "f" are deleted, "a" and the header row stay in place
+        await repo.delete_row_many(sheet_id, rows['id'].iloc[[2, 3, 6]].tolist())
+        await repo.update_col_size(events.ColWidthUpdated(sheet_id=sheet_id, sindex_id=int(cols['id'].iloc[1]),
+                                                          new_size=200))
+        await repo.update_col_size(events.ColWidthUpdated(sheet_id=sheet_id, sindex_id=int(cols['id'].iloc[0]),
+                                                          new_size=100))
+
+        assert (await repo.get_one_as_frame(sheet_id))['name'].tolist() == ["a", "d", "e", "g"]
+        rows = await SheetRow(session).get_many_as_frame({"sheet_id": sheet_id}, 'index')
+        cols = await SheetCol(session).get_many_as_frame({"sheet_id": sheet_id}, 'index')
+        assert rows['index'].tolist() == [0, 1, 2, 3, 4]
+        assert rows['scroll_pos'].tolist() == [-1, 0, 30, 60, 90]
+        assert cols['scroll_pos'].tolist() == [0, 100, 300]
+        assert await repo.get_scroll_size(sheet_id) == entities.ScrollSize(
+            count_rows=4, count_cols=3, scroll_height=120, scroll_width=420)
+
+
+@pytest.mark.asyncio
+async def test_insert_and_move_rows_keep_order_and_scroll_positions():
+    df = pd.DataFrame({"name": ["a", "b", "c", "d", "e", "f"], "amount": range(6)})
+    async with override_get_async_session() as session:
+        repo = SheetRepoPostgres(session)
+        sheet_id = await repo.create_one(events.SheetCreated(df=df, drop_index=True, drop_columns=False))
+        rows = await SheetRow(session).get_many_as_frame({"sheet_id": sheet_id}, 'index')
+
+        # Two empty rows go before "c", then "e" and "b" are moved to index 0 inside the header, so they land under it
+        await repo.insert_rows(events.RowsInserted(sheet_id=sheet_id, index=3, count=2, size=50))
+        await repo.move_rows(events.RowsMoved(sheet_id=sheet_id, row_ids=rows['id'].iloc[[5, 2]].tolist(), index=0))
+        col_ids = await repo.insert_cols(events.ColsInserted(sheet_id=sheet_id, index=1))
+
+        table = await repo.get_one_as_frame(sheet_id)
+        assert table['name'].tolist() == ["b", "e", "a", "", "", "c", "d", "f"]
+        assert list(table.columns) == ["name", "", "amount"]
+        assert table[""].tolist() == [""] * 8
+
+        def assert_positions(sindexes: pd.DataFrame):
+            size = sindexes['size'].where(sindexes['is_filtred'] & ~sindexes['is_freeze'], 0)
+            assert sindexes['index'].tolist() == list(range(len(sindexes)))
+            assert sindexes['scroll_pos'].tolist() == (size.cumsum() - size).where(~sindexes['is_freeze'], -1).tolist()
+
+        # Positions are derived from the sort keys while they are stale, the rebalance stores the same
+        derived = [await SheetRow(session).get_window_as_frame(sheet_id, 0, None),
+                   await SheetCol(session).get_window_as_frame(sheet_id, 0, None)]
+        await repo.rebalance(sheet_id)
+        stored = [await SheetRow(session).get_many_as_frame({"sheet_id": sheet_id}, 'index'),
+                  await SheetCol(session).get_many_as_frame({"sheet_id": sheet_id}, 'index')]
+        for derived_sindexes, stored_sindexes in zip(derived, stored):
+            assert_positions(derived_sindexes)
+            assert_positions(stored_sindexes)
+            assert derived_sindexes['id'].tolist() == stored_sindexes['id'].tolist()
+            assert (stored_sindexes['sort_key'] == stored_sindexes['index'] * SORT_KEY_GAP).all()
+        assert len(col_ids) == 1
+        assert await repo.get_scroll_size(sheet_id) == entities.ScrollSize(
+            count_rows=8, count_cols=3, scroll_height=280, scroll_width=360)
+
+
+@pytest.mark.asyncio
+async def test_insert_and_move_rows_write_only_these_rows():
+    df = pd.DataFrame({"name": [f"r{i}" for i in range(500)]})
+    async with override_get_async_session() as session:
+        repo = SheetRepoPostgres(session)
+        sheet_id = await repo.create_one(events.SheetCreated(df=df, drop_index=True, drop_columns=False))
+        await session.commit()
+        old_ids = (await SheetRow(session).get_many_as_frame({"sheet_id": sheet_id}, 'index'))['id'].tolist()
+
+        # xmin of a row changes when the row is written
+        rows = RowModel.__table__
+        stmt = select(rows.c.id, literal_column('xmin::text')).where(rows.c.sheet_id == sheet_id)
+
+        async def get_written_ids(change) -> set[int]:
+            before = dict((await session.execute(stmt)).all())
+            await change()
+            await session.commit()
+            after = dict((await session.execute(stmt)).all())
+            return {x for x in after if before.get(x) != after[x]}
+
+        new_ids = []
+
+        async def insert_rows():
+            new_ids.extend(await repo.insert_rows(events.RowsInserted(sheet_id=sheet_id, index=10, count=3)))
+
+        async def move_rows():
+            await repo.move_rows(events.RowsMoved(sheet_id=sheet_id, row_ids=old_ids[400:402], index=2))
+
+        assert await get_written_ids(insert_rows) == set(new_ids)
+        assert await get_written_ids(move_rows) == set(old_ids[400:402])
+
+        expected_ids = old_ids[:2] + old_ids[400:402] + old_ids[2:10] + new_ids + old_ids[10:400] + old_ids[402:]
+        rows = await SheetRow(session).get_window_as_frame(sheet_id, 0, None)
+        assert rows['id'].tolist() == expected_ids
+        assert rows['scroll_pos'].tolist() == [-1] + list(range(0, 30 * 503, 30))
+        table = await repo.get_one_as_frame(sheet_id)
+        assert table['name'].tolist()[:14] == ["r0", "r399", "r400"] + [f"r{i}" for i in range(1, 9)] + [""] * 3
+
+        await repo.rebalance(sheet_id)
+        assert (await SheetRow(session).get_many_as_frame({"sheet_id": sheet_id}, 'index'))['id'].tolist() == \
+            expected_ids
+
+
+@pytest.mark.asyncio
+async def test_inserts_rebalance_sort_keys_when_the_gap_runs_out():
+    df = pd.DataFrame({"name": ["a", "b", "c"]})
+    async with override_get_async_session() as session:
+        repo = SheetRepoPostgres(session)
+        sheet_id = await repo.create_one(events.SheetCreated(df=df, drop_index=True, drop_columns=False))
+        old_ids = (await SheetRow(session).get_many_as_frame({"sheet_id": sheet_id}, 'index'))['id'].tolist()
+
+        # Every insert goes before the previous one and halves the gap after "a", so it runs out on the way
+        new_ids = []
+        for _ in range(40):
+            new_ids.extend(await repo.insert_rows(events.RowsInserted(sheet_id=sheet_id, index=2, count=1)))
+
+        rows = await SheetRow(session).get_window_as_frame(sheet_id, 0, None)
+        assert rows['id'].tolist() == old_ids[:2] + new_ids[::-1] + old_ids[2:]
+        assert rows['scroll_pos'].tolist() == [-1] + list(range(0, 30 * 43, 30))
+        assert rows['sort_key'].is_unique
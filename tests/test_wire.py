@@ -2,8 +2,13 @@ from pathlib import Path
 
 import pytest
 import pandas as pd
+import pandera as pa
 
-from .conftest import client, BASE_FILE_PATH
+from src import finrep
+from src.messagebus import handlers_report
+from src.messagebus.handler_service import HandlerService
+from src.repository_postgres_new.wire import WireRepoPostgres
+from .conftest import client, BASE_FILE_PATH, override_get_async_session
 
 
 @pytest.mark.asyncio
@@ -66,6 +71,227 @@ async def test_append_wires_from_csv():
     assert response.status_code == 200
 
 
+@pytest.mark.asyncio
+async def test_append_wires_from_csv_in_chunks(monkeypatch):
+    monkeypatch.setattr("src.repository_postgres_new.wire.CSV_CHUNKSIZE", 3)
+
+    # Create source
+    url = "/source-db"
+    source = client.post(url, json={"title": "temp"}).json()
+
+    # Append wires
+    csv = pd.DataFrame({
+        "date": [f"2023-07-{x:02d}T07:11:05.771Z" for x in range(1, 11)],
+        "sender": [10.0, 20.1, 50, 62.1, 90.2, 10.0, 20.1, 50, 62.1, 90.2],
+        "receiver": [60.0] * 10,
+        "debit": [x * 13 for x in range(0, 10)],
+        "credit": [0] * 10,
+        "sub1": ["first", None, "first", "second", None, "first", None, "first", "second", None],
+        "sub2": [None] * 10,
+        "comment": ["hello!"] * 10,
+    }).to_csv(index=False)
+    url = f"/source-db/{source['id']}"
+    response = client.post(url, files={"file": csv})
+    assert response.status_code == 200
+
+    # Check created wires
+    url = "/wire"
+    wires = client.get(url, params={"source_id": source['id'], "order_by": "date", "asc": True}).json()
+    assert len(wires) == 10
+    assert wires[1]['sub1'] is None
+    assert wires[3]['sub1'] == "second"
+    assert wires[9]['debit'] == 117
+
+
+@pytest.mark.asyncio
+async def test_append_wires_from_csv_rejects_blank_amounts():
+    # Create source
+    url = "/source-db"
+    source = client.post(url, json={"title": "temp"}).json()
+
+    # Append wires with a blank debit cell
+    csv = "date,sender,receiver,debit,credit,sub1,sub2,comment\n" \
+          "2023-07-01T07:11:05Z,10.0,60.0,1,0,first,second,hello!\n" \
+          "2023-07-02T07:11:05Z,10.0,60.0,,0,first,second,hello!\n"
+    url = f"/source-db/{source['id']}"
+    with pytest.raises(pa.errors.SchemaError):
+        client.post(url, files={"file": csv})
+
+    wires = client.get("/wire", params={"source_id": source['id']}).json()
+    assert wires == []
+
+
+@pytest.mark.asyncio
+async def test_wire_rollup_follows_wire_changes(monkeypatch):
+    monkeypatch.setattr("src.repository_postgres_new.wire.CSV_CHUNKSIZE", 4)
+
+    # Create source with wires
+    url = "/source-db"
+    source = client.post(url, json={"title": "temp"}).json()
+    csv = pd.DataFrame({
+        "date": ["2023-07-01T00:00:00Z", "2023-07-01T07:11:05Z", "2023-07-01T23:59:00Z", "2023-07-02T00:00:00Z",
+                 "2023-07-02T10:00:00Z", "2023-07-03T10:00:00Z", "2023-07-03T11:00:00Z", "2023-07-03T12:00:00Z"],
+        "sender": [10.0, 10.0, 10.0, 10.0, 20.0, 10.0, 10.0, 20.0],
+        "receiver": [60.0] * 8,
+        "debit": [1, 2, 3, 4, 5, 6, 7, 8],
+        "credit": [0, 0, 0, 1, 1, 0, 0, 2],
+        "sub1": ["first"] * 8,
+        "sub2": ["second"] * 8,
+        "comment": ["hello!"] * 8,
+    }).to_csv(index=False)
+    client.post(f"/source-db/{source['id']}", files={"file": csv})
+
+    # Change wires
+    wires = client.get("/wire", params={"source_id": source['id'], "order_by": "date", "asc": True}).json()
+    client.patch(f"/wire/{wires[0]['id']}", json={"debit": 100})
+    client.delete(f"/wire/{wires[5]['id']}")
+
+    async with override_get_async_session() as session:
+        repo = WireRepoPostgres(session)
+        wire_df = await repo.get_many_as_frame({"source_id": source['id']})
+        rollup_df = await repo.get_rollup_as_frame(source['id'])
+
+    wire_df['date'] = wire_df['date'].dt.ceil('D')
+    expected = wire_df.groupby(['date', 'sender'])[['debit', 'credit']].sum()
+    actual = rollup_df.groupby(['date', 'sender'])[['debit', 'credit']].sum()
+    pd.testing.assert_frame_equal(actual, expected)
+    assert len(rollup_df) == 5
+
+
+@pytest.mark.asyncio
+async def test_wire_rollup_follows_bulk_wire_changes():
+    # Create source with wires
+    url = "/source-db"
+    source = client.post(url, json={"title": "temp"}).json()
+    csv = pd.DataFrame({
+        "date": ["2023-07-01T07:00:00Z", "2023-07-01T23:00:00Z", "2023-07-02T10:00:00Z", "2023-07-03T10:00:00Z"],
+        "sender": [10.0, 10.0, 20.0, 10.0],
+        "receiver": [60.0] * 4,
+        "debit": [1, 2, 3, 4],
+        "credit": [0, 1, 1, 0],
+        "sub1": ["first"] * 4,
+        "sub2": ["second"] * 4,
+        "comment": ["hello!"] * 4,
+    }).to_csv(index=False)
+    client.post(f"/source-db/{source['id']}", files={"file": csv})
+    wires = client.get("/wire", params={"source_id": source['id'], "order_by": "date", "asc": True}).json()
+
+    async with override_get_async_session() as session:
+        repo = WireRepoPostgres(session)
+        source_ids = await repo.update_many_via_id([
+            {"id": wires[0]['id'], "debit": 100.0, "sender": 20.0},
+            {"id": wires[2]['id'], "debit": 30.0, "sender": 20.0},
+        ])
+        assert source_ids == [source['id']]
+        assert await repo.delete_many({"id__$": [wires[1]['id']]}) == [source['id']]
+        await session.commit()
+
+        wire_df = await repo.get_many_as_frame({"source_id": source['id']})
+        rollup_df = await repo.get_rollup_as_frame(source['id'])
+
+    wire_df['date'] = wire_df['date'].dt.ceil('D')
+    expected = wire_df.groupby(['date', 'sender'])[['debit', 'credit']].sum()
+    actual = rollup_df.groupby(['date', 'sender'])[['debit', 'credit']].sum()
+    pd.testing.assert_frame_equal(actual, expected)
+    assert len(rollup_df) == 3
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("category", ["PROFIT", "BALANCE"])
+async def test_sql_saldo_gives_the_same_report_as_wire_df(category):
+    # Create source with wires, some of them are exactly on interval bounds
+    url = "/source-db"
+    source = client.post(url, json={"title": "temp"}).json()
+    dates = pd.date_range("2023-01-01", "2023-06-30 23:00", freq="17H", tz="UTC")
+    dates = dates.append(pd.DatetimeIndex(["2023-01-31", "2023-02-28", "2023-03-31T00:00:01"], tz="UTC"))
+    size = len(dates)
+    csv = pd.DataFrame({
+        "date": dates.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "sender": [float(x % 7) for x in range(size)],
+        "receiver": [float(x % 3 + 60) for x in range(size)],
+        "debit": [float(x % 11 * 10) for x in range(size)],
+        "credit": [float(x % 5 * 7) for x in range(size)],
+        "sub1": [f"sub{x % 4}" if x % 5 else None for x in range(size)],
+        "sub2": ["second" if x % 3 else None for x in range(size)],
+        "comment": ["hello!"] * size,
+    }).to_csv(index=False)
+    client.post(f"/source-db/{source['id']}", files={"file": csv})
+
+    # Rollup groups with empty subconto are found by the upsert of a delete
+    wires = client.get("/wire", params={"source_id": source['id'], "order_by": "date", "asc": True}).json()
+    client.delete(f"/wire/{wires[15]['id']}")
+    assert wires[15]['sub1'] is None and wires[15]['sub2'] is None
+
+    frep = finrep.FinrepFactory(category)
+    ccols = ['sender', 'sub1']
+    interval = frep.create_interval(0, 1, 0, pd.Timestamp("2023-01-01"), pd.Timestamp("2023-06-30"))
+
+    async with override_get_async_session() as session:
+        repo = WireRepoPostgres(session)
+        wire = frep.create_wire(await repo.get_many_as_frame({"source_id": source['id']}))
+        start_date = await repo.get_start_date(source['id'])
+        breaks = frep.get_breaks(interval, start_date)
+        aggregated_wire = frep.create_aggregated_wire(
+            await repo.get_saldo_as_frame(source['id'], breaks, ccols), breaks, start_date)
+
+    group = frep.create_group_from_wire(wire, ccols=ccols, fixed_ccols=ccols)
+    expected = frep.create_report(wire, group, interval).create_report_df().sort_by_group().get_report_df()
+    actual = frep.create_report(aggregated_wire, group, interval).create_report_df().sort_by_group().get_report_df()
+    assert not expected.empty
+    pd.testing.assert_frame_equal(actual, expected)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("category", ["PROFIT", "BALANCE"])
+@pytest.mark.parametrize("first_hour", [0, 7])
+async def test_rollup_engine_gives_the_same_report_as_wire_df(monkeypatch, category, first_hour):
+    monkeypatch.setattr("src.repository_postgres_new.wire.CSV_CHUNKSIZE", 50)
+
+    # Create source with wires, the first one is on midnight or inside of the day, some subconto are empty
+    url = "/source-db"
+    source = client.post(url, json={"title": "temp"}).json()
+    dates = pd.date_range(f"2023-01-01T{first_hour:02d}:00", "2023-03-31 23:00", freq="17H", tz="UTC")
+    size = len(dates)
+    csv = pd.DataFrame({
+        "date": dates.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "sender": [float(x % 7) for x in range(size)],
+        "receiver": [float(x % 3 + 60) for x in range(size)],
+        "debit": [float(x % 11 * 10) for x in range(size)],
+        "credit": [float(x % 5 * 7) for x in range(size)],
+        "sub1": [f"sub{x % 4}" if x % 5 else None for x in range(size)],
+        "sub2": ["second" if x % 3 else None for x in range(size)],
+        "comment": ["hello!"] * size,
+    }).to_csv(index=False)
+    client.post(f"/source-db/{source['id']}", files={"file": csv})
+
+    # Rollup groups with empty subconto are found by the upsert of a delete
+    wires = client.get("/wire", params={"source_id": source['id'], "order_by": "date", "asc": True}).json()
+    client.delete(f"/wire/{wires[15]['id']}")
+    assert wires[15]['sub1'] is None and wires[15]['sub2'] is None
+
+    frep = finrep.FinrepFactory(category)
+    ccols = ['sender', 'sub1']
+    interval = frep.create_interval(0, 0, 1, pd.Timestamp("2023-01-01"), pd.Timestamp("2023-03-31"))
+
+    wires = {}
+    for engine in ["WIRE", "ROLLUP"]:
+        monkeypatch.setattr(handlers_report, "REPORT_ENGINE", engine)
+        async with override_get_async_session() as session:
+            hs = HandlerService(session)
+            source_entity = await hs.source_service.get_one({"id": source['id']})
+            wires[engine] = await handlers_report.get_report_wire(hs, frep, source_entity, interval, ccols)
+
+    # Breaks lie on midnights whatever the time of the first wire, so the rollup is used
+    assert isinstance(wires["ROLLUP"], finrep.Wire)
+    wires["WIRE"] = frep.create_wire(wires["WIRE"])
+
+    group = frep.create_group_from_wire(wires["WIRE"], ccols=ccols, fixed_ccols=ccols)
+    expected = frep.create_report(wires["WIRE"], group, interval).create_report_df().sort_by_group().get_report_df()
+    actual = frep.create_report(wires["ROLLUP"], group, interval).create_report_df().sort_by_group().get_report_df()
+    assert not expected.empty
+    pd.testing.assert_frame_equal(actual, expected)
+
+
 @pytest.mark.asyncio
 async def test_create_one_wire_with_correct_data():
     # Create source
@@ -0,0 +1,57 @@
+from datetime import datetime
+
+import pandas as pd
+
+from src.wire.cache import WireFrameCache
+
+
+def create_wire_df(length: int) -> pd.DataFrame:
+    return pd.DataFrame({"sender": [1.0] * length, "debit": [100.0] * length})
+
+
+def test_cache_return_frame_for_the_same_version_only():
+    cache = WireFrameCache(max_bytes=1024 ** 2)
+    version = datetime(2023, 9, 1)
+    cache.put(1, version, create_wire_df(10))
+
+    assert cache.get(1, version) is not None
+    assert cache.get(1, datetime(2023, 9, 2)) is None
+    assert cache.get(2, version) is None
+
+
+def test_cache_evict_least_recently_used_frames():
+    wire_df = create_wire_df(1000)
+    nbytes = int(wire_df.memory_usage(deep=True).sum())
+    cache = WireFrameCache(max_bytes=nbytes * 2)
+    version = datetime(2023, 9, 1)
+
+    cache.put(1, version, wire_df)
+    cache.put(2, version, wire_df)
+    _ = cache.get(1, version)
+    cache.put(3, version, wire_df)
+
+    assert cache.get(1, version) is not None
+    assert cache.get(2, version) is None
+    assert cache.get(3, version) is not None
+    assert cache.get_total_bytes() == nbytes * 2
+
+
+def test_cache_invalidate_source():
+    cache = WireFrameCache(max_bytes=1024 ** 2)
+    version = datetime(2023, 9, 1)
+    cache.put(1, version, create_wire_df(10))
+    cache.invalidate(1)
+
+    assert cache.get(1, version) is None
+    assert cache.get_total_bytes() == 0
+
+
+def test_cache_return_shallow_copy():
+    cache = WireFrameCache(max_bytes=1024 ** 2)
+    version = datetime(2023, 9, 1)
+    cache.put(1, version, create_wire_df(10))
+
+    wire_df = cache.get(1, version)
+    wire_df['credit'] = 0.0
+
+    assert 'credit' not in cache.get(1, version).columns